@@ -7,25 +7,43 @@ This backend provides:
 - Product recommendations based on embeddings
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Literal
+import json
+import os
 
 from models.schemas import (
-    Product, SearchRequest, SearchResponse,
+    Product, ProductPage, ProductBatchRequest, ProductBatchResponse,
+    SearchRequest, SearchResponse, BatchSearchRequest,
     ChatRequest, ChatResponse,
-    RecommendationRequest, RecommendationResponse
+    RecommendationRequest, RecommendationResponse, BatchRecommendationRequest
 )
 from services.embedding_service import EmbeddingService
+from services.executor_service import ExecutorService, ExecutorSaturatedError
 from services.search_service import SearchService
 from services.rag_service import RAGService
 from services.recommendation_service import RecommendationService
+from services.reranker import CrossEncoderReranker
 from data.sample_data import PRODUCTS, DOCUMENTS
 
 
+# Number of queries encoded and scored together by the bulk endpoints
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "256"))
+
+# Cross-encoder re-ranking defaults per endpoint: candidates re-ranked (M) and
+# latency budget. Requests may override both
+SEARCH_RERANK_CANDIDATES = int(os.getenv("SEARCH_RERANK_CANDIDATES", "20"))
+SEARCH_RERANK_BUDGET_MS = float(os.getenv("SEARCH_RERANK_BUDGET_MS", "50"))
+CHAT_RERANK_CANDIDATES = int(os.getenv("CHAT_RERANK_CANDIDATES", "12"))
+CHAT_RERANK_BUDGET_MS = float(os.getenv("CHAT_RERANK_BUDGET_MS", "80"))
+
 # Global service instances
+executor_service: ExecutorService = None
 embedding_service: EmbeddingService = None
+reranker: Optional[CrossEncoderReranker] = None
 search_service: SearchService = None
 rag_service: RAGService = None
 recommendation_service: RecommendationService = None
@@ -34,19 +52,28 @@ recommendation_service: RecommendationService = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize services on startup"""
-    global embedding_service, search_service, rag_service, recommendation_service
+    global executor_service, embedding_service, reranker, search_service, rag_service, recommendation_service
     
     print("\n" + "="*60)
     print("🚀 Initializing AI Shopping Assistant Backend")
     print("="*60)
     
+    # Thread pools that keep encoding and vector store calls off the event loop
+    executor_service = ExecutorService()
+    
     # Initialize embedding service
     print("\n1️⃣ Loading embedding model...")
-    embedding_service = EmbeddingService(model_name='all-MiniLM-L6-v2')
+    embedding_service = EmbeddingService(
+        model_name='all-MiniLM-L6-v2', executor_service=executor_service
+    )
+    
+    # Optional second-stage re-ranker (enabled by setting RERANKER_MODEL)
+    if os.getenv("RERANKER_MODEL"):
+        reranker = CrossEncoderReranker()
     
     # Initialize search service
     print("\n2️⃣ Initializing search service...")
-    search_service = SearchService(embedding_service)
+    search_service = SearchService(embedding_service, executor_service=executor_service, reranker=reranker)
     
     # Index products
     print("\n3️⃣ Indexing products...")
@@ -54,7 +81,9 @@ async def lifespan(app: FastAPI):
     
     # Initialize RAG service
     print("\n4️⃣ Initializing RAG service...")
-    rag_service = RAGService(embedding_service, search_service)
+    rag_service = RAGService(
+        embedding_service, search_service, executor_service=executor_service, reranker=reranker
+    )
     
     # Index documents
     print("\n5️⃣ Indexing knowledge base...")
@@ -62,7 +91,9 @@ async def lifespan(app: FastAPI):
     
     # Initialize recommendation service
     print("\n6️⃣ Initializing recommendation service...")
-    recommendation_service = RecommendationService(search_service, embedding_service)
+    recommendation_service = RecommendationService(
+        search_service, embedding_service, executor_service=executor_service
+    )
     
     print("\n" + "="*60)
     print("✅ All services initialized successfully!")
@@ -76,6 +107,11 @@ async def lifespan(app: FastAPI):
     yield
     
     print("\n🛑 Shutting down services...")
+    saved = embedding_service.save_cache()
+    if saved:
+        print(f"   - Saved {saved} cached query embeddings")
+    embedding_service.close()
+    executor_service.shutdown()
 
 
 # Create FastAPI app
@@ -109,7 +145,10 @@ async def root():
         "endpoints": {
             "search": "/api/search",
             "chat": "/api/chat",
+            "chat_stream": "/api/chat/stream",
+            "search_batch": "/api/search/batch",
             "recommend": "/api/recommend",
+            "recommend_batch": "/api/recommend/batch",
             "products": "/api/products",
             "health": "/api/health"
         }
@@ -128,8 +167,9 @@ async def health_check():
             "recommendation": recommendation_service is not None
         },
         "stats": {
-            "products": search_service.get_stats() if search_service else {},
-            "documents": rag_service.get_stats() if rag_service else {}
+            "products": await executor_service.run_io(search_service.get_stats) if search_service else {},
+            "documents": await executor_service.run_io(rag_service.get_stats) if rag_service else {},
+            "executors": executor_service.get_stats() if executor_service else {}
         }
     }
 
@@ -137,34 +177,78 @@ async def health_check():
 @app.post("/api/search", response_model=SearchResponse)
 async def search_products(request: SearchRequest):
     """
-    Semantic search for products
+    Search for products
+    
+    mode selects semantic (embedding) search, lexical (BM25 keyword) search,
+    or hybrid, which fuses both rankings; use lexical or hybrid for brand
+    names, SKUs and exact tags.
     
     Example:
         POST /api/search
         {
             "query": "clothes for rainy weather",
-            "limit": 5
+            "limit": 5,
+            "mode": "hybrid"
         }
     """
     try:
-        products = search_service.search(
+        products = await search_service.search_async(
             query=request.query,
             limit=request.limit,
             category=request.category,
             min_price=request.min_price,
-            max_price=request.max_price
+            max_price=request.max_price,
+            mode=request.mode,
+            rerank=request.rerank if request.rerank is not None else reranker is not None,
+            rerank_candidates=request.rerank_candidates or SEARCH_RERANK_CANDIDATES,
+            rerank_budget_ms=request.rerank_budget_ms or SEARCH_RERANK_BUDGET_MS
         )
         
         return SearchResponse(
             query=request.query,
             results=products,
             total=len(products),
-            semantic_matches=True
+            semantic_matches=request.mode != "lexical"
         )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
 
+@app.post("/api/search/batch")
+async def search_products_batch(request: BatchSearchRequest):
+    """
+    Bulk semantic search, streamed as NDJSON (one SearchResponse per line)
+    
+    Queries are encoded and scored in chunks, so large jobs never buffer
+    all results in memory.
+    
+    Example:
+        POST /api/search/batch
+        {"queries": ["rain jacket", "black shirt"], "limit": 5}
+    """
+    async def stream_results():
+        try:
+            for start in range(0, len(request.queries), BATCH_CHUNK_SIZE):
+                chunk = request.queries[start:start + BATCH_CHUNK_SIZE]
+                vectors = await executor_service.run_encode(embedding_service.encode_queries, chunk)
+                results = await executor_service.run_io(
+                    search_service.search_by_vectors,
+                    vectors,
+                    request.limit,
+                    request.category,
+                    request.min_price,
+                    request.max_price
+                )
+                for query, products in zip(chunk, results):
+                    yield SearchResponse(query=query, results=products, total=len(products)).model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Search error: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -179,10 +263,14 @@ async def chat(request: ChatRequest):
         }
     """
     try:
-        answer, sources, related_products = rag_service.ask(
+        answer, sources, related_products = await rag_service.ask_async(
             question=request.question,
             context_limit=request.context_limit,
-            include_products=request.include_products
+            include_products=request.include_products,
+            mode=request.mode,
+            rerank=request.rerank if request.rerank is not None else reranker is not None,
+            rerank_candidates=request.rerank_candidates or CHAT_RERANK_CANDIDATES,
+            rerank_budget_ms=request.rerank_budget_ms or CHAT_RERANK_BUDGET_MS
         )
         
         return ChatResponse(
@@ -191,10 +279,57 @@ async def chat(request: ChatRequest):
             sources=sources,
             related_products=[Product(**p) for p in related_products] if related_products else []
         )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    RAG-based question answering streamed as Server-Sent Events
+    
+    Events arrive in order: 'sources' (list of sources), one or more
+    'answer' (a piece of answer text to append), 'products' (related
+    products, when include_products is set), then 'done'. Failures are
+    reported as an 'error' event.
+    
+    Example:
+        POST /api/chat/stream
+        {
+            "question": "How do I choose rain gear?",
+            "include_products": true
+        }
+    """
+    def event(name: str, data: Any) -> str:
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+    
+    async def stream_answer():
+        try:
+            async for name, data in rag_service.generate_answer_stream(
+                request.question,
+                request.context_limit,
+                request.include_products,
+                request.mode,
+                request.rerank if request.rerank is not None else reranker is not None,
+                request.rerank_candidates or CHAT_RERANK_CANDIDATES,
+                request.rerank_budget_ms or CHAT_RERANK_BUDGET_MS
+            ):
+                yield event(name, data)
+            yield event("done", {})
+        except ExecutorSaturatedError as e:
+            yield event("error", {"status": 503, "detail": str(e)})
+        except Exception as e:
+            yield event("error", {"status": 500, "detail": f"Chat error: {str(e)}"})
+    
+    return StreamingResponse(
+        stream_answer(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/recommend", response_model=RecommendationResponse)
 async def get_recommendations(request: RecommendationRequest):
     """
@@ -214,7 +349,7 @@ async def get_recommendations(request: RecommendationRequest):
            {"query": "casual comfortable clothing", "limit": 5}
     """
     try:
-        recommendations, scores, basis = recommendation_service.recommend_similar_items(
+        recommendations, scores, basis = await recommendation_service.recommend_similar_items_async(
             product_id=request.product_id,
             product_name=request.product_name,
             query=request.query,
@@ -226,16 +361,133 @@ async def get_recommendations(request: RecommendationRequest):
             recommendations=recommendations,
             similarity_scores=scores if scores else None
         )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation error: {str(e)}")
 
 
-@app.get("/api/products", response_model=list[Product])
-async def get_all_products():
-    """Get all products in the catalog"""
+@app.post("/api/recommend/batch")
+async def get_recommendations_batch(request: BatchRecommendationRequest):
+    """
+    Bulk recommendations, streamed as NDJSON (one RecommendationResponse per line)
+    
+    Product-based lines come first, in input order, followed by query-based lines.
+    
+    Example:
+        POST /api/recommend/batch
+        {"product_ids": ["prod_001", "prod_005"], "queries": ["gym gear"], "limit": 5}
+    """
+    if not request.product_ids and not request.queries:
+        raise HTTPException(status_code=422, detail="Provide product_ids and/or queries")
+    
+    async def stream_results():
+        try:
+            for start in range(0, len(request.product_ids), BATCH_CHUNK_SIZE):
+                chunk = request.product_ids[start:start + BATCH_CHUNK_SIZE]
+                results = await executor_service.run_io(
+                    recommendation_service.recommend_batch_by_product_ids, chunk, request.limit
+                )
+                for product_id, (recommendations, scores) in zip(chunk, results):
+                    yield RecommendationResponse(
+                        based_on=f"Similar to product {product_id}",
+                        recommendations=recommendations,
+                        similarity_scores=scores or None
+                    ).model_dump_json() + "\n"
+            
+            for start in range(0, len(request.queries), BATCH_CHUNK_SIZE):
+                chunk = request.queries[start:start + BATCH_CHUNK_SIZE]
+                vectors = await executor_service.run_encode(embedding_service.encode_queries, chunk)
+                results = await executor_service.run_io(
+                    recommendation_service.recommend_by_vectors, vectors, request.limit
+                )
+                for query, (recommendations, scores) in zip(chunk, results):
+                    yield RecommendationResponse(
+                        based_on=f"Based on your interest in '{query}'",
+                        recommendations=recommendations,
+                        similarity_scores=scores or None
+                    ).model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Recommendation error: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.get("/api/products")
+async def get_all_products(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    sort: str = "id",
+    order: Literal["asc", "desc"] = "asc",
+    fields: Optional[str] = None
+):
+    """
+    List products in the catalog
+    
+    Without `limit` the catalog (after the first `offset` products) is
+    streamed as a JSON array, page by page. With `limit` a single page is
+    returned together with a cursor for the next one.
+    
+    Examples:
+        GET /api/products
+        GET /api/products?limit=20&sort=price&order=desc&fields=name,price
+        GET /api/products?limit=20&cursor=<next_cursor>&sort=price&order=desc
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    descending = order == "desc"
+    
+    if sort not in search_service.catalog.SORT_FIELDS:
+        raise HTTPException(status_code=422, detail=f"Cannot sort by '{sort}'")
+    
+    if limit is None and cursor is None:
+        def stream_catalog():
+            yield "["
+            first = True
+            pages = search_service.catalog.iter_pages(
+                sort=sort, descending=descending, fields=field_list, offset=offset
+            )
+            for page in pages:
+                for product in page:
+                    yield ("" if first else ",") + json.dumps(product)
+                    first = False
+            yield "]"
+        
+        return StreamingResponse(stream_catalog(), media_type="application/json")
+    
+    try:
+        items, next_cursor = search_service.list_products(
+            limit=limit or 50,
+            cursor=cursor,
+            offset=offset,
+            sort=sort,
+            descending=descending,
+            fields=field_list
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    return ProductPage(items=items, next_cursor=next_cursor, total=len(search_service.catalog))
+
+
+@app.post("/api/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch(request: ProductBatchRequest):
+    """
+    Get several products in one request
+    
+    Example:
+        POST /api/products/batch
+        {"ids": ["prod_001", "prod_005", "prod_009"]}
+    """
     try:
-        products = search_service.get_all_products()
-        return products
+        products = await executor_service.run_io(search_service.get_products_by_ids, request.ids)
+        found = {p.id for p in products}
+        return ProductBatchResponse(
+            products=products,
+            missing=[product_id for product_id in dict.fromkeys(request.ids) if product_id not in found]
+        )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
 
@@ -244,12 +496,14 @@ async def get_all_products():
 async def get_product(product_id: str):
     """Get a specific product by ID"""
     try:
-        product = search_service.get_product_by_id(product_id)
+        product = await executor_service.run_io(search_service.get_product_by_id, product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
     except HTTPException:
         raise
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
 
@@ -259,13 +513,42 @@ async def get_stats():
     """Get system statistics"""
     return {
         "embedding_model": embedding_service.get_model_info(),
-        "search": search_service.get_stats(),
-        "rag": rag_service.get_stats(),
+        "query_batching": embedding_service.batch_encoder.get_stats(),
+        "query_cache": embedding_service.query_cache.get_stats(),
+        "search": await executor_service.run_io(search_service.get_stats),
+        "rag": await executor_service.run_io(rag_service.get_stats),
+        "reranker": reranker.get_stats() if reranker is not None else None,
+        "similarity_table": (
+            recommendation_service.similarity_table.get_stats()
+            if recommendation_service.similarity_table is not None else None
+        ),
+        "executors": executor_service.get_stats(),
         "total_products": len(PRODUCTS),
         "total_documents": len(DOCUMENTS)
     }
 
 
+@app.get("/api/stats/recall")
+async def get_recall_report(k: int = 10, sample_size: int = 200, nprobe: str = ""):
+    """
+    Recall@k of the approximate product index against exact search
+    
+    Example:
+        GET /api/stats/recall?k=10&nprobe=1,4,8,16
+    """
+    if search_service.index.backend != "local":
+        raise HTTPException(status_code=400, detail="Recall report requires VECTOR_STORE_BACKEND=local")
+    
+    try:
+        nprobe_values = [int(v) for v in nprobe.split(",") if v.strip()] or None
+    except ValueError:
+        raise HTTPException(status_code=422, detail="nprobe must be a comma-separated list of integers")
+    
+    return await executor_service.run_encode(
+        search_service.index.recall_report, k=k, sample_size=sample_size, nprobe_values=nprobe_values
+    )
+
+
 # ============================================================================
 # RUN SERVER
 # ============================================================================
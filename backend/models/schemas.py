@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -32,6 +32,24 @@ class Product(BaseModel):
         }
 
 
+class ProductPage(BaseModel):
+    """One page of the product catalog"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    total: int
+
+
+class ProductBatchRequest(BaseModel):
+    """Multi-ID product lookup request"""
+    ids: List[str] = Field(min_length=1, max_length=1000)
+
+
+class ProductBatchResponse(BaseModel):
+    """Multi-ID product lookup response"""
+    products: List[Product]
+    missing: List[str] = []
+
+
 class Document(BaseModel):
     """Document model for RAG knowledge base"""
     id: str
@@ -63,6 +81,20 @@ class SearchRequest(BaseModel):
     category: Optional[str] = None
     min_price: Optional[float] = None
     max_price: Optional[float] = None
+    mode: Literal["semantic", "lexical", "hybrid"] = "semantic"
+    # Cross-encoder re-ranking (defaults to on when a re-ranker is configured)
+    rerank: Optional[bool] = None
+    rerank_candidates: Optional[int] = Field(default=None, ge=1, le=200)
+    rerank_budget_ms: Optional[float] = Field(default=None, gt=0)
+
+
+class BatchSearchRequest(BaseModel):
+    """Bulk search request; results are streamed as NDJSON, one line per query"""
+    queries: List[str] = Field(min_length=1, max_length=10000)
+    limit: int = Field(default=10, ge=1, le=50)
+    category: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
 
 
 class SearchResponse(BaseModel):
@@ -78,6 +110,11 @@ class ChatRequest(BaseModel):
     question: str
     context_limit: int = Field(default=3, ge=1, le=10)
     include_products: bool = True
+    mode: Literal["semantic", "lexical", "hybrid"] = "semantic"
+    # Cross-encoder re-ranking of document candidates (defaults to on when a re-ranker is configured)
+    rerank: Optional[bool] = None
+    rerank_candidates: Optional[int] = Field(default=None, ge=1, le=50)
+    rerank_budget_ms: Optional[float] = Field(default=None, gt=0)
 
 
 class ChatResponse(BaseModel):
@@ -96,6 +133,13 @@ class RecommendationRequest(BaseModel):
     limit: int = Field(default=5, ge=1, le=20)
 
 
+class BatchRecommendationRequest(BaseModel):
+    """Bulk recommendation request; results are streamed as NDJSON, one line per input"""
+    product_ids: List[str] = Field(default=[], max_length=10000)
+    queries: List[str] = Field(default=[], max_length=10000)
+    limit: int = Field(default=5, ge=1, le=20)
+
+
 class RecommendationResponse(BaseModel):
     """Recommendation response model"""
     based_on: str
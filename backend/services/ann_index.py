@@ -0,0 +1,216 @@
+"""Inverted-file (IVF) approximate nearest-neighbour index for the local vector store"""
+
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import os
+
+
+class IVFIndex:
+    """
+    IVF index with a spherical k-means coarse quantizer
+    
+    The index does not own any vectors. Each inverted list holds row numbers
+    of the local vector store's matrix, so searches score candidates directly
+    against that matrix. Rows are assigned to their nearest centroid on
+    insert, which keeps incremental inserts cheap. Call train() again after
+    the data distribution shifts substantially.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        train_iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        Initialize IVF index
+        
+        Args:
+            dimension: Embedding dimension
+            nlist: Number of coarse centroids (IVF_NLIST, default 256)
+            nprobe: Number of lists scanned per query (IVF_NPROBE, default 8).
+                    Higher is slower with better recall.
+            train_iterations: k-means iterations used by train()
+            seed: Random seed for centroid initialization
+        """
+        self.dimension = dimension
+        self.nlist = nlist or int(os.getenv("IVF_NLIST", "256"))
+        self.nprobe = nprobe or int(os.getenv("IVF_NPROBE", "8"))
+        self.train_iterations = train_iterations
+        self.seed = seed
+        
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+        self._assignments: Dict[int, int] = {}
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    def train(self, vectors: np.ndarray, max_training_points: int = 64) -> None:
+        """
+        Learn coarse centroids with spherical k-means
+        
+        Existing assignments are discarded; re-add rows after training.
+        
+        Args:
+            vectors: L2-normalized training vectors
+            max_training_points: Sample at most this many points per centroid
+        """
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, min(self.nlist, len(vectors)))
+        
+        sample_size = min(len(vectors), nlist * max_training_points)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].astype(np.float32)
+        
+        for _ in range(self.train_iterations):
+            assignment = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            
+            # Re-seed empty clusters with random points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+        
+        self.centroids = centroids
+        self._lists = [array("q") for _ in range(nlist)]
+        self._assignments = {}
+    
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 4096) -> np.ndarray:
+        """Index of the most similar centroid for each vector, computed in blocks"""
+        nearest = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), block_size):
+            block = vectors[start:start + block_size]
+            nearest[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+        return nearest
+    
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Assign rows to their nearest inverted list
+        
+        Args:
+            rows: Row numbers in the vector store matrix
+            vectors: L2-normalized vectors for those rows
+        """
+        if not self.is_trained or len(rows) == 0:
+            return
+        
+        for row, list_id in zip(rows.tolist(), self._nearest(vectors, self.centroids).tolist()):
+            if row in self._assignments:
+                self.remove(row)
+            self._lists[list_id].append(row)
+            self._assignments[row] = list_id
+    
+    def remove(self, row: int) -> None:
+        """Remove a row from its inverted list"""
+        list_id = self._assignments.pop(row, None)
+        if list_id is not None:
+            self._lists[list_id].remove(row)
+    
+    def move(self, old_row: int, new_row: int) -> None:
+        """Renumber a row after the vector store compacts its matrix"""
+        list_id = self._assignments.pop(old_row, None)
+        if list_id is None:
+            return
+        inverted = self._lists[list_id]
+        inverted[inverted.index(old_row)] = new_row
+        self._assignments[new_row] = list_id
+    
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """
+        Rows stored in the lists closest to the query
+        
+        Args:
+            query: L2-normalized query vector
+            nprobe: Number of lists to scan (defaults to self.nprobe)
+            
+        Returns:
+            Array of candidate row numbers
+        """
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        
+        lists = [np.frombuffer(self._lists[i], dtype=np.int64) for i in probe if len(self._lists[i])]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(lists)
+    
+    def save(self, path: str) -> None:
+        """Save centroids and row assignments to an .npz file"""
+        rows = np.fromiter(self._assignments.keys(), dtype=np.int64, count=len(self._assignments))
+        lists = np.fromiter(self._assignments.values(), dtype=np.int64, count=len(self._assignments))
+        np.savez(
+            path,
+            centroids=self.centroids if self.is_trained else np.empty((0, self.dimension), dtype=np.float32),
+            rows=rows,
+            lists=lists,
+            nprobe=np.array(self.nprobe)
+        )
+    
+    def load(self, path: str) -> None:
+        """Load centroids and row assignments written by save()"""
+        with np.load(path) as data:
+            centroids = data["centroids"]
+            rows = data["rows"]
+            lists = data["lists"]
+        
+        if len(centroids) == 0:
+            self.centroids = None
+            self._lists = []
+            self._assignments = {}
+            return
+        
+        self.centroids = centroids.astype(np.float32)
+        self.nlist = len(centroids)
+        self._lists = [array("q") for _ in range(len(centroids))]
+        self._assignments = {}
+        for row, list_id in zip(rows.tolist(), lists.tolist()):
+            self._lists[list_id].append(row)
+            self._assignments[row] = list_id
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        sizes = [len(inverted) for inverted in self._lists]
+        return {
+            "type": "ivf",
+            "trained": self.is_trained,
+            "nlist": len(self._lists) if self.is_trained else self.nlist,
+            "nprobe": self.nprobe,
+            "indexed_rows": len(self._assignments),
+            "largest_list": max(sizes) if sizes else 0
+        }
+
+
+def recall_at_k(exact: List[List[str]], approximate: List[List[str]], k: int) -> float:
+    """
+    Mean fraction of the exact top-k IDs that the approximate search also returned
+    
+    Args:
+        exact: Exact top-k IDs per query
+        approximate: Approximate top-k IDs per query
+        k: Cut-off
+        
+    Returns:
+        Recall@k between 0 and 1
+    """
+    if not exact:
+        return 0.0
+    
+    total = 0.0
+    for truth, found in zip(exact, approximate):
+        truth = truth[:k]
+        if truth:
+            total += len(set(truth) & set(found[:k])) / len(truth)
+    return total / len(exact)
@@ -0,0 +1,176 @@
+"""Semantic cache of RAG answers keyed by question embedding"""
+
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import os
+import threading
+import time
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU + TTL cache of answers, matched by question similarity
+    
+    Cached question embeddings are kept L2-normalized in one matrix, so a
+    lookup is a single matrix-vector product: the most similar cached
+    question with a cosine similarity of at least the threshold (and the
+    same retrieval options) is a hit, which lets paraphrased questions share
+    an answer. Entries store the answer, sources and related product IDs.
+    Every invalidation starts a new generation; answers computed against an
+    older knowledge base are dropped instead of stored.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        max_entries: Optional[int] = None,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize answer cache
+        
+        Args:
+            dimension: Embedding dimension
+            max_entries: Maximum cached answers (ANSWER_CACHE_SIZE, default 512; 0 disables the cache)
+            threshold: Minimum cosine similarity for a hit (ANSWER_CACHE_THRESHOLD, default 0.95)
+            ttl_seconds: Lifetime of an entry (ANSWER_CACHE_TTL, default 3600; 0 = no expiry)
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+        self.threshold = threshold if threshold is not None else float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        
+        # Slot i of the matrix belongs to _entries[i]; _order tracks recency of slots
+        self._vectors = np.zeros((max(self.max_entries, 0), dimension), dtype=np.float32)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max(self.max_entries, 0)
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+        self._free = list(range(max(self.max_entries, 0) - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self._hit_similarity = 0.0
+    
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _release(self, slot: int) -> None:
+        self._entries[slot] = None
+        self._order.pop(slot, None)
+        self._free.append(slot)
+    
+    def get(self, vector: List[float], options: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached answer for a similar question
+        
+        Args:
+            vector: Question embedding
+            options: Retrieval options the answer must have been produced with
+        
+        Returns:
+            Cached entry (answer, sources, product_ids, similarity), or None on a miss
+        """
+        if self.max_entries <= 0:
+            return None
+        
+        query = self._normalize(vector)
+        with self._lock:
+            if self._order:
+                slots = np.fromiter(self._order, dtype=np.int64, count=len(self._order))
+                similarities = self._vectors[slots] @ query
+                now = time.time()
+                for position in np.argsort(-similarities, kind="stable"):
+                    if similarities[position] < self.threshold:
+                        break
+                    slot = int(slots[position])
+                    entry = self._entries[slot]
+                    if self.ttl > 0 and now - entry["created_at"] > self.ttl:
+                        self._release(slot)
+                        self._stats["expirations"] += 1
+                        continue
+                    if entry["options"] != options:
+                        continue
+                    
+                    self._order.move_to_end(slot)
+                    self._stats["hits"] += 1
+                    self._hit_similarity += float(similarities[position])
+                    return {**entry, "similarity": float(similarities[position])}
+            
+            self._stats["misses"] += 1
+            return None
+    
+    def put(
+        self,
+        vector: List[float],
+        options: Tuple,
+        answer: str,
+        sources: List[Dict[str, Any]],
+        product_ids: List[str],
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Store an answer, evicting the least recently used entry when full
+        
+        Args:
+            vector: Question embedding
+            options: Retrieval options the answer was produced with
+            answer: Answer text
+            sources: Answer sources
+            product_ids: IDs of the related products
+            generation: Cache generation read before the answer was computed;
+                        the answer is discarded if the cache was invalidated since
+        """
+        if self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            
+            if not self._free:
+                oldest = next(iter(self._order))
+                self._release(oldest)
+                self._stats["evictions"] += 1
+            
+            slot = self._free.pop()
+            self._vectors[slot] = self._normalize(vector)
+            self._entries[slot] = {
+                "options": options,
+                "answer": answer,
+                "sources": sources,
+                "product_ids": list(product_ids),
+                "created_at": time.time()
+            }
+            self._order[slot] = None
+            self._stats["stores"] += 1
+    
+    def invalidate(self) -> None:
+        """Drop every entry (the knowledge base changed) and start a new generation"""
+        with self._lock:
+            for slot in list(self._order):
+                self._release(slot)
+            self.generation += 1
+            self._stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with hit/miss counters, hit rate and occupancy
+        """
+        with self._lock:
+            hits = self._stats["hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                "entries": len(self._order),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_similarity": round(self._hit_similarity / hits, 4) if hits else 0.0
+            }
@@ -0,0 +1,121 @@
+"""Micro-batching front end that coalesces concurrent query encodings"""
+
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from services.executor_service import ExecutorService
+import asyncio
+import os
+import threading
+
+if TYPE_CHECKING:
+    from services.embedding_service import EmbeddingService
+
+
+class MicroBatchEncoder:
+    """Collect queries arriving within a short window and encode them in one forward pass"""
+    
+    def __init__(
+        self,
+        embedding_service: "EmbeddingService",
+        executor_service: ExecutorService,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        """
+        Initialize micro-batching encoder
+        
+        Args:
+            embedding_service: Instance of EmbeddingService used for encoding
+            executor_service: Pools used to run the batched forward pass
+            window_ms: How long to wait for more queries after the first one
+                       (QUERY_BATCH_WINDOW_MS, default 5; 0 disables batching)
+            max_batch_size: Flush as soon as this many queries are waiting
+                            (QUERY_BATCH_MAX_SIZE, default 32)
+        """
+        self.embedding_service = embedding_service
+        self.executor = executor_service
+        self.window = (window_ms if window_ms is not None else float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))) / 1000
+        self.max_batch_size = max_batch_size or int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+        
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+    
+    async def encode(self, text: str) -> List[float]:
+        """
+        Encode a single query, sharing the forward pass with concurrent callers
+        
+        Args:
+            text: Query text to embed
+            
+        Returns:
+            Embedding as a list of floats
+        """
+        if self.window <= 0 or self.max_batch_size <= 1:
+            embeddings = await self._encode_batch([text])
+            return embeddings[0]
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Hand the waiting queries to a background task as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+    
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = await self._encode_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+    
+    async def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        matrix = await self.executor.run_encode(
+            self.embedding_service.encode_queries, texts, batch_size=len(texts)
+        )
+        embeddings = matrix.tolist()
+        with self._lock:
+            self._batches += 1
+            self._items += len(texts)
+            self._largest_batch = max(self._largest_batch, len(texts))
+        return embeddings
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get micro-batching statistics
+        
+        Returns:
+            Dictionary with batch counts and effective batch size
+        """
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "queries": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._largest_batch
+            }
@@ -0,0 +1,276 @@
+"""In-memory product catalog with keyset pagination, sorting and projection"""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from models.schemas import Product
+import base64
+import difflib
+import json
+import math
+import os
+import threading
+
+
+class CatalogStore:
+    """
+    Product metadata keyed by product ID
+    
+    Sorted views (by id, name, price or rating) are built lazily after a
+    change and reused until the next one, so listing a page costs a binary
+    search plus a slice. Cursors encode the last (sort value, id) returned,
+    so pages stay stable while products are added or removed. A name index
+    and per-category rating rankings are built the same way, so name
+    lookups and top-rated listings never touch the vectors.
+    """
+    
+    SORT_FIELDS = ("id", "name", "price", "rating")
+    # Names sharing the most trigrams with a query that are fuzzy-scored
+    NAME_CANDIDATES = 16
+    
+    def __init__(self, name_match_cutoff: Optional[float] = None):
+        """
+        Initialize catalog
+        
+        Args:
+            name_match_cutoff: Minimum similarity (0-1) for a fuzzy name match
+                (NAME_MATCH_CUTOFF, default 0.8)
+        """
+        self.name_match_cutoff = name_match_cutoff if name_match_cutoff is not None else float(os.getenv("NAME_MATCH_CUTOFF", "0.8"))
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._views: Dict[str, List[Tuple[Any, str]]] = {}
+        self._names: Optional[Dict[str, str]] = None
+        self._name_trigrams: Dict[str, List[str]] = {}
+        self._top_rated: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self._products)
+    
+    @staticmethod
+    def _sort_value(product: Dict[str, Any], sort: str) -> Any:
+        if sort == "id":
+            return product["id"]
+        if sort == "name":
+            return product["name"].lower()
+        return float(product.get(sort) or 0.0)
+    
+    def replace_all(self, products: List[Dict[str, Any]]) -> None:
+        """Replace the catalog contents"""
+        normalized = {p["id"]: Product(**p).dict() for p in products}
+        with self._lock:
+            self._products = normalized
+            self._views = {}
+            self._names = None
+            self._top_rated = None
+    
+    def upsert(self, products: List[Dict[str, Any]]) -> None:
+        """Insert or replace products"""
+        with self._lock:
+            for product in products:
+                self._products[product["id"]] = Product(**product).dict()
+            self._views = {}
+            self._names = None
+            self._top_rated = None
+    
+    def remove(self, product_ids: List[str]) -> None:
+        """Remove products by ID"""
+        with self._lock:
+            for product_id in product_ids:
+                self._products.pop(product_id, None)
+            self._views = {}
+            self._names = None
+            self._top_rated = None
+    
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a product by ID"""
+        return self._products.get(product_id)
+    
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        return " ".join(name.lower().split())
+    
+    @staticmethod
+    def _trigrams(name: str) -> set:
+        padded = f"  {name} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def _name_index(self) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """Normalized name -> product ID, and trigram -> names containing it"""
+        with self._lock:
+            if self._names is None:
+                names: Dict[str, str] = {}
+                for product_id in sorted(self._products):
+                    names.setdefault(self._normalize_name(self._products[product_id]["name"]), product_id)
+                trigrams: Dict[str, List[str]] = {}
+                for name in names:
+                    for trigram in self._trigrams(name):
+                        trigrams.setdefault(trigram, []).append(name)
+                self._names, self._name_trigrams = names, trigrams
+            return self._names, self._name_trigrams
+    
+    def find_by_name(self, name: str) -> Optional[str]:
+        """
+        Resolve a product name to a product ID
+        
+        Tries an exact match on the normalized name (case and whitespace
+        insensitive), then the closest fuzzy match above name_match_cutoff.
+        Only the NAME_CANDIDATES names sharing the most trigrams with the
+        query, found through the trigram index, are fuzzy-scored.
+        
+        Args:
+            name: Product name as typed by the user
+            
+        Returns:
+            Product ID, or None if no name is close enough
+        """
+        names, trigrams = self._name_index()
+        normalized = self._normalize_name(name)
+        if normalized in names:
+            return names[normalized]
+        
+        shared = Counter()
+        for trigram in self._trigrams(normalized):
+            shared.update(trigrams.get(trigram, ()))
+        candidates = [candidate for candidate, _ in shared.most_common(self.NAME_CANDIDATES)]
+        close = difflib.get_close_matches(normalized, candidates, n=1, cutoff=self.name_match_cutoff)
+        return names[close[0]] if close else None
+    
+    def top_rated(self, category: str, limit: int = 5, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the highest-rated products in a category
+        
+        Each category keeps its product IDs ordered by rating (ties by ID),
+        rebuilt once after a change, so a call is a dictionary lookup and a
+        slice.
+        
+        Args:
+            category: Product category (exact match)
+            limit: Maximum number of products to return
+            offset: Number of top products to skip
+            
+        Returns:
+            Products ordered by descending rating
+        """
+        with self._lock:
+            rankings = self._top_rated
+            if rankings is None:
+                grouped: Dict[str, List[Tuple[float, str]]] = {}
+                for product_id, product in self._products.items():
+                    grouped.setdefault(product["category"], []).append((-float(product.get("rating") or 0.0), product_id))
+                rankings = {name: [product_id for _, product_id in sorted(keys)] for name, keys in grouped.items()}
+                self._top_rated = rankings
+        
+        products = []
+        for product_id in rankings.get(category, [])[offset:offset + limit]:
+            product = self._products.get(product_id)
+            if product is not None:
+                products.append(product)
+        return products
+    
+    def _view(self, sort: str) -> List[Tuple[Any, str]]:
+        with self._lock:
+            view = self._views.get(sort)
+            if view is None:
+                view = sorted((self._sort_value(p, sort), product_id) for product_id, p in self._products.items())
+                self._views[sort] = view
+            return view
+    
+    @staticmethod
+    def encode_cursor(sort: str, descending: bool, key: Tuple[Any, str]) -> str:
+        payload = json.dumps([sort, descending, key[0], key[1]])
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[Any, str]:
+        """
+        Decode a cursor produced by encode_cursor()
+        
+        Raises:
+            ValueError: If the cursor is malformed or was issued for another ordering
+        """
+        try:
+            cursor_sort, cursor_desc, value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if cursor_sort != sort or cursor_desc != descending:
+            raise ValueError("Cursor was issued for a different sort order")
+        # Cursor keys are compared against the sort view, so they must have its types
+        if sort in ("id", "name"):
+            valid = isinstance(value, str)
+        else:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+            value = float(value) if valid else value
+        if not valid or not isinstance(product_id, str):
+            raise ValueError("Invalid cursor")
+        return (value, product_id)
+    
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        sort: str = "id",
+        descending: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of products
+        
+        Args:
+            limit: Maximum number of products on the page
+            cursor: Cursor returned with the previous page (takes precedence over offset)
+            offset: Number of products to skip when no cursor is given
+            sort: Sort field, one of SORT_FIELDS
+            descending: Sort in descending order
+            fields: Product fields to include (all fields if omitted; 'id' is always included)
+            
+        Returns:
+            Tuple of (products, cursor for the next page or None)
+        """
+        if sort not in self.SORT_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort}'; choose one of {', '.join(self.SORT_FIELDS)}")
+        
+        view = self._view(sort)
+        if descending:
+            end = len(view) - offset
+            if cursor:
+                end = bisect_left(view, self.decode_cursor(cursor, sort, descending))
+            start = max(0, end - limit)
+            keys = view[start:max(0, end)][::-1]
+            has_more = start > 0
+        else:
+            start = offset
+            if cursor:
+                start = bisect_right(view, self.decode_cursor(cursor, sort, descending))
+            keys = view[start:start + limit]
+            has_more = start + limit < len(view)
+        
+        products = []
+        for key in keys:
+            product = self._products.get(key[1])
+            if product is None:
+                continue
+            if fields:
+                product = {name: product[name] for name in ["id", *fields] if name in product}
+            products.append(product)
+        
+        next_cursor = self.encode_cursor(sort, descending, keys[-1]) if keys and has_more else None
+        return products, next_cursor
+    
+    def iter_pages(
+        self,
+        page_size: int = 500,
+        sort: str = "id",
+        descending: bool = False,
+        fields: Optional[List[str]] = None,
+        offset: int = 0
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over the catalog page by page, skipping the first `offset` products"""
+        cursor = None
+        while True:
+            products, cursor = self.page(page_size, cursor, offset, sort, descending, fields)
+            if products:
+                yield products
+            if not cursor:
+                break
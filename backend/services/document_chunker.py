@@ -0,0 +1,129 @@
+"""Token-aware document chunking for the RAG knowledge base"""
+
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+import os
+import re
+
+
+class DocumentChunker:
+    """
+    Split documents into overlapping passages that fit the embedding model
+    
+    Text is measured in model tokens when the tokenizer can report character
+    offsets (Hugging Face fast tokenizers); otherwise whitespace-separated
+    words stand in for tokens. Windows of chunk_tokens tokens advance by
+    chunk_tokens - overlap_tokens, and their edges are moved to word
+    boundaries so no word is cut in half. Chunks are produced lazily, one
+    document at a time, so large manuals never sit in memory as a whole
+    chunk list.
+    """
+    
+    WORD_PATTERN = re.compile(r"\S+")
+    
+    def __init__(
+        self,
+        tokenizer: Any = None,
+        chunk_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None
+    ):
+        """
+        Initialize chunker
+        
+        Args:
+            tokenizer: Model tokenizer used to count tokens (word counts if omitted)
+            chunk_tokens: Maximum tokens per chunk (CHUNK_TOKENS, default 200)
+            overlap_tokens: Tokens shared by consecutive chunks (CHUNK_OVERLAP, default 40)
+        """
+        self.tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens or int(os.getenv("CHUNK_TOKENS", "200"))
+        self.overlap_tokens = overlap_tokens if overlap_tokens is not None else int(os.getenv("CHUNK_OVERLAP", "40"))
+        if not 0 <= self.overlap_tokens < self.chunk_tokens:
+            raise ValueError("CHUNK_OVERLAP must be at least 0 and smaller than CHUNK_TOKENS")
+    
+    @property
+    def settings(self) -> Dict[str, int]:
+        """Parameters that determine chunk boundaries (part of the content hash)"""
+        return {"chunk_tokens": self.chunk_tokens, "overlap_tokens": self.overlap_tokens}
+    
+    def _spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character span of every token in the text"""
+        if self.tokenizer is not None:
+            try:
+                encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+                offsets = encoded.get("offset_mapping") if hasattr(encoded, "get") else None
+                if offsets:
+                    return [(int(start), int(end)) for start, end in offsets if end > start]
+            except Exception:
+                pass
+        return [match.span() for match in self.WORD_PATTERN.finditer(text)]
+    
+    @staticmethod
+    def _word_start(spans: List[Tuple[int, int]], index: int, floor: int) -> int:
+        """
+        Move a token index to the first token of a word
+        
+        Moves back to the start of the current word, but not below floor; a
+        word that starts before floor is skipped forward instead.
+        """
+        def inside_word(i: int) -> bool:
+            return 0 < i < len(spans) and spans[i][0] == spans[i - 1][1]
+        
+        start = index
+        while start > floor and inside_word(start):
+            start -= 1
+        if inside_word(start):
+            start = index
+            while inside_word(start):
+                start += 1
+        return start
+    
+    def split(self, text: str) -> Iterator[str]:
+        """
+        Split text into overlapping passages
+        
+        Args:
+            text: Text to split
+        
+        Yields:
+            Passages of at most chunk_tokens tokens (a single word longer than
+            that is kept whole)
+        """
+        spans = self._spans(text)
+        if not spans:
+            return
+        
+        start = 0
+        while start < len(spans):
+            end = min(start + self.chunk_tokens, len(spans))
+            if end < len(spans):
+                # Do not cut a word in half
+                end = self._word_start(spans, end, start + 1)
+            yield text[spans[start][0]:spans[end - 1][1]]
+            
+            if end >= len(spans):
+                break
+            start = min(self._word_start(spans, max(end - self.overlap_tokens, start + 1), start + 1), end)
+    
+    def chunk_document(self, doc: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Split one document into chunk records
+        
+        Args:
+            doc: Document dictionary with 'id' and 'content'
+        
+        Yields:
+            Dictionaries with id ('<doc id>#<n>'), parent_id, chunk index and text
+        """
+        for index, passage in enumerate(self.split(doc['content'])):
+            yield {
+                "id": f"{doc['id']}#{index}",
+                "parent_id": doc['id'],
+                "chunk": index,
+                "text": passage,
+                "document": doc
+            }
+    
+    def chunk_documents(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily chunk a stream of documents"""
+        for doc in documents:
+            yield from self.chunk_document(doc)
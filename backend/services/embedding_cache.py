@@ -0,0 +1,204 @@
+"""Bounded LRU + TTL cache for query embeddings"""
+
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import os
+import threading
+import time
+
+
+class QueryEmbeddingCache:
+    """Thread-safe query embedding cache keyed on normalized text and model name"""
+    
+    # Rough per-entry bookkeeping cost (key tuple, OrderedDict node, array header)
+    ENTRY_OVERHEAD_BYTES = 200
+    
+    def __init__(
+        self,
+        model_name: str,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize query embedding cache
+        
+        Args:
+            model_name: Name of the model the cached embeddings belong to
+            max_bytes: Memory budget for cached entries
+                       (EMBEDDING_CACHE_MAX_MB, default 64 MB; 0 disables the cache)
+            ttl_seconds: Lifetime of an entry (EMBEDDING_CACHE_TTL, default 3600; 0 = no expiry)
+        """
+        self.model_name = model_name
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64")) * 1024 * 1024)
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+        
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize query text so trivial variations share an entry"""
+        return " ".join(text.lower().split())
+    
+    def _key(self, text: str) -> Tuple[str, str]:
+        return (self.model_name, self.normalize(text))
+    
+    def _entry_size(self, key: Tuple[str, str], vector: np.ndarray) -> int:
+        return vector.nbytes + len(key[1]) + self.ENTRY_OVERHEAD_BYTES
+    
+    def _remove(self, key: Tuple[str, str]) -> None:
+        vector, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, vector)
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Cached embedding, or None on a miss or expired entry
+        """
+        if self.max_bytes <= 0:
+            return None
+        
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl > 0 and time.time() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            
+            if entry is None:
+                self._misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0].tolist()
+    
+    def put(self, text: str, embedding: List[float], created_at: Optional[float] = None) -> None:
+        """
+        Store an embedding, evicting least recently used entries to stay within budget
+        
+        Args:
+            text: Query text
+            embedding: Embedding vector
+            created_at: Creation timestamp (defaults to now)
+        """
+        if self.max_bytes <= 0:
+            return
+        
+        key = self._key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, created_at if created_at is not None else time.time())
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def save(self, path: str) -> int:
+        """
+        Persist live entries to disk
+        
+        Args:
+            path: Target .npz file
+            
+        Returns:
+            Number of entries written
+        """
+        with self._lock:
+            now = time.time()
+            items = [
+                (key[1], vector, created)
+                for key, (vector, created) in self._entries.items()
+                if self.ttl <= 0 or now - created <= self.ttl
+            ]
+        
+        if not items:
+            return 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        np.savez(
+            path,
+            model_name=np.array(self.model_name),
+            texts=np.array([text for text, _, _ in items]),
+            vectors=np.stack([vector for _, vector, _ in items]),
+            created_at=np.array([created for _, _, created in items], dtype=np.float64)
+        )
+        return len(items)
+    
+    def load(self, path: str) -> int:
+        """
+        Warm the cache from a file written by save()
+        
+        Entries for a different model or already expired are skipped.
+        
+        Args:
+            path: Source .npz file
+            
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(path):
+            return 0
+        
+        with np.load(path) as data:
+            if str(data["model_name"]) != self.model_name:
+                return 0
+            texts = data["texts"]
+            vectors = data["vectors"]
+            created_at = data["created_at"]
+        
+        now = time.time()
+        loaded = 0
+        for text, vector, created in zip(texts, vectors, created_at):
+            if self.ttl > 0 and now - created > self.ttl:
+                continue
+            self.put(str(text), vector, created_at=float(created))
+            loaded += 1
+        return loaded
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with hit/miss counters and memory usage
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
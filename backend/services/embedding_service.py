@@ -1,14 +1,37 @@
 """Embedding service for generating and managing vector embeddings"""
 
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from services.executor_service import ExecutorService, get_executor_service
+from services.batching_encoder import MicroBatchEncoder
+from services.embedding_cache import QueryEmbeddingCache
+from services.encoding_pool import ProcessEncodingPool
 import numpy as np
+import os
+import threading
+import time
 
 
 class EmbeddingService:
     """Service for generating embeddings using sentence transformers"""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    # Sentences used to check that the ONNX backend matches PyTorch
+    PARITY_PROBES = [
+        "Waterproof hiking boots for rainy trails",
+        "How do I care for a leather jacket?",
+        "wireless earbuds with noise cancellation and long battery life",
+        "Gift ideas for a runner under $50",
+        "Return policy: 30-day returns on all unused items in original packaging. "
+        "Refunds are processed within 5-7 business days after we receive the item."
+    ]
+    
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        executor_service: Optional[ExecutorService] = None,
+        backend: Optional[str] = None,
+        encode_processes: Optional[int] = None
+    ):
         """
         Initialize embedding service
         
@@ -16,37 +39,333 @@ class EmbeddingService:
             model_name: Name of the sentence transformer model to use
                        'all-MiniLM-L6-v2' is fast and good quality (default)
                        'all-mpnet-base-v2' is slower but higher quality
+            executor_service: Pools used for async encoding (shared default if omitted)
+            backend: Inference backend, 'torch' or 'onnx' (EMBEDDING_BACKEND, default 'torch')
+            encode_processes: Worker processes for large bulk encodes (ENCODE_PROCESSES, default 0 = off)
         """
         print(f"Loading embedding model: {model_name}")
         self.model = SentenceTransformer(model_name)
         self.model_name = model_name
+        self.backend = "torch"
+        self.parity: Optional[float] = None
+        if (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower() == "onnx":
+            self._load_onnx_backend()
+        
+        # Padded tokens per forward pass in bulk encoding (batches are length-bucketed)
+        self.token_budget = int(os.getenv("ENCODE_TOKEN_BUDGET", "8192"))
+        self._bulk_lock = threading.Lock()
+        self._bulk_stats = {
+            "texts": 0, "batches": 0, "tokens": 0, "padded_tokens": 0,
+            "unbucketed_padded_tokens": 0, "truncated": 0, "seconds": 0.0
+        }
+        # Bulk encodes of at least ENCODE_PROCESS_THRESHOLD texts are spread over worker processes
+        self.process_pool = ProcessEncodingPool(
+            model_name, self.backend, encode_processes,
+            quantize=self.model.quantize if self.backend == "onnx" else None
+        )
+        self.batch_encoder = MicroBatchEncoder(self, executor_service or get_executor_service())
         print(f"✓ Model loaded successfully")
+        
+        # Cache for repeated query embeddings, optionally warmed from disk
+        self.query_cache = QueryEmbeddingCache(self.model_id)
+        self.cache_path = os.getenv("EMBEDDING_CACHE_PATH")
+        if self.cache_path:
+            loaded = self.query_cache.load(self.cache_path)
+            print(f"✓ Warmed query cache with {loaded} embeddings")
+    
+    @classmethod
+    def for_worker(cls, model_name: str, backend: str, threads: int, quantize: Optional[bool] = None) -> "EmbeddingService":
+        """
+        Create the minimal service an encoding process needs for encode_matrix()
+        
+        Only the encoder the parent settled on is loaded: the ONNX model the
+        parent already exported is opened without a parity probe, and there is
+        no query cache, micro-batcher or nested process pool.
+        
+        Args:
+            model_name: Name of the sentence transformer model
+            backend: Backend active in the parent, 'torch' or 'onnx'
+            threads: Inference threads of this process
+            quantize: Whether the parent's ONNX model is int8-quantized
+        """
+        service = cls.__new__(cls)
+        service.model = SentenceTransformer(model_name)
+        if backend == "onnx":
+            from services.onnx_encoder import OnnxEncoder
+            
+            service.model = OnnxEncoder(service.model, model_name, quantize=quantize, intra_op_threads=threads)
+        service.model_name = model_name
+        service.backend = backend
+        service.parity = None
+        service.token_budget = int(os.getenv("ENCODE_TOKEN_BUDGET", "8192"))
+        service._bulk_lock = threading.Lock()
+        service._bulk_stats = {
+            "texts": 0, "batches": 0, "tokens": 0, "padded_tokens": 0,
+            "unbucketed_padded_tokens": 0, "truncated": 0, "seconds": 0.0
+        }
+        service.process_pool = ProcessEncodingPool(model_name, backend, workers=0)
+        return service
+    
+    @property
+    def model_id(self) -> str:
+        """
+        Identity of the vectors this service produces
+        
+        The model name, plus the backend and precision when not running the
+        PyTorch model, so cached query embeddings and index manifests are
+        invalidated when EMBEDDING_BACKEND or ONNX_QUANTIZE changes.
+        """
+        if self.backend == "onnx":
+            return f"{self.model_name}@onnx-{'int8' if self.model.quantize else 'fp32'}"
+        return self.model_name
+    
+    def _load_onnx_backend(self) -> None:
+        """
+        Switch inference to ONNX Runtime if its embeddings match PyTorch
+        
+        The probe sentences are embedded by both backends; if the lowest
+        cosine similarity is below ONNX_PARITY_MIN_COSINE (default 0.99),
+        or the export fails, the PyTorch model stays in use.
+        """
+        try:
+            from services.onnx_encoder import OnnxEncoder, min_cosine_similarity
+            
+            encoder = OnnxEncoder(self.model, self.model_name)
+            reference = np.asarray(self.model.encode(self.PARITY_PROBES, convert_to_numpy=True), dtype=np.float32)
+            self.parity = round(min_cosine_similarity(reference, encoder.encode(self.PARITY_PROBES)), 6)
+        except Exception as e:
+            print(f"⚠️  ONNX backend unavailable, using PyTorch: {e}")
+            return
+        
+        min_cosine = float(os.getenv("ONNX_PARITY_MIN_COSINE", "0.99"))
+        if self.parity < min_cosine:
+            print(f"⚠️  ONNX embeddings drift from PyTorch (min cosine {self.parity} < {min_cosine}), using PyTorch")
+            return
+        
+        self.model = encoder
+        self.backend = "onnx"
+        print(f"✓ ONNX Runtime backend active ({'int8' if encoder.quantize else 'fp32'}, "
+              f"{encoder.intra_op_threads} threads, min cosine vs PyTorch {self.parity})")
     
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
         
+        Repeated queries are served from the query embedding cache.
+        
+        Args:
+            text: Input text to embed
+            
+        Returns:
+            List of floats representing the embedding
+        """
+        cached = self.query_cache.get(text)
+        if cached is not None:
+            return cached
+        
+        embedding = self.model.encode(text, convert_to_tensor=False).tolist()
+        self.query_cache.put(text, embedding)
+        return embedding
+    
+    async def generate_embedding_async(self, text: str) -> List[float]:
+        """
+        Generate embedding for a single query without blocking the event loop
+        
+        Cache misses from concurrent calls are coalesced into a single
+        forward pass by the micro-batching encoder.
+        
         Args:
             text: Input text to embed
             
         Returns:
             List of floats representing the embedding
         """
-        embedding = self.model.encode(text, convert_to_tensor=False)
-        return embedding.tolist()
+        cached = self.query_cache.get(text)
+        if cached is not None:
+            return cached
+        
+        embedding = await self.batch_encoder.encode(text)
+        self.query_cache.put(text, embedding)
+        return embedding
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = True
+    ) -> List[List[float]]:
         """
         Generate embeddings for multiple texts (batch processing)
         
         Args:
             texts: List of input texts to embed
+            batch_size: Number of texts per forward pass
+            show_progress_bar: Whether to display the encoding progress bar
             
         Returns:
             List of embeddings
         """
-        embeddings = self.model.encode(texts, convert_to_tensor=False, show_progress_bar=True)
-        return [emb.tolist() for emb in embeddings]
+        return self.encode_matrix(texts, batch_size, show_progress_bar).tolist()
+    
+    def encode_queries(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode short query texts into a float32 matrix
+        
+        The interactive path: a single model.encode() call, without the
+        length bucketing, token counting and statistics of encode_matrix().
+        
+        Args:
+            texts: Query texts
+            batch_size: Number of texts per forward pass
+            
+        Returns:
+            Array of shape (len(texts), embedding_dimension)
+        """
+        embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+    
+    def encode_matrix(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """
+        Encode texts into a contiguous float32 matrix
+        
+        Prefer this over generate_embeddings() for bulk work: it skips the
+        conversion to Python lists, which costs roughly 10x the memory.
+        
+        Texts are sorted by token length and grouped into length-homogeneous
+        batches of at most batch_size texts and ENCODE_TOKEN_BUDGET padded
+        tokens, so short names are not padded to the length of long
+        descriptions. Rows are returned in the original order. Large inputs
+        are sharded across the encoding process pool when it is enabled.
+        
+        Args:
+            texts: List of input texts to embed
+            batch_size: Maximum number of texts per forward pass
+            show_progress_bar: Whether to display the encoding progress bar
+            
+        Returns:
+            Array of shape (len(texts), embedding_dimension)
+        """
+        dimension = self.model.get_sentence_embedding_dimension()
+        if not texts:
+            return np.zeros((0, dimension), dtype=np.float32)
+        
+        start = time.perf_counter()
+        if self.process_pool.enabled and len(texts) >= self.process_pool.threshold:
+            embeddings, counters = self.process_pool.encode(texts, dimension, batch_size)
+            # Worker time overlaps; throughput is measured on the wall clock
+            self._record_bulk({**counters, "seconds": time.perf_counter() - start})
+            return embeddings
+        
+        # Counted one token past max_seq_length, so truncated texts can be told apart
+        lengths = self._token_lengths(texts)
+        truncated = int((lengths > self.model.max_seq_length).sum())
+        lengths = np.minimum(lengths, self.model.max_seq_length)
+        order = np.argsort(lengths, kind="stable")
+        buckets = self._length_buckets(lengths[order], batch_size)
+        
+        progress = None
+        if show_progress_bar:
+            from tqdm.auto import tqdm
+            progress = tqdm(total=len(texts), desc="Batches")
+        
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        padded = 0
+        for begin, end in buckets:
+            rows = order[begin:end]
+            embeddings[rows] = self.model.encode(
+                [texts[i] for i in rows],
+                batch_size=end - begin,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            padded += int(lengths[rows[-1]]) * (end - begin)
+            if progress is not None:
+                progress.update(end - begin)
+        if progress is not None:
+            progress.close()
+        
+        # Padding the same texts would have cost in fixed-size batches of input order
+        unbucketed = sum(
+            int(lengths[i:i + batch_size].max()) * len(lengths[i:i + batch_size])
+            for i in range(0, len(lengths), batch_size)
+        )
+        self._record_bulk({
+            "texts": len(texts),
+            "batches": len(buckets),
+            "tokens": int(lengths.sum()),
+            "padded_tokens": padded,
+            "unbucketed_padded_tokens": unbucketed,
+            "truncated": truncated,
+            "seconds": time.perf_counter() - start
+        })
+        return embeddings
+    
+    def _record_bulk(self, counters: Dict[str, Any]) -> None:
+        with self._bulk_lock:
+            for key, value in counters.items():
+                self._bulk_stats[key] += value
+    
+    def get_bulk_counters(self) -> Dict[str, Any]:
+        """Raw cumulative bulk encoding counters"""
+        with self._bulk_lock:
+            return dict(self._bulk_stats)
+    
+    def _token_lengths(self, texts: List[str]) -> np.ndarray:
+        """Token count of each text, capped at max_seq_length + 1 (word counts without a tokenizer)"""
+        max_length = self.model.max_seq_length + 1
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is not None:
+            try:
+                encoded = tokenizer(texts, truncation=True, max_length=max_length)
+                return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+            except Exception:
+                pass
+        return np.fromiter((min(len(text.split()) + 2, max_length) for text in texts), dtype=np.int64, count=len(texts))
+    
+    def _length_buckets(self, sorted_lengths: np.ndarray, batch_size: int) -> List[tuple]:
+        """
+        Split ascending token lengths into (start, end) batches
+        
+        A batch grows while it holds at most batch_size texts and its padded
+        size (texts x longest length) stays within the token budget; a
+        single text always forms a batch of its own.
+        """
+        buckets = []
+        begin = 0
+        for i, length in enumerate(sorted_lengths):
+            count = i - begin + 1
+            if count > 1 and (count > batch_size or count * int(length) > self.token_budget):
+                buckets.append((begin, i))
+                begin = i
+        buckets.append((begin, len(sorted_lengths)))
+        return buckets
+    
+    def get_encoding_stats(self) -> Dict[str, Any]:
+        """
+        Get bulk encoding throughput and padding statistics
+        
+        padding_waste is the share of computed tokens that were padding;
+        unbucketed_padding_waste is what it would have been without length
+        bucketing. A high truncated count suggests raising max_seq_length.
+        
+        Returns:
+            Dictionary with token counts, tokens/s and padding waste
+        """
+        stats = self.get_bulk_counters()
+        tokens, padded, unbucketed = stats["tokens"], stats["padded_tokens"], stats["unbucketed_padded_tokens"]
+        return {
+            **stats,
+            "seconds": round(stats["seconds"], 3),
+            "token_budget": self.token_budget,
+            "tokens_per_second": round(tokens / stats["seconds"], 1) if stats["seconds"] else 0.0,
+            "padding_waste": round(1 - tokens / padded, 4) if padded else 0.0,
+            "unbucketed_padding_waste": round(1 - tokens / unbucketed, 4) if unbucketed else 0.0
+        }
     
     def compute_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
@@ -66,6 +385,21 @@ class EmbeddingService:
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
         return float(similarity)
     
+    def close(self) -> None:
+        """Stop the encoding worker processes, if any were started"""
+        self.process_pool.close()
+    
+    def save_cache(self) -> int:
+        """
+        Persist the query cache to EMBEDDING_CACHE_PATH, if configured
+        
+        Returns:
+            Number of cached embeddings written
+        """
+        if not self.cache_path:
+            return 0
+        return self.query_cache.save(self.cache_path)
+    
     def get_model_info(self) -> Dict[str, Any]:
         """
         Get information about the loaded model
@@ -73,8 +407,18 @@ class EmbeddingService:
         Returns:
             Dictionary with model information
         """
-        return {
+        info = {
             "model_name": self.model_name,
+            "model_id": self.model_id,
             "embedding_dimension": self.model.get_sentence_embedding_dimension(),
-            "max_seq_length": self.model.max_seq_length
+            "max_seq_length": self.model.max_seq_length,
+            "backend": self.backend,
+            "bulk_encoding": self.get_encoding_stats()
         }
+        if self.parity is not None:
+            info["onnx_parity_min_cosine"] = self.parity
+        if self.backend == "onnx":
+            info["onnx"] = self.model.get_stats()
+        if self.process_pool.enabled:
+            info["process_pool"] = self.process_pool.get_stats()
+        return info
@@ -0,0 +1,105 @@
+"""Memory-mapped on-disk embedding store"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import numpy as np
+import os
+
+
+class MmapEmbeddingStore:
+    """
+    Embedding matrix saved as a .npy file plus an ID/offset table
+    
+    Files written for a prefix:
+        {prefix}.vectors.npy  - float32 or float16 matrix, one row per vector
+        {prefix}.ids.json     - vector IDs; an ID's position is its row offset
+    
+    open() maps the matrix read-only, so searches run directly on the mapped
+    buffer and every process that opens the same file shares one copy in
+    the OS page cache.
+    """
+    
+    SUPPORTED_DTYPES = ("float32", "float16")
+    
+    def __init__(self, prefix: str, dtype: Optional[str] = None):
+        """
+        Initialize embedding store
+        
+        Args:
+            prefix: Path prefix of the store files
+            dtype: On-disk dtype, 'float32' or 'float16'
+                   (defaults to EMBEDDING_STORE_DTYPE or 'float32')
+        """
+        self.prefix = prefix
+        self.dtype = (dtype or os.getenv("EMBEDDING_STORE_DTYPE", "float32")).lower()
+        if self.dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {self.dtype}")
+    
+    @property
+    def vectors_path(self) -> str:
+        return f"{self.prefix}.vectors.npy"
+    
+    @property
+    def ids_path(self) -> str:
+        return f"{self.prefix}.ids.json"
+    
+    def exists(self) -> bool:
+        return os.path.exists(self.vectors_path) and os.path.exists(self.ids_path)
+    
+    def write(self, ids: List[str], matrix: np.ndarray) -> None:
+        """
+        Write the matrix and ID table
+        
+        Files are written to temporary paths and renamed into place, so
+        readers that already mapped the old file keep a consistent view.
+        
+        Args:
+            ids: Vector IDs in row order
+            matrix: Embedding matrix with one row per ID
+        """
+        if len(ids) != len(matrix):
+            raise ValueError(f"{len(ids)} IDs for {len(matrix)} vectors")
+        
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # np.save appends .npy unless the name already ends with it
+        tmp_vectors = f"{self.prefix}.tmp.vectors.npy"
+        tmp_ids = f"{self.ids_path}.tmp"
+        np.save(tmp_vectors, np.ascontiguousarray(matrix, dtype=self.dtype))
+        with open(tmp_ids, "w") as f:
+            json.dump(list(ids), f)
+        
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_ids, self.ids_path)
+    
+    def open(self, mmap: bool = True) -> Tuple[List[str], Dict[str, int], np.ndarray]:
+        """
+        Open the store
+        
+        Args:
+            mmap: Map the matrix read-only instead of reading it into memory
+            
+        Returns:
+            Tuple of (IDs, ID-to-offset table, matrix)
+        """
+        with open(self.ids_path) as f:
+            ids = json.load(f)
+        matrix = np.load(self.vectors_path, mmap_mode="r" if mmap else None)
+        if len(ids) != len(matrix):
+            raise ValueError(f"Corrupt embedding store {self.prefix}: {len(ids)} IDs for {len(matrix)} vectors")
+        
+        offsets = {vector_id: row for row, vector_id in enumerate(ids)}
+        return ids, offsets, matrix
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get on-disk size information"""
+        if not self.exists():
+            return {"path": self.vectors_path, "exists": False}
+        return {
+            "path": self.vectors_path,
+            "exists": True,
+            "dtype": self.dtype,
+            "bytes": os.path.getsize(self.vectors_path)
+        }
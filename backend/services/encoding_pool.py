@@ -0,0 +1,203 @@
+"""Multi-process encoding pool for large bulk encoding jobs"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import os
+import threading
+import time
+
+
+# Per-process embedding service, created by _init_worker
+_worker_service = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int, quantize: Optional[bool]) -> None:
+    """Load the model once per worker process"""
+    global _worker_service
+    
+    # Share the cores between workers instead of every worker using all of them
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    
+    from services.embedding_service import EmbeddingService
+    _worker_service = EmbeddingService.for_worker(model_name, backend, threads, quantize)
+
+
+def _encode_shard(
+    text_block: str,
+    output_block: str,
+    count: int,
+    dimension: int,
+    start: int,
+    end: int,
+    batch_size: int
+) -> Dict[str, Any]:
+    """
+    Encode texts [start, end) from shared memory into the shared output matrix
+    
+    Returns:
+        Bulk encoding counters of the shard
+    """
+    texts_shm = shared_memory.SharedMemory(name=text_block)
+    output_shm = shared_memory.SharedMemory(name=output_block)
+    try:
+        # Views into shared memory must be released before close()
+        offsets = np.frombuffer(texts_shm.buf, dtype=np.int64, count=count + 1).copy()
+        with texts_shm.buf[offsets.nbytes:] as data:
+            texts = [bytes(data[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in range(start, end)]
+        
+        before = _worker_service.get_bulk_counters()
+        embeddings = _worker_service.encode_matrix(texts, batch_size=batch_size)
+        after = _worker_service.get_bulk_counters()
+        
+        output = np.ndarray((count, dimension), dtype=np.float32, buffer=output_shm.buf)
+        output[start:end] = embeddings
+        del output
+        return {key: after[key] - before[key] for key in after}
+    finally:
+        texts_shm.close()
+        output_shm.close()
+
+
+class ProcessEncodingPool:
+    """
+    Encode large text lists across worker processes
+    
+    Each worker process loads the model once, on first use. Texts are
+    written once into a shared memory block (UTF-8 bytes plus offsets), and
+    workers write float32 embeddings straight into a shared output matrix,
+    so only shard bounds and small counter dictionaries are pickled.
+    """
+    
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        workers: Optional[int] = None,
+        threshold: Optional[int] = None,
+        quantize: Optional[bool] = None
+    ):
+        """
+        Initialize encoding pool
+        
+        Args:
+            model_name: Model loaded by every worker
+            backend: Inference backend of the workers ('torch' or 'onnx')
+            workers: Worker processes (ENCODE_PROCESSES, default 0 = disabled)
+            threshold: Minimum texts per call worth sending to the workers
+                       (ENCODE_PROCESS_THRESHOLD, default 2048)
+            quantize: Whether the ONNX model the workers load is int8-quantized
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.quantize = quantize
+        self.workers = workers if workers is not None else int(os.getenv("ENCODE_PROCESSES", "0"))
+        self.threshold = threshold or int(os.getenv("ENCODE_PROCESS_THRESHOLD", "2048"))
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // max(self.workers, 1))
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._texts = 0
+        self._seconds = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                print(f"Starting {self.workers} encoding processes ({self.threads_per_worker} threads each)")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Fork is unsafe once the parent's inference threads exist
+                    mp_context=get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.backend, self.threads_per_worker, self.quantize)
+                )
+            return self._executor
+    
+    @staticmethod
+    def _write_texts(texts: List[str]) -> shared_memory.SharedMemory:
+        """Copy texts into a shared block laid out as [offsets (int64) | UTF-8 bytes]"""
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        
+        block = shared_memory.SharedMemory(create=True, size=max(offsets.nbytes + int(offsets[-1]), 1))
+        block.buf[:offsets.nbytes] = offsets.tobytes()
+        block.buf[offsets.nbytes:offsets.nbytes + int(offsets[-1])] = b"".join(encoded)
+        return block
+    
+    def _shards(self, count: int, batch_size: int) -> List[Tuple[int, int]]:
+        """A few shards per worker so uneven text lengths still balance"""
+        size = max(batch_size, -(-count // (self.workers * 4)))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+    
+    def encode(self, texts: List[str], dimension: int, batch_size: int = 32) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Encode texts on the worker processes
+        
+        Args:
+            texts: Texts to encode
+            dimension: Embedding dimension
+            batch_size: Maximum texts per forward pass inside a worker
+        
+        Returns:
+            Tuple of (float32 matrix in input order, summed bulk encoding counters)
+        """
+        start = time.perf_counter()
+        pool = self._pool()
+        text_block = self._write_texts(texts)
+        output_block = shared_memory.SharedMemory(create=True, size=max(len(texts) * dimension * 4, 1))
+        try:
+            futures = [
+                pool.submit(
+                    _encode_shard, text_block.name, output_block.name,
+                    len(texts), dimension, begin, end, batch_size
+                )
+                for begin, end in self._shards(len(texts), batch_size)
+            ]
+            counters: Dict[str, Any] = {}
+            for future in futures:
+                for key, value in future.result().items():
+                    counters[key] = counters.get(key, 0) + value
+            
+            embeddings = np.ndarray((len(texts), dimension), dtype=np.float32, buffer=output_block.buf).copy()
+        finally:
+            text_block.close()
+            text_block.unlink()
+            output_block.close()
+            output_block.unlink()
+        
+        with self._lock:
+            self._calls += 1
+            self._texts += len(texts)
+            self._seconds += time.perf_counter() - start
+        return embeddings, counters
+    
+    def close(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker,
+                "threshold": self.threshold,
+                "running": self._executor is not None,
+                "calls": self._calls,
+                "texts": self._texts,
+                "texts_per_second": round(self._texts / self._seconds, 1) if self._seconds else 0.0
+            }
@@ -0,0 +1,156 @@
+"""Executor service that keeps blocking work off the asyncio event loop"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, TypeVar
+import asyncio
+import functools
+import os
+import threading
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when an executor pool already has its maximum number of queued tasks"""
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded number of queued tasks and live counters"""
+    
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """
+        Initialize bounded executor
+        
+        Args:
+            name: Pool name used for thread names and stats
+            max_workers: Number of worker threads
+            max_queue: Maximum number of tasks waiting or running before new
+                       submissions are rejected
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+    
+    def _run(self, fn: Callable[..., T]) -> T:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._pending -= 1
+                self._completed += 1
+    
+    def _release_cancelled(self, future: Future) -> None:
+        # A task cancelled while still queued never reaches _run's finally
+        if future.cancelled():
+            with self._lock:
+                self._pending -= 1
+    
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking callable on the pool and await its result
+        
+        Raises:
+            ExecutorSaturatedError: If the pool queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(f"{self.name} pool is saturated ({self._pending} tasks queued)")
+            self._pending += 1
+        
+        call = functools.partial(fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(self._run, call)
+        except RuntimeError:
+            # Pool shut down before the task was scheduled
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+    
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running tasks"""
+        self._pool.shutdown(wait=True)
+
+
+class ExecutorService:
+    """Separate pools for CPU-bound encoding and I/O-bound vector store calls"""
+    
+    def __init__(
+        self,
+        encode_workers: Optional[int] = None,
+        io_workers: Optional[int] = None,
+        max_queue: Optional[int] = None
+    ):
+        """
+        Initialize executor service
+        
+        Args:
+            encode_workers: Threads for model inference (ENCODE_POOL_SIZE, default 2)
+            io_workers: Threads for vector store calls (IO_POOL_SIZE, default 16)
+            max_queue: Maximum queued tasks per pool (EXECUTOR_MAX_QUEUE, default 256)
+        """
+        encode_workers = encode_workers or int(os.getenv("ENCODE_POOL_SIZE", "2"))
+        io_workers = io_workers or int(os.getenv("IO_POOL_SIZE", "16"))
+        max_queue = max_queue or int(os.getenv("EXECUTOR_MAX_QUEUE", "256"))
+        
+        self.encode_pool = BoundedExecutor("encode", encode_workers, max_queue)
+        self.io_pool = BoundedExecutor("io", io_workers, max_queue)
+    
+    async def run_encode(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run CPU-bound encoding work on the encode pool"""
+        return await self.encode_pool.run(fn, *args, **kwargs)
+    
+    async def run_io(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run blocking vector store calls on the I/O pool"""
+        return await self.io_pool.run(fn, *args, **kwargs)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get executor statistics
+        
+        Returns:
+            Dictionary with per-pool queue depth and counters
+        """
+        return {
+            "encode": self.encode_pool.get_stats(),
+            "io": self.io_pool.get_stats()
+        }
+    
+    def shutdown(self) -> None:
+        """Shut down both pools"""
+        self.encode_pool.shutdown()
+        self.io_pool.shutdown()
+
+
+_default_executor: Optional[ExecutorService] = None
+
+
+def get_executor_service() -> ExecutorService:
+    """Get the process-wide executor service, creating it on first use"""
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = ExecutorService()
+    return _default_executor
@@ -0,0 +1,102 @@
+"""Content-hash manifest for incremental reindexing"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import os
+
+
+@dataclass
+class SyncPlan:
+    """Item IDs grouped by what an incremental sync has to do with them"""
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.updated
+
+
+class IndexManifest:
+    """
+    Persistent map of item ID -> content hash and the vector IDs it produced
+    
+    Comparing fresh hashes against the manifest tells the indexer which
+    items must be re-embedded and which vectors belong to removed items.
+    """
+    
+    def __init__(self, index_name: str, directory: Optional[str] = None):
+        """
+        Initialize manifest
+        
+        Args:
+            index_name: Name of the vector index the manifest describes
+            directory: Directory holding manifests (INDEX_MANIFEST_DIR, default 'index_data')
+        """
+        self.directory = directory or os.getenv("INDEX_MANIFEST_DIR", "index_data")
+        self.path = os.path.join(self.directory, f"{index_name}.manifest.json")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+    
+    @staticmethod
+    def digest(text: str, metadata: Dict[str, Any], model_name: str) -> str:
+        """Hash of everything that determines an item's vector record"""
+        payload = json.dumps([model_name, text, metadata], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @property
+    def vector_count(self) -> int:
+        return sum(len(entry["vectors"]) for entry in self.entries.values())
+    
+    def diff(self, digests: Dict[str, str]) -> SyncPlan:
+        """
+        Compare fresh item hashes against the manifest
+        
+        Args:
+            digests: Item ID -> content hash for the full current item set
+            
+        Returns:
+            SyncPlan with added, updated, deleted and unchanged IDs
+        """
+        plan = SyncPlan()
+        for item_id, digest in digests.items():
+            entry = self.entries.get(item_id)
+            if entry is None:
+                plan.added.append(item_id)
+            elif entry["hash"] != digest:
+                plan.updated.append(item_id)
+            else:
+                plan.unchanged.append(item_id)
+        
+        plan.deleted = [item_id for item_id in self.entries if item_id not in digests]
+        return plan
+    
+    def vectors_for(self, item_ids: List[str]) -> List[str]:
+        """Vector IDs recorded for the given items"""
+        vector_ids = []
+        for item_id in item_ids:
+            entry = self.entries.get(item_id)
+            if entry:
+                vector_ids.extend(entry["vectors"])
+        return vector_ids
+    
+    def record(self, item_id: str, digest: str, vector_ids: Optional[List[str]] = None) -> None:
+        """Record the hash and vector IDs of an indexed item"""
+        self.entries[item_id] = {"hash": digest, "vectors": vector_ids if vector_ids is not None else [item_id]}
+    
+    def remove(self, item_id: str) -> None:
+        self.entries.pop(item_id, None)
+    
+    def save(self) -> None:
+        """Write the manifest atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
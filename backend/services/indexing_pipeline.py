@@ -0,0 +1,203 @@
+"""Batched indexing pipeline that overlaps embedding with vector upserts"""
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+from services.embedding_service import EmbeddingService
+from services.index_manifest import IndexManifest, SyncPlan
+import numpy as np
+import os
+import time
+
+
+class IndexingPipeline:
+    """Encode items in batches and upsert each batch while the next one is encoded"""
+    
+    def __init__(self, embedding_service: EmbeddingService, batch_size: Optional[int] = None):
+        """
+        Initialize indexing pipeline
+        
+        Args:
+            embedding_service: Instance of EmbeddingService used for encoding
+            batch_size: Number of items encoded per forward pass
+                        (defaults to INDEXING_BATCH_SIZE or 64)
+        """
+        self.embedding_service = embedding_service
+        self.batch_size = batch_size or int(os.getenv("INDEXING_BATCH_SIZE", "64"))
+    
+    @staticmethod
+    def _batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+        """Yield successive lists of at most batch_size items"""
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def run(
+        self,
+        items: Iterable[Dict[str, Any]],
+        text_fn: Callable[[Dict[str, Any]], str],
+        vector_fn: Callable[[Dict[str, Any], np.ndarray], Dict[str, Any]],
+        upsert_fn: Callable[[List[Dict[str, Any]]], None],
+        label: str = "items"
+    ) -> Dict[str, Any]:
+        """
+        Embed and upsert items
+        
+        The upsert of batch N runs on a background thread while batch N+1
+        is being encoded. At most one upsert is in flight at a time, so
+        memory stays bounded to two batches of vectors.
+        
+        Args:
+            items: Items to index
+            text_fn: Builds the text to embed for an item
+            vector_fn: Builds the vector record for an item and its embedding
+            upsert_fn: Writes a list of vector records to the vector store
+            label: Name of the items used in progress output
+            
+        Returns:
+            Dictionary with the number of items indexed, elapsed seconds and throughput
+        """
+        start = time.perf_counter()
+        indexed = 0
+        pending: Optional[Future] = None
+        
+        # With an encoding process pool, collect batches large enough to be sent to it
+        pool = self.embedding_service.process_pool
+        items_per_batch = max(self.batch_size, pool.threshold) if pool.enabled else self.batch_size
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert") as upserter:
+            for batch in self._batches(items, items_per_batch):
+                texts = [text_fn(item) for item in batch]
+                embeddings = self.embedding_service.encode_matrix(texts, batch_size=self.batch_size)
+                vectors = [vector_fn(item, emb) for item, emb in zip(batch, embeddings)]
+                
+                # Wait for the previous upsert before queueing the next one
+                if pending is not None:
+                    pending.result()
+                pending = upserter.submit(upsert_fn, vectors)
+                indexed += len(batch)
+            
+            if pending is not None:
+                pending.result()
+        
+        elapsed = time.perf_counter() - start
+        throughput = indexed / elapsed if elapsed > 0 else 0.0
+        print(f"✓ Indexed {indexed} {label} in {elapsed:.2f}s ({throughput:.1f} {label}/s)")
+        
+        return {
+            "indexed": indexed,
+            "seconds": round(elapsed, 3),
+            "items_per_second": round(throughput, 2),
+            "batch_size": self.batch_size
+        }
+    
+    def sync(
+        self,
+        items: List[Dict[str, Any]],
+        manifest: IndexManifest,
+        text_fn: Callable[[Dict[str, Any]], str],
+        metadata_fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+        vector_fn: Callable[[Dict[str, Any], np.ndarray], Dict[str, Any]],
+        upsert_fn: Callable[[List[Dict[str, Any]]], None],
+        delete_fn: Callable[[List[str]], None],
+        stored_vectors: int,
+        label: str = "items",
+        chunk_fn: Optional[Callable[[Dict[str, Any]], Iterable[Dict[str, Any]]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Incrementally bring the vector store in line with items
+        
+        Each item's searchable text and metadata are hashed and compared with
+        the manifest. Only added or changed items are re-embedded, and the
+        vectors of items that disappeared are deleted.
+        
+        With chunk_fn, each changed item is expanded into chunks that are
+        embedded instead of the item itself. Chunks are generated lazily as
+        batches are encoded, their IDs are recorded per item in the manifest,
+        and chunks an updated item no longer produces are deleted.
+        
+        Args:
+            items: Full current item set (dictionaries with an 'id')
+            manifest: Manifest describing what the store currently holds
+            text_fn: Builds the text to embed for an item
+            metadata_fn: Builds the stored metadata for an item
+            vector_fn: Builds the vector record for an item and its embedding
+            upsert_fn: Writes a list of vector records to the vector store
+            delete_fn: Deletes vectors by ID
+            stored_vectors: Vector count currently reported by the store
+            label: Name of the items used in progress output
+            chunk_fn: Optional; splits an item into chunk dictionaries with an 'id' and
+                      a 'text' to embed (vector_fn then receives chunks, not items)
+            
+        Returns:
+            Dictionary with added/updated/deleted/unchanged counts and elapsed seconds
+        """
+        start = time.perf_counter()
+        # Includes backend and precision, so switching them re-embeds everything
+        model_name = self.embedding_service.model_id
+        by_id = {item['id']: item for item in items}
+        digests = {
+            item_id: IndexManifest.digest(text_fn(item), metadata_fn(item), model_name)
+            for item_id, item in by_id.items()
+        }
+        
+        plan = manifest.diff(digests)
+        if stored_vectors != manifest.vector_count:
+            # The store does not hold what the manifest describes (e.g. a fresh
+            # in-memory index or a reset remote index): re-embed everything
+            print(f"Vector store holds {stored_vectors} vectors but manifest lists {manifest.vector_count}; re-embedding all {label}")
+            plan = SyncPlan(added=list(digests), deleted=plan.deleted)
+        
+        if plan.deleted:
+            delete_fn(manifest.vectors_for(plan.deleted))
+            for item_id in plan.deleted:
+                manifest.remove(item_id)
+        
+        if plan.changed:
+            print(f"Embedding {len(plan.changed)} new or changed {label}...")
+            changed_items = [by_id[item_id] for item_id in plan.changed]
+            if chunk_fn is None:
+                self.run(changed_items, text_fn, vector_fn, upsert_fn, label)
+                for item_id in plan.changed:
+                    manifest.record(item_id, digests[item_id])
+            else:
+                # Every changed item, not just updated ones: after a full re-embed,
+                # re-added items can still have chunks recorded from the last sync
+                previous = {item_id: manifest.vectors_for([item_id]) for item_id in plan.changed}
+                chunk_ids: Dict[str, List[str]] = {item_id: [] for item_id in plan.changed}
+                
+                def chunks() -> Iterator[Dict[str, Any]]:
+                    for item in changed_items:
+                        for chunk in chunk_fn(item):
+                            chunk_ids[item['id']].append(chunk['id'])
+                            yield chunk
+                
+                self.run(chunks(), lambda chunk: chunk['text'], vector_fn, upsert_fn, "chunks")
+                
+                # Delete chunks a changed item no longer produces, after the new ones are in place
+                stale = []
+                for item_id, vector_ids in previous.items():
+                    current = set(chunk_ids[item_id])
+                    stale.extend(vector_id for vector_id in vector_ids if vector_id not in current)
+                if stale:
+                    delete_fn(stale)
+                for item_id in plan.changed:
+                    manifest.record(item_id, digests[item_id], chunk_ids[item_id])
+        
+        manifest.save()
+        
+        elapsed = time.perf_counter() - start
+        report = {
+            "added": len(plan.added),
+            "updated": len(plan.updated),
+            "deleted": len(plan.deleted),
+            "unchanged": len(plan.unchanged),
+            "seconds": round(elapsed, 3)
+        }
+        print(f"✓ Synced {label}: {report['added']} added, {report['updated']} updated, "
+              f"{report['deleted']} deleted, {report['unchanged']} unchanged ({elapsed:.2f}s)")
+        return report
@@ -0,0 +1,243 @@
+"""BM25 inverted index for lexical retrieval and rank fusion with vector search"""
+
+from array import array
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Callable
+import numpy as np
+import os
+import re
+import threading
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms
+    
+    Compound tokens such as 'gore-tex' or 'sku-1042' are kept whole and
+    also indexed as their parts and joined form ('gore', 'tex', 'goretex'),
+    so every common spelling matches.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            parts = [part for part in re.split(r"[-_./]", token) if part]
+            terms.extend(parts)
+            terms.append("".join(parts))
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists with reciprocal rank fusion
+    
+    Args:
+        rankings: ID lists, best first
+        k: Rank smoothing constant (RRF_K, default 60)
+    
+    Returns:
+        List of (ID, fused score), best first
+    """
+    k = k if k is not None else int(os.getenv("RRF_K", "60"))
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class BM25Index:
+    """
+    Okapi BM25 index with array-backed postings
+    
+    Each term owns two flat arrays (row numbers and term frequencies), so
+    scoring a term is a vectorized gather over its postings. Removed items
+    are tombstoned and skipped at query time; postings are compacted once
+    tombstones outnumber a quarter of the live rows. Items carry the content
+    digest they were indexed from, so sync() only re-tokenizes what changed.
+    """
+    
+    def __init__(self, k1: Optional[float] = None, b: Optional[float] = None):
+        """
+        Initialize BM25 index
+        
+        Args:
+            k1: Term frequency saturation (BM25_K1, default 1.2)
+            b: Length normalization (BM25_B, default 0.75)
+        """
+        self.k1 = k1 if k1 is not None else float(os.getenv("BM25_K1", "1.2"))
+        self.b = b if b is not None else float(os.getenv("BM25_B", "0.75"))
+        
+        self._terms: Dict[str, int] = {}
+        self._posting_rows: List[array] = []
+        self._posting_tfs: List[array] = []
+        
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._digests: Dict[str, str] = {}
+        self._lengths = array('f')
+        self._alive = bytearray()
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def add(self, item_id: str, text: str, digest: str = "") -> None:
+        """Index an item, replacing any previous version"""
+        with self._lock:
+            if item_id in self._rows:
+                self.remove(item_id)
+            
+            terms = tokenize(text)
+            row = len(self._ids)
+            self._ids.append(item_id)
+            self._rows[item_id] = row
+            self._digests[item_id] = digest
+            self._lengths.append(len(terms))
+            self._alive.append(1)
+            self._total_length += len(terms)
+            
+            for term, tf in Counter(terms).items():
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    term_id = len(self._posting_rows)
+                    self._terms[term] = term_id
+                    self._posting_rows.append(array('i'))
+                    self._posting_tfs.append(array('f'))
+                self._posting_rows[term_id].append(row)
+                self._posting_tfs[term_id].append(tf)
+    
+    def remove(self, item_id: str) -> None:
+        """Tombstone an item"""
+        with self._lock:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return
+            self._digests.pop(item_id, None)
+            self._ids[row] = None
+            self._alive[row] = 0
+            self._total_length -= self._lengths[row]
+    
+    def sync(self, items: Dict[str, Tuple[str, str]]) -> Dict[str, int]:
+        """
+        Bring the index in line with the given items
+        
+        Args:
+            items: {item ID: (text, content digest)} for every item that should be indexed
+        
+        Returns:
+            Dictionary with indexed, removed and unchanged counts
+        """
+        with self._lock:
+            removed = [item_id for item_id in self._rows if item_id not in items]
+            for item_id in removed:
+                self.remove(item_id)
+            
+            indexed = 0
+            for item_id, (text, digest) in items.items():
+                if self._digests.get(item_id) == digest and item_id in self._rows:
+                    continue
+                self.add(item_id, text, digest)
+                indexed += 1
+            
+            if len(self._ids) - len(self._rows) > len(self._rows) // 4:
+                self.compact()
+            
+            return {"indexed": indexed, "removed": len(removed), "unchanged": len(items) - indexed}
+    
+    def compact(self) -> None:
+        """Drop tombstoned rows from the postings and renumber the rest"""
+        with self._lock:
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            remap = np.cumsum(alive, dtype=np.int64) - 1
+            
+            terms = {}
+            posting_rows = []
+            posting_tfs = []
+            for term, term_id in self._terms.items():
+                rows = np.frombuffer(self._posting_rows[term_id], dtype=np.int32)
+                keep = alive[rows]
+                if not keep.any():
+                    continue
+                terms[term] = len(posting_rows)
+                posting_rows.append(array('i', remap[rows[keep]].astype(np.int32).tobytes()))
+                posting_tfs.append(array('f', np.frombuffer(self._posting_tfs[term_id], dtype=np.float32)[keep].tobytes()))
+            
+            self._terms = terms
+            self._posting_rows = posting_rows
+            self._posting_tfs = posting_tfs
+            self._ids = [item_id for item_id in self._ids if item_id is not None]
+            self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+            self._lengths = array('f', np.frombuffer(self._lengths, dtype=np.float32)[alive].tobytes())
+            self._alive = bytearray(b"\x01" * len(self._ids))
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allow: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank items against a query with BM25
+        
+        Args:
+            query: Query text
+            top_k: Maximum number of results
+            allow: Optional predicate on item IDs; rejected items are skipped
+        
+        Returns:
+            List of (item ID, score), best first
+        """
+        with self._lock:
+            live = len(self._rows)
+            if not live:
+                return []
+            
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8)
+            lengths = np.array(self._lengths, dtype=np.float32)
+            avg_length = self._total_length / live or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            
+            for term in set(tokenize(query)):
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                rows = np.array(self._posting_rows[term_id], dtype=np.int32)
+                keep = alive[rows].astype(bool)
+                rows = rows[keep]
+                if not len(rows):
+                    continue
+                tfs = np.array(self._posting_tfs[term_id], dtype=np.float32)[keep]
+                idf = np.log(1.0 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / avg_length)
+                scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            
+            hits = np.flatnonzero(scores)
+            if not len(hits):
+                return []
+            
+            results = []
+            for row in hits[np.argsort(-scores[hits], kind="stable")]:
+                item_id = self._ids[row]
+                if allow is not None and not allow(item_id):
+                    continue
+                results.append((item_id, float(scores[row])))
+                if len(results) >= top_k:
+                    break
+            return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        with self._lock:
+            postings = sum(len(rows) for rows in self._posting_rows)
+            return {
+                "items": len(self._rows),
+                "terms": len(self._terms),
+                "postings": postings,
+                "tombstones": len(self._ids) - len(self._rows),
+                "bytes": postings * 8 + len(self._lengths) * 4
+            }
@@ -0,0 +1,259 @@
+"""Columnar metadata for fast filter evaluation in the local vector store"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class NumericColumn:
+    """
+    float64 values per row (NaN when missing) with a lazily sorted index
+    
+    Range conditions are answered by binary search over the sorted values,
+    so only the matching rows are touched. Values are kept in float64, the
+    precision of the Python floats they are compared with, so a bound equal
+    to a stored price (e.g. 79.99) matches it exactly.
+    """
+    
+    kind = "numeric"
+    
+    def __init__(self, capacity: int):
+        self.values = np.full(capacity, np.nan, dtype=np.float64)
+        self._order: Optional[np.ndarray] = None
+        self._sorted: Optional[np.ndarray] = None
+    
+    def accepts(self, value: Any) -> bool:
+        return value is None or _is_number(value)
+    
+    def reserve(self, capacity: int) -> None:
+        if capacity > len(self.values):
+            grown = np.full(max(capacity, len(self.values) * 2), np.nan, dtype=np.float64)
+            grown[:len(self.values)] = self.values
+            self.values = grown
+    
+    def set(self, row: int, value: Any) -> None:
+        self.values[row] = np.nan if value is None else value
+        self._order = None
+    
+    def move(self, source: int, target: int) -> None:
+        self.values[target] = self.values[source]
+        self._order = None
+    
+    def _index(self, count: int):
+        if self._order is None or len(self._order) != count:
+            # NaN sorts last, so missing values never fall inside a range
+            self._order = np.argsort(self.values[:count], kind="stable")
+            self._sorted = self.values[:count][self._order]
+        return self._order, self._sorted
+    
+    def _range(self, count: int, low: float, high: float, low_inclusive: bool, high_inclusive: bool) -> np.ndarray:
+        order, values = self._index(count)
+        start = np.searchsorted(values, low, side="left" if low_inclusive else "right")
+        end = np.searchsorted(values, high, side="right" if high_inclusive else "left")
+        mask = np.zeros(count, dtype=bool)
+        if end > start:
+            mask[order[start:end]] = True
+        return mask
+    
+    def mask(self, count: int, condition: Any) -> np.ndarray:
+        """Rows satisfying a Pinecone-style condition"""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        
+        values = self.values[:count]
+        mask = np.ones(count, dtype=bool)
+        low, high = -np.inf, np.inf
+        low_inclusive = high_inclusive = True
+        ranged = False
+        
+        for op, operand in condition.items():
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if not _is_number(operand):
+                    return np.zeros(count, dtype=bool)
+                ranged = True
+                if op in ("$gt", "$gte") and (operand > low or (operand == low and op == "$gt")):
+                    low, low_inclusive = operand, op == "$gte"
+                if op in ("$lt", "$lte") and (operand < high or (operand == high and op == "$lt")):
+                    high, high_inclusive = operand, op == "$lte"
+            elif op == "$eq":
+                if not _is_number(operand):
+                    return np.zeros(count, dtype=bool)
+                mask &= self._range(count, operand, operand, True, True)
+            elif op == "$ne":
+                if _is_number(operand):
+                    mask &= values != operand
+            elif op in ("$in", "$nin"):
+                numbers = np.asarray([item for item in operand if _is_number(item)], dtype=np.float64)
+                member = np.isin(values, numbers)
+                mask &= member if op == "$in" else ~member
+        
+        if ranged:
+            mask &= self._range(count, low, high, low_inclusive, high_inclusive)
+        return mask
+
+
+class CategoricalColumn:
+    """
+    Dictionary-encoded values per row with one packed bitmap per value
+    
+    Equality and membership conditions OR together the bitmaps of the
+    requested values, which costs count / 8 bytes per value.
+    """
+    
+    kind = "categorical"
+    
+    def __init__(self, capacity: int):
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.lookup: Dict[Any, int] = {}
+        self.bitmaps: List[np.ndarray] = []
+    
+    def accepts(self, value: Any) -> bool:
+        return value is None or isinstance(value, (str, bool))
+    
+    def reserve(self, capacity: int) -> None:
+        if capacity > len(self.codes):
+            capacity = max(capacity, len(self.codes) * 2)
+            grown = np.full(capacity, -1, dtype=np.int32)
+            grown[:len(self.codes)] = self.codes
+            self.codes = grown
+            for code, bitmap in enumerate(self.bitmaps):
+                grown_bitmap = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+                grown_bitmap[:len(bitmap)] = bitmap
+                self.bitmaps[code] = grown_bitmap
+    
+    def _flip(self, code: int, row: int, on: bool) -> None:
+        if code < 0:
+            return
+        bit = np.uint8(1 << (7 - row % 8))
+        if on:
+            self.bitmaps[code][row // 8] |= bit
+        else:
+            self.bitmaps[code][row // 8] &= ~bit
+    
+    def set(self, row: int, value: Any) -> None:
+        code = -1
+        if value is not None:
+            code = self.lookup.get(value)
+            if code is None:
+                code = len(self.bitmaps)
+                self.lookup[value] = code
+                self.bitmaps.append(np.zeros((len(self.codes) + 7) // 8, dtype=np.uint8))
+        self._flip(int(self.codes[row]), row, False)
+        self.codes[row] = code
+        self._flip(code, row, True)
+    
+    def move(self, source: int, target: int) -> None:
+        self.set(target, None)
+        code = int(self.codes[source])
+        self._flip(code, source, False)
+        self.codes[source] = -1
+        self.codes[target] = code
+        self._flip(code, target, True)
+    
+    def _members(self, count: int, operands: List[Any]) -> np.ndarray:
+        mask = np.zeros(count, dtype=bool)
+        for operand in operands:
+            code = self.lookup.get(operand) if isinstance(operand, (str, bool)) else None
+            if code is not None:
+                mask |= np.unpackbits(self.bitmaps[code], count=count).view(bool)
+        return mask
+    
+    def supports(self, condition: Any) -> bool:
+        if not isinstance(condition, dict):
+            return True
+        return all(op in ("$eq", "$ne", "$in", "$nin") for op in condition)
+    
+    def mask(self, count: int, condition: Any) -> np.ndarray:
+        """Rows satisfying a Pinecone-style condition"""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        
+        mask = np.ones(count, dtype=bool)
+        for op, operand in condition.items():
+            if op == "$eq":
+                mask &= self._members(count, [operand])
+            elif op == "$ne":
+                mask &= ~self._members(count, [operand])
+            elif op == "$in":
+                mask &= self._members(count, list(operand))
+            elif op == "$nin":
+                mask &= ~self._members(count, list(operand))
+        return mask
+
+
+class MetadataColumns:
+    """
+    Per-field metadata columns maintained alongside the vector matrix
+    
+    A column is built from the row metadata the first time a field is
+    filtered on and kept up to date on every upsert and delete from then on.
+    Fields whose values are neither all numbers nor all strings/booleans
+    (lists, mixed types) are reported as unsupported so the caller can
+    evaluate them row by row, until the next upsert or delete, after which
+    they are re-evaluated when next filtered on.
+    """
+    
+    def __init__(self):
+        self.columns: Dict[str, Any] = {}
+        self.unsupported: set = set()
+    
+    def reset(self) -> None:
+        """Drop all columns (e.g. after the metadata list was replaced)"""
+        self.columns = {}
+        self.unsupported = set()
+    
+    def build(self, field: str, metadata: List[Dict[str, Any]], capacity: int) -> Optional[Any]:
+        """Build the column for a field from row metadata; None if it cannot be columnar"""
+        values = [row.get(field) for row in metadata]
+        present = [value for value in values if value is not None]
+        
+        if all(_is_number(value) for value in present):
+            column = NumericColumn(capacity)
+        elif all(isinstance(value, (str, bool)) for value in present):
+            column = CategoricalColumn(capacity)
+        else:
+            self.unsupported.add(field)
+            return None
+        
+        for row, value in enumerate(values):
+            if value is not None:
+                column.set(row, value)
+        self.columns[field] = column
+        return column
+    
+    def reserve(self, capacity: int) -> None:
+        for column in self.columns.values():
+            column.reserve(capacity)
+    
+    def set(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Record a row's metadata in every column, dropping columns whose type no longer fits"""
+        # The row may have replaced the values that made a field unsupported
+        self.unsupported.clear()
+        for field in list(self.columns):
+            column = self.columns[field]
+            value = metadata.get(field)
+            if column.accepts(value):
+                column.set(row, value)
+            else:
+                # Rebuilt (or marked unsupported) on the next filter that uses it
+                del self.columns[field]
+    
+    def move(self, source: int, target: int) -> None:
+        for column in self.columns.values():
+            column.move(source, target)
+    
+    def remove(self) -> None:
+        """Note that a row was deleted; its values may have made a field unsupported"""
+        self.unsupported.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            field: {
+                "type": column.kind,
+                **({"values": len(column.lookup)} if column.kind == "categorical" else {})
+            }
+            for field, column in self.columns.items()
+        }
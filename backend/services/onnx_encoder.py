@@ -0,0 +1,203 @@
+"""ONNX Runtime inference backend for sentence-transformer models"""
+
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
+import os
+
+
+def min_cosine_similarity(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """
+    Lowest row-wise cosine similarity between two embedding matrices
+    
+    Raises:
+        ValueError: If the matrices have different shapes
+    """
+    if candidate.shape != reference.shape:
+        raise ValueError(f"ONNX embeddings have shape {candidate.shape}, expected {reference.shape}")
+    cosines = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return float(cosines.min())
+
+
+class OnnxEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode() running on ONNX Runtime
+    
+    The transformer of a loaded SentenceTransformer is exported to ONNX once
+    (and optionally quantized to dynamic int8), then served by an ONNX
+    Runtime session. Tokenization, pooling and normalization reproduce the
+    model's own modules, so embeddings keep the same dimension and stay
+    interchangeable with the PyTorch backend's.
+    """
+    
+    INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+    POOLING_MODES = {
+        "pooling_mode_cls_token": "cls",
+        "pooling_mode_mean_tokens": "mean",
+        "pooling_mode_max_tokens": "max"
+    }
+    
+    def __init__(
+        self,
+        model: Any,
+        model_name: str,
+        model_dir: Optional[str] = None,
+        quantize: Optional[bool] = None,
+        intra_op_threads: Optional[int] = None
+    ):
+        """
+        Export (if needed) and load the ONNX model
+        
+        Args:
+            model: Loaded SentenceTransformer to export
+            model_name: Model name, used for the exported file name
+            model_dir: Directory of exported models (ONNX_MODEL_DIR, default 'onnx_models')
+            quantize: Apply dynamic int8 weight quantization (ONNX_QUANTIZE, default true)
+            intra_op_threads: Threads per inference call (ONNX_INTRA_OP_THREADS,
+                              default CPU count divided by ENCODE_POOL_SIZE)
+        """
+        import onnxruntime as ort
+        
+        self.model_dir = model_dir or os.getenv("ONNX_MODEL_DIR", "onnx_models")
+        self.quantize = quantize if quantize is not None else os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+        # Each encode pool worker runs its own inference call; split the cores between them
+        default_threads = max(1, (os.cpu_count() or 1) // int(os.getenv("ENCODE_POOL_SIZE", "2")))
+        self.intra_op_threads = intra_op_threads or int(os.getenv("ONNX_INTRA_OP_THREADS", str(default_threads)))
+        
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.dimension = model.get_sentence_embedding_dimension()
+        self.pooling, self.normalize = self._pipeline(model)
+        
+        base = os.path.join(self.model_dir, model_name.replace("/", "__"))
+        self.path = self._export(model, f"{base}.onnx")
+        if self.quantize:
+            self.path = self._quantize(self.path, f"{base}.int8.onnx")
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+    
+    @staticmethod
+    def _pipeline(model: Any) -> tuple:
+        """Pooling mode and normalization of the model's module stack"""
+        pooling = None
+        normalize = False
+        for module in model:
+            kind = type(module).__name__
+            if kind == "Pooling":
+                config = module.get_config_dict()
+                enabled = [key for key, value in config.items() if key.startswith("pooling_mode_") and value]
+                if len(enabled) != 1 or enabled[0] not in OnnxEncoder.POOLING_MODES:
+                    raise ValueError(f"Unsupported pooling configuration for ONNX backend: {enabled}")
+                pooling = OnnxEncoder.POOLING_MODES[enabled[0]]
+            elif kind == "Normalize":
+                normalize = True
+            elif kind != "Transformer":
+                raise ValueError(f"Unsupported module for ONNX backend: {kind}")
+        
+        if pooling is None:
+            raise ValueError("Model has no pooling module")
+        return pooling, normalize
+    
+    def _export(self, model: Any, path: str) -> str:
+        """Export the transformer to ONNX with dynamic batch and sequence axes"""
+        if os.path.exists(path):
+            return path
+        
+        import torch
+        
+        os.makedirs(self.model_dir, exist_ok=True)
+        transformer = model[0].auto_model.eval()
+        sample = self.tokenizer(["ONNX export sample"], return_tensors="pt")
+        input_names = [name for name in self.INPUT_NAMES if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        
+        print(f"Exporting embedding model to ONNX: {path}")
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                ({name: sample[name] for name in input_names},),
+                path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        return path
+    
+    @staticmethod
+    def _quantize(source: str, path: str) -> str:
+        """Quantize weights to int8 (activations stay float, scaled at run time)"""
+        if not os.path.exists(path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            
+            print(f"Quantizing ONNX model to int8: {path}")
+            quantize_dynamic(source, path, weight_type=QuantType.QInt8)
+        return path
+    
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "max":
+            pooled = np.where(mask[:, :, None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            weights = mask[:, :, None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+    
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode texts like SentenceTransformer.encode()
+        
+        Args:
+            sentences: Text or list of texts
+            batch_size: Number of texts per inference call
+        
+        Returns:
+            Array of shape (dimension,) for a single text, else (len(sentences), dimension)
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in self.input_names}
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            batches.append(self._pool(hidden, feeds["attention_mask"]))
+        
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, self.dimension), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "quantized": self.quantize,
+            "intra_op_threads": self.intra_op_threads
+        }
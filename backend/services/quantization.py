@@ -0,0 +1,185 @@
+"""Vector quantizers for compact storage with asymmetric distance computation"""
+
+from typing import Dict, Any, Optional
+import numpy as np
+import os
+
+
+class ScalarQuantizer:
+    """
+    8-bit scalar quantizer
+    
+    Each dimension is mapped linearly from its trained [min, max] range onto
+    256 levels, so a 384-dim float32 vector (1536 bytes) becomes 384 bytes.
+    Queries stay in float32 (asymmetric distance): q . x is computed as
+    q . min + (q * scale) . code without decoding the stored vectors.
+    """
+    
+    kind = "int8"
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.code_size = dimension
+        self.minimum: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.minimum is not None
+    
+    def train(self, vectors: np.ndarray) -> None:
+        """Learn the per-dimension value range"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.minimum = vectors.min(axis=0)
+        spread = vectors.max(axis=0) - self.minimum
+        spread[spread == 0] = 1.0
+        self.scale = (spread / 255.0).astype(np.float32)
+    
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize vectors into uint8 codes"""
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.minimum) / self.scale)
+        return np.clip(levels, 0, 255).astype(np.uint8)
+    
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate vectors from codes"""
+        return codes.astype(np.float32) * self.scale + self.minimum
+    
+    def scores(self, query: np.ndarray, codes: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Approximate inner products between a float query and coded vectors"""
+        weighted = query * self.scale
+        offset = float(query @ self.minimum)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block_size):
+            scores[start:start + block_size] = codes[start:start + block_size].astype(np.float32) @ weighted
+        return scores + offset
+    
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"minimum": self.minimum, "scale": self.scale}
+    
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.minimum = state["minimum"].astype(np.float32)
+        self.scale = state["scale"].astype(np.float32)
+
+
+class ProductQuantizer:
+    """
+    Product quantizer
+    
+    Vectors are split into m sub-vectors and each one is replaced by the
+    index of its nearest centroid in a 256-entry codebook, so a vector is
+    stored in m bytes. At query time a (m x 256) table of query/centroid
+    inner products is built once, and each stored vector's score is the sum
+    of m table lookups (asymmetric distance computation).
+    """
+    
+    kind = "pq"
+    
+    def __init__(self, dimension: int, subquantizers: Optional[int] = None, train_iterations: int = 10, seed: int = 0):
+        """
+        Initialize product quantizer
+        
+        Args:
+            dimension: Embedding dimension
+            subquantizers: Number of sub-vectors m (PQ_SUBQUANTIZERS, default 48).
+                           Reduced to the largest divisor of the dimension.
+            train_iterations: k-means iterations per sub-space
+            seed: Random seed for centroid initialization
+        """
+        m = subquantizers or int(os.getenv("PQ_SUBQUANTIZERS", "48"))
+        m = max(1, min(m, dimension))
+        while dimension % m:
+            m -= 1
+        
+        self.dimension = dimension
+        self.m = m
+        self.dsub = dimension // m
+        self.code_size = m
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+    
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.m, self.dsub)
+    
+    @staticmethod
+    def _assign(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid by Euclidean distance"""
+        half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        return np.argmax(points @ centroids.T - half_norms, axis=1)
+    
+    def train(self, vectors: np.ndarray, max_training_points: int = 16384) -> None:
+        """Learn one k-means codebook per sub-space"""
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), max_training_points), replace=False)]
+        subvectors = self._split(sample)
+        ksub = min(256, len(sample))
+        
+        codebooks = np.empty((self.m, ksub, self.dsub), dtype=np.float32)
+        for j in range(self.m):
+            points = subvectors[:, j, :]
+            centroids = points[rng.choice(len(points), ksub, replace=False)].copy()
+            for _ in range(self.train_iterations):
+                assignment = self._assign(points, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, points)
+                counts = np.bincount(assignment, minlength=ksub)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+                # Re-seed empty centroids with random points
+                if not filled.all():
+                    centroids[~filled] = points[rng.choice(len(points), int((~filled).sum()))]
+            codebooks[j] = centroids
+        self.codebooks = codebooks
+    
+    def encode(self, vectors: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Quantize vectors into (n, m) uint8 codes"""
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), block_size):
+            subvectors = self._split(vectors[start:start + block_size])
+            for j in range(self.m):
+                codes[start:start + block_size, j] = self._assign(subvectors[:, j, :], self.codebooks[j])
+        return codes
+    
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate vectors from codes"""
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+    
+    def scores(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products via per-sub-space lookup tables"""
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, self.dsub))
+        scores = np.zeros(len(codes), dtype=np.float32)
+        for j in range(self.m):
+            scores += table[j][codes[:, j]]
+        return scores
+    
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+    
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.codebooks = state["codebooks"].astype(np.float32)
+
+
+def create_quantizer(kind: Optional[str], dimension: int):
+    """
+    Create a quantizer by name
+    
+    Args:
+        kind: 'none', 'int8' or 'pq' (defaults to VECTOR_QUANTIZATION or 'none')
+        dimension: Embedding dimension
+        
+    Returns:
+        Quantizer instance, or None when quantization is disabled
+    """
+    kind = (kind or os.getenv("VECTOR_QUANTIZATION", "none")).lower()
+    if kind == "none":
+        return None
+    if kind == "int8":
+        return ScalarQuantizer(dimension)
+    if kind == "pq":
+        return ProductQuantizer(dimension)
+    raise ValueError(f"Unknown vector quantization: {kind}")
@@ -1,11 +1,22 @@
 """RAG (Retrieval-Augmented Generation) service for answering questions"""
 
-from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator, Tuple
 from services.embedding_service import EmbeddingService
 from services.search_service import SearchService
+from services.indexing_pipeline import IndexingPipeline
+from services.index_manifest import IndexManifest
+from services.executor_service import ExecutorService, get_executor_service
+from services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from services.document_chunker import DocumentChunker
+from services.reranker import CrossEncoderReranker
+from services.answer_cache import SemanticAnswerCache
+from services.vector_store import create_vector_store
+import asyncio
 import json
+import numpy as np
 import os
+import re
+import time
 
 
 class RAGService:
@@ -15,7 +26,9 @@ class RAGService:
         self,
         embedding_service: EmbeddingService,
         search_service: SearchService,
-        index_name: str = "documents"
+        index_name: str = "documents",
+        executor_service: Optional[ExecutorService] = None,
+        reranker: Optional[CrossEncoderReranker] = None
     ):
         """
         Initialize RAG service
@@ -23,136 +36,333 @@ class RAGService:
         Args:
             embedding_service: Instance of EmbeddingService
             search_service: Instance of SearchService for product context
-            index_name: Name of the Pinecone index for documents
+            index_name: Name of the vector index for documents
+            executor_service: Pools used by the async methods (shared default if omitted)
+            reranker: Optional cross-encoder used when retrieval asks for re-ranking
         """
         self.embedding_service = embedding_service
         self.search_service = search_service
+        self.reranker = reranker
         self.index_name = index_name
-        
-        # Initialize Pinecone client
-        api_key = os.getenv("PINECONE_API_KEY")
-        if not api_key:
-            raise ValueError("PINECONE_API_KEY environment variable is required")
-        
-        self.pc = Pinecone(api_key=api_key)
+        self.executor = executor_service or get_executor_service()
+        self.pipeline = IndexingPipeline(embedding_service)
         
         # Get embedding dimension
         embedding_dim = self.embedding_service.get_model_info()["embedding_dimension"]
         
-        # Create index if it doesn't exist
-        if index_name not in self.pc.list_indexes().names():
-            self.pc.create_index(
-                name=index_name,
-                dimension=embedding_dim,
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
+        # Connect to the configured vector store (Pinecone or local)
+        self.index = create_vector_store(index_name, embedding_dim)
+        self.manifest = IndexManifest(index_name)
+        self.lexical = BM25Index()
         
-        # Connect to index
-        self.index = self.pc.Index(index_name)
+        # Documents are embedded as overlapping passages measured in model tokens
+        self.chunker = DocumentChunker(getattr(self.embedding_service.model, "tokenizer", None))
+        # Chunks retrieved per requested document, so duplicates can be collapsed
+        self.chunk_fetch_factor = int(os.getenv("CHUNK_FETCH_FACTOR", "4"))
         
-        # Wait for index to be ready
-        import time
-        time.sleep(1)
+        # Answers to paraphrased questions are served from the semantic answer cache
+        self.answer_cache = SemanticAnswerCache(embedding_dim)
         
         stats = self.index.describe_index_stats()
         print(f"✓ RAG service initialized with {stats['total_vector_count']} documents")
     
-    def index_documents(self, documents: List[Dict[str, Any]]) -> int:
+    def index_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Index documents in Pinecone with embeddings
+        Incrementally index documents in the vector store with embeddings
+        
+        Each document is split into overlapping passages (chunk IDs
+        '<doc id>#<n>') that are embedded in batches as they are produced.
+        Only new or changed documents are re-embedded, and the chunks of
+        documents no longer in the list are deleted.
         
         Args:
-            documents: List of document dictionaries to index
+            documents: Full list of document dictionaries to index
             
         Returns:
-            Number of documents indexed
+            Sync report with added/updated/deleted/unchanged counts and elapsed seconds
         """
         if not documents:
-            return 0
+            return {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0, "seconds": 0.0}
         
-        # Check if documents already exist
         stats = self.index.describe_index_stats()
-        existing_count = stats['total_vector_count']
-        if existing_count >= len(documents):
-            print(f"Documents already indexed ({existing_count} documents)")
-            return existing_count
-        
-        print(f"Indexing {len(documents)} documents...")
+        result = self.pipeline.sync(
+            documents,
+            self.manifest,
+            text_fn=self._document_text,
+            # Chunking settings are hashed too, so changing them re-chunks every document
+            metadata_fn=lambda doc: {**self._document_metadata(doc), "chunking": self.chunker.settings},
+            vector_fn=self._document_vector,
+            upsert_fn=self._upsert,
+            delete_fn=self._delete,
+            stored_vectors=stats['total_vector_count'],
+            label="documents",
+            chunk_fn=self._document_chunks
+        )
         
-        vectors = []
+        self.lexical.sync({
+            doc['id']: (self._document_text(doc), self.manifest.entries[doc['id']]["hash"])
+            for doc in documents
+        })
         
-        for doc in documents:
-            # Create searchable text from document
-            searchable_text = f"{doc['title']} {doc['content']}"
-            
-            # Generate embedding
-            embedding = self.embedding_service.generate_embedding(searchable_text)
+        if result["added"] or result["updated"] or result["deleted"]:
+            self.answer_cache.invalidate()
+            self.index.persist()
             
-            # Prepare metadata
-            metadata = {
-                "title": doc['title'],
-                "doc_type": doc['doc_type'],
-                "category": doc.get('category', ''),
-                "content": doc['content'][:1000]  # Limit content length in metadata
-            }
-            
-            vectors.append({
-                "id": doc['id'],
-                "values": embedding,
-                "metadata": metadata
-            })
+            report = self.index.quantization_report()
+            if report:
+                print(f"✓ {report['quantization']} quantization saved {report['memory_saved_pct']}% vector memory "
+                      f"(recall@{report['k']}: {report['recall_at_k']})")
         
-        # Upsert vectors in batches
-        batch_size = 100
+        return result
+    
+    @staticmethod
+    def _document_text(doc: Dict[str, Any]) -> str:
+        """Create searchable text from document"""
+        return f"{doc['title']} {doc['content']}"
+    
+    @staticmethod
+    def _document_metadata(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare document-level metadata shared by all of its chunks"""
+        return {
+            "title": doc['title'],
+            "doc_type": doc['doc_type'],
+            "category": doc.get('category', '')
+        }
+    
+    def _document_chunks(self, doc: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Split a document into chunks; each is embedded with the title for context"""
+        for chunk in self.chunker.chunk_document(doc):
+            yield {**chunk, "content": chunk['text'], "text": f"{doc['title']}\n{chunk['text']}"}
+    
+    def _document_vector(self, chunk: Dict[str, Any], embedding: np.ndarray) -> Dict[str, Any]:
+        """Build the vector record for a document chunk and its embedding"""
+        return {
+            "id": chunk['id'],
+            "values": embedding,
+            "metadata": {
+                **self._document_metadata(chunk['document']),
+                "parent_id": chunk['parent_id'],
+                "chunk": chunk['chunk'],
+                "content": chunk['content']
+            }
+        }
+    
+    def _upsert(self, vectors: List[Dict[str, Any]], batch_size: int = 100) -> None:
+        """Upsert vectors in batches"""
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
             self.index.upsert(vectors=batch)
-        
-        print(f"✓ Indexed {len(documents)} documents successfully")
-        return len(documents)
     
-    def retrieve_context(self, question: str, limit: int = 3) -> List[Dict[str, Any]]:
+    def _delete(self, vector_ids: List[str], batch_size: int = 1000) -> None:
+        """Delete vectors in batches"""
+        for i in range(0, len(vector_ids), batch_size):
+            self.index.delete(ids=vector_ids[i:i + batch_size])
+    
+    def retrieve_context(
+        self,
+        question: str,
+        limit: int = 3,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents for a question
         
         Args:
             question: User's question
             limit: Number of documents to retrieve
+            mode: 'semantic', 'lexical' or 'hybrid' (as in SearchService.search)
+            rerank: Re-rank the top candidates with the cross-encoder, if one is configured
+            rerank_candidates: Number of first-stage candidates re-ranked (M)
+            rerank_budget_ms: Re-ranking latency budget; first-stage order is kept when exceeded
             
         Returns:
             List of relevant document dictionaries with metadata
         """
-        # Generate question embedding
-        question_embedding = self.embedding_service.generate_embedding(question)
+        reranking = rerank and self.reranker is not None
+        fetch = max(limit, rerank_candidates) if reranking else limit
+        
+        if mode == "lexical":
+            contexts = self.retrieve_lexical(question, fetch)
+        else:
+            # Generate question embedding
+            question_embedding = self.embedding_service.generate_embedding(question)
+            contexts = self._retrieve(question, question_embedding, fetch, mode)
         
-        # Search for relevant documents
+        if reranking:
+            contexts = self._rerank_contexts(question, contexts, limit, rerank_budget_ms)
+        return contexts
+    
+    def _rerank_contexts(
+        self,
+        question: str,
+        contexts: List[Dict[str, Any]],
+        limit: int,
+        budget_ms: Optional[float],
+        started_at: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Re-rank contexts with the cross-encoder; relevance becomes its score unless the budget ran out"""
+        ranked, scores = self.reranker.rerank(
+            question, contexts, lambda ctx: f"{ctx['title']}\n{ctx['content']}", limit, budget_ms, started_at
+        )
+        if scores is None:
+            return ranked
+        return [{**ctx, "relevance_score": score} for ctx, score in zip(ranked, scores)]
+    
+    def _retrieve(self, question: str, vector: List[float], limit: int, mode: str) -> List[Dict[str, Any]]:
+        """Retrieve documents for an already embedded question in the given mode"""
+        if mode not in SearchService.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; choose one of {', '.join(SearchService.SEARCH_MODES)}")
+        if mode == "lexical":
+            return self.retrieve_lexical(question, limit)
+        if mode == "semantic":
+            return self.retrieve_by_vector(vector, limit)
+        
+        candidates = limit * self.search_service.hybrid_candidate_factor
+        return self._fuse_contexts(
+            self.retrieve_by_vector(vector, candidates),
+            self.retrieve_lexical(question, candidates),
+            limit
+        )
+    
+    def retrieve_lexical(self, question: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retrieve documents by BM25 keyword match
+        
+        Documents are ranked as a whole; the context passage of each is the
+        chunk sharing the most terms with the question.
+        
+        Args:
+            question: User's question
+            limit: Number of documents to retrieve
+            
+        Returns:
+            List of relevant document dictionaries with metadata, scored by BM25
+        """
+        hits = self.lexical.search(question, top_k=limit)
+        if not hits:
+            return []
+        
+        records = self.index.fetch(ids=self.manifest.vectors_for([doc_id for doc_id, _ in hits]))['vectors']
+        chunks_by_doc: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records.values():
+            chunks_by_doc.setdefault(record['metadata'].get('parent_id', record['id']), []).append(record)
+        
+        terms = set(tokenize(question))
+        contexts = []
+        for doc_id, score in hits:
+            chunks = chunks_by_doc.get(doc_id)
+            if not chunks:
+                continue
+            best = max(chunks, key=lambda record: (
+                len(terms.intersection(tokenize(record['metadata']['content']))),
+                -record['metadata'].get('chunk', 0)
+            ))
+            contexts.append(self._match_to_context({"id": best['id'], "score": score, "metadata": best['metadata']}))
+        return contexts
+    
+    @staticmethod
+    def _fuse_contexts(
+        semantic: List[Dict[str, Any]],
+        lexical: List[Dict[str, Any]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Merge semantic and lexical contexts with reciprocal rank fusion; relevance becomes the fused score"""
+        by_id = {ctx['id']: ctx for ctx in lexical + semantic}
+        fused = reciprocal_rank_fusion([
+            [ctx['id'] for ctx in semantic],
+            [ctx['id'] for ctx in lexical]
+        ])
+        return [{**by_id[doc_id], "relevance_score": score} for doc_id, score in fused[:limit]]
+    
+    def retrieve_by_vector(self, vector: List[float], limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant documents using a precomputed question embedding
+        
+        limit * CHUNK_FETCH_FACTOR chunks are retrieved and only the best
+        chunk of each document is kept, so one long document cannot fill
+        every context slot.
+        
+        Args:
+            vector: Question embedding
+            limit: Number of documents to retrieve
+            
+        Returns:
+            List of relevant document dictionaries with metadata
+        """
         results = self.index.query(
-            vector=question_embedding,
-            top_k=limit,
+            vector=vector,
+            top_k=limit * self.chunk_fetch_factor,
             include_metadata=True
         )
         
         contexts = []
+        seen = set()
         for match in results['matches']:
-            metadata = match['metadata']
-            doc_data = {
-                "id": match['id'],
-                "title": metadata['title'],
-                "content": metadata['content'],
-                "doc_type": metadata['doc_type'],
-                "category": metadata.get('category', ''),
-                "relevance_score": match['score']
-            }
-            contexts.append(doc_data)
+            context = self._match_to_context(match)
+            if context['id'] in seen:
+                continue
+            seen.add(context['id'])
+            contexts.append(context)
+            if len(contexts) >= limit:
+                break
+        return contexts
+    
+    async def retrieve_context_async(
+        self,
+        question: str,
+        limit: int = 3,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Non-blocking variant of retrieve_context()"""
+        reranking = rerank and self.reranker is not None
+        fetch = max(limit, rerank_candidates) if reranking else limit
         
+        if mode == "lexical":
+            contexts = await self.executor.run_io(self.retrieve_lexical, question, fetch)
+        else:
+            question_embedding = await self.embedding_service.generate_embedding_async(question)
+            contexts = await self.executor.run_io(self._retrieve, question, question_embedding, fetch, mode)
+        
+        if reranking:
+            # The budget includes time spent waiting for an encode worker
+            contexts = await self.executor.run_encode(
+                self._rerank_contexts, question, contexts, limit, rerank_budget_ms, time.perf_counter()
+            )
         return contexts
     
+    async def retrieve_by_vector_async(self, vector: List[float], limit: int = 3) -> List[Dict[str, Any]]:
+        """Non-blocking variant of retrieve_by_vector()"""
+        return await self.executor.run_io(self.retrieve_by_vector, vector, limit)
+    
+    @staticmethod
+    def _match_to_context(match: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a chunk match into a context dictionary keyed by its parent document"""
+        metadata = match['metadata']
+        return {
+            "id": metadata.get('parent_id', match['id']),
+            "chunk_id": match['id'],
+            "title": metadata['title'],
+            "content": metadata['content'],
+            "doc_type": metadata['doc_type'],
+            "category": metadata.get('category', ''),
+            "relevance_score": match['score']
+        }
+    
     def generate_answer(
         self,
         question: str,
         context_limit: int = 3,
-        include_products: bool = True
+        include_products: bool = True,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Generate answer to a question using RAG
@@ -161,37 +371,32 @@ class RAGService:
             question: User's question
             context_limit: Number of documents to use as context
             include_products: Whether to include related products
+            mode: Document retrieval mode: 'semantic', 'lexical' or 'hybrid'
+            rerank: Re-rank document candidates with the cross-encoder, if one is configured
+            rerank_candidates: Number of document candidates re-ranked (M)
+            rerank_budget_ms: Re-ranking latency budget; first-stage order is kept when exceeded
             
         Returns:
             Dictionary with answer, sources, and optional products
         """
+        # Embed the question once and reuse it for the cache, documents and products
+        question_embedding = self.embedding_service.generate_embedding(question)
+        
+        options = self._answer_options(context_limit, include_products, mode, rerank, rerank_candidates)
+        cached = self.answer_cache.get(question_embedding, options)
+        if cached is not None:
+            products = self.search_service.get_products_by_ids(cached["product_ids"]) if include_products else []
+            return self._cached_result(question, cached, products)
+        generation = self.answer_cache.generation
+        
         # Retrieve relevant documents
-        contexts = self.retrieve_context(question, limit=context_limit)
+        reranking = rerank and self.reranker is not None
+        fetch = max(context_limit, rerank_candidates) if reranking else context_limit
+        contexts = self._retrieve(question, question_embedding, fetch, mode)
+        if reranking:
+            contexts = self._rerank_contexts(question, contexts, context_limit, rerank_budget_ms)
         
-        # Build answer from contexts
-        if not contexts:
-            answer = "I don't have specific information about that in my knowledge base. Could you rephrase your question or ask about products, rain gear, fashion, fitness, or tech accessories?"
-            sources = []
-        else:
-            # Create answer by combining relevant context
-            answer_parts = []
-            sources = []
-            
-            for ctx in contexts:
-                answer_parts.append(ctx['content'])
-                sources.append({
-                    "title": ctx['title'],
-                    "type": ctx['doc_type'],
-                    "category": ctx.get('category', ''),
-                    "relevance": ctx.get('relevance_score', 0)
-                })
-            
-            # Synthesize answer (in a real system, this would use an LLM)
-            # For now, we'll provide the most relevant context
-            answer = f"Based on our knowledge base:\n\n{contexts[0]['content']}"
-            
-            if len(contexts) > 1:
-                answer += f"\n\nAdditional information: {contexts[1]['title']}"
+        answer, sources = self._build_answer(contexts)
         
         result = {
             "question": question,
@@ -202,16 +407,199 @@ class RAGService:
         
         # Optionally include related products
         if include_products:
-            products = self.search_service.search(query=question, limit=3)
+            products = self.search_service.search_by_vector(question_embedding, limit=3)
             result["related_products"] = [p.dict() for p in products]
         
+        self.answer_cache.put(
+            question_embedding, options, answer, sources,
+            [p["id"] for p in result["related_products"]], generation
+        )
         return result
     
+    async def generate_answer_async(
+        self,
+        question: str,
+        context_limit: int = 3,
+        include_products: bool = True,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Non-blocking variant of generate_answer()
+        
+        The question is embedded once, then the document and product
+        lookups run concurrently. Re-ranking runs on the encode pool.
+        """
+        question_embedding = await self.embedding_service.generate_embedding_async(question)
+        
+        options = self._answer_options(context_limit, include_products, mode, rerank, rerank_candidates)
+        cached = self.answer_cache.get(question_embedding, options)
+        if cached is not None:
+            products = []
+            if include_products:
+                products = await self.executor.run_io(self.search_service.get_products_by_ids, cached["product_ids"])
+            return self._cached_result(question, cached, products)
+        generation = self.answer_cache.generation
+        
+        reranking = rerank and self.reranker is not None
+        fetch = max(context_limit, rerank_candidates) if reranking else context_limit
+        lookups = [self.executor.run_io(self._retrieve, question, question_embedding, fetch, mode)]
+        if include_products:
+            lookups.append(self.search_service.search_by_vector_async(question_embedding, limit=3))
+        
+        results = await asyncio.gather(*lookups)
+        contexts = results[0]
+        if reranking:
+            contexts = await self.executor.run_encode(
+                self._rerank_contexts, question, contexts, context_limit, rerank_budget_ms, time.perf_counter()
+            )
+        answer, sources = self._build_answer(contexts)
+        products = results[1] if include_products else []
+        
+        self.answer_cache.put(question_embedding, options, answer, sources, [p.id for p in products], generation)
+        return {
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            "related_products": [p.dict() for p in products]
+        }
+    
+    async def generate_answer_stream(
+        self,
+        question: str,
+        context_limit: int = 3,
+        include_products: bool = True,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of generate_answer_async()
+        
+        The product lookup starts as soon as the question is embedded and
+        runs while the answer is produced, so the first events never wait
+        for it.
+        
+        Yields:
+            (event, data) tuples in order: ('sources', list of sources),
+            one or more ('answer', text piece), and ('products', list of
+            product dicts) when include_products is set
+        """
+        question_embedding = await self.embedding_service.generate_embedding_async(question)
+        
+        options = self._answer_options(context_limit, include_products, mode, rerank, rerank_candidates)
+        cached = self.answer_cache.get(question_embedding, options)
+        if cached is not None:
+            yield "sources", cached["sources"]
+            for piece in self._answer_pieces(cached["answer"]):
+                yield "answer", piece
+            if include_products:
+                products = await self.executor.run_io(self.search_service.get_products_by_ids, cached["product_ids"])
+                yield "products", [p.dict() for p in products]
+            return
+        generation = self.answer_cache.generation
+        
+        products_task = None
+        if include_products:
+            products_task = asyncio.ensure_future(
+                self.search_service.search_by_vector_async(question_embedding, limit=3)
+            )
+        
+        try:
+            reranking = rerank and self.reranker is not None
+            fetch = max(context_limit, rerank_candidates) if reranking else context_limit
+            contexts = await self.executor.run_io(self._retrieve, question, question_embedding, fetch, mode)
+            if reranking:
+                contexts = await self.executor.run_encode(
+                    self._rerank_contexts, question, contexts, context_limit, rerank_budget_ms, time.perf_counter()
+                )
+            answer, sources = self._build_answer(contexts)
+            yield "sources", sources
+            
+            for piece in self._answer_pieces(answer):
+                yield "answer", piece
+            
+            products = []
+            if products_task is not None:
+                products = await products_task
+                yield "products", [p.dict() for p in products]
+            
+            self.answer_cache.put(question_embedding, options, answer, sources, [p.id for p in products], generation)
+        finally:
+            if products_task is not None and not products_task.done():
+                products_task.cancel()
+    
+    def _answer_options(
+        self,
+        context_limit: int,
+        include_products: bool,
+        mode: str,
+        rerank: bool,
+        rerank_candidates: int
+    ) -> tuple:
+        """Retrieval options a cached answer must match"""
+        reranking = rerank and self.reranker is not None
+        return (context_limit, include_products, mode, reranking, rerank_candidates if reranking else None)
+    
+    @staticmethod
+    def _cached_result(question: str, cached: Dict[str, Any], products: List[Any]) -> Dict[str, Any]:
+        """Build a generate_answer() result from a cache entry"""
+        return {
+            "question": question,
+            "answer": cached["answer"],
+            "sources": cached["sources"],
+            "related_products": [p.dict() for p in products]
+        }
+    
+    @staticmethod
+    def _answer_pieces(answer: str, words: int = 8) -> Iterator[str]:
+        """Split answer text into pieces of a few words (whitespace kept) for streaming"""
+        tokens = re.findall(r"\S+\s*|\s+", answer)
+        for start in range(0, len(tokens), words):
+            yield "".join(tokens[start:start + words])
+    
+    @staticmethod
+    def _build_answer(contexts: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
+        """
+        Build answer text and source list from retrieved contexts
+        
+        Returns:
+            Tuple of (answer, sources)
+        """
+        if not contexts:
+            answer = "I don't have specific information about that in my knowledge base. Could you rephrase your question or ask about products, rain gear, fashion, fitness, or tech accessories?"
+            return answer, []
+        
+        sources = []
+        for ctx in contexts:
+            sources.append({
+                "title": ctx['title'],
+                "type": ctx['doc_type'],
+                "category": ctx.get('category', ''),
+                "relevance": ctx.get('relevance_score', 0)
+            })
+        
+        # Synthesize answer (in a real system, this would use an LLM)
+        # For now, we'll provide the most relevant context
+        answer = f"Based on our knowledge base:\n\n{contexts[0]['content']}"
+        
+        if len(contexts) > 1:
+            answer += f"\n\nAdditional information: {contexts[1]['title']}"
+        
+        return answer, sources
+    
     def ask(
         self,
         question: str,
         context_limit: int = 3,
-        include_products: bool = True
+        include_products: bool = True,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
     ) -> tuple[str, List[Dict], List[Any]]:
         """
         Simplified question answering method
@@ -220,11 +608,33 @@ class RAGService:
             question: User's question
             context_limit: Number of context documents to use
             include_products: Whether to include related products
+            mode: Document retrieval mode: 'semantic', 'lexical' or 'hybrid'
+            rerank: Re-rank document candidates with the cross-encoder, if one is configured
+            rerank_candidates: Number of document candidates re-ranked (M)
+            rerank_budget_ms: Re-ranking latency budget
             
         Returns:
             Tuple of (answer, sources, related_products)
         """
-        result = self.generate_answer(question, context_limit, include_products)
+        result = self.generate_answer(
+            question, context_limit, include_products, mode, rerank, rerank_candidates, rerank_budget_ms
+        )
+        return result["answer"], result["sources"], result["related_products"]
+    
+    async def ask_async(
+        self,
+        question: str,
+        context_limit: int = 3,
+        include_products: bool = True,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 12,
+        rerank_budget_ms: Optional[float] = None
+    ) -> tuple[str, List[Dict], List[Any]]:
+        """Non-blocking variant of ask()"""
+        result = await self.generate_answer_async(
+            question, context_limit, include_products, mode, rerank, rerank_candidates, rerank_budget_ms
+        )
         return result["answer"], result["sources"], result["related_products"]
     
     def get_stats(self) -> Dict[str, Any]:
@@ -236,7 +646,12 @@ class RAGService:
         """
         stats = self.index.describe_index_stats()
         return {
-            "total_documents": stats['total_vector_count'],
+            "total_documents": len(self.manifest.entries),
+            "total_chunks": stats['total_vector_count'],
+            "chunking": self.chunker.settings,
             "index_name": self.index_name,
+            "vector_store": self.index.backend,
+            "lexical_index": self.lexical.get_stats(),
+            "answer_cache": self.answer_cache.get_stats(),
             "embedding_model": self.embedding_service.model_name
         }
@@ -4,28 +4,93 @@ from typing import List, Optional, Dict, Any
 from models.schemas import Product
 from services.embedding_service import EmbeddingService
 from services.search_service import SearchService
+from services.executor_service import ExecutorService, get_executor_service
+from services.similarity_table import SimilarityTable
 import json
+import numpy as np
+import os
+import time
 
 
 class RecommendationService:
     """Service for generating product recommendations based on embeddings"""
     
-    def __init__(self, search_service: SearchService, embedding_service: EmbeddingService):
+    def __init__(
+        self,
+        search_service: SearchService,
+        embedding_service: EmbeddingService,
+        executor_service: Optional[ExecutorService] = None
+    ):
         """
         Initialize recommendation service
         
         Args:
             search_service: Instance of SearchService
             embedding_service: Instance of EmbeddingService
+            executor_service: Pools used by the async methods (shared default if omitted)
         """
         self.search_service = search_service
         self.embedding_service = embedding_service
+        self.executor = executor_service or get_executor_service()
+        
+        # Hits per recommendation re-scored when a name falls back to semantic search
+        self.name_fallback_candidate_factor = int(os.getenv("NAME_FALLBACK_CANDIDATE_FACTOR", "4"))
+        
+        # Precomputed neighbours for recommend_by_product_id (0 disables)
+        self.similarity_table: Optional[SimilarityTable] = None
+        if int(os.getenv("SIMILARITY_TABLE_NEIGHBOURS", "20")) > 0:
+            self.similarity_table = SimilarityTable(
+                path=os.path.join(search_service.manifest.directory, f"{search_service.index_name}.similar.npz")
+            )
+            self.refresh_similarity_table()
+            # Keep the neighbours current when products are re-synced later on
+            search_service.add_index_listener(lambda _report: self.refresh_similarity_table())
+        
         print("✓ Recommendation service initialized")
     
+    def refresh_similarity_table(self) -> Optional[Dict[str, int]]:
+        """
+        Bring the similar-product table up to date with the product index
+        
+        Products are diffed by the content hashes in the search service's
+        manifest, so only new or changed products (and rows that pointed at
+        them) are recomputed. Runs automatically after every index_products()
+        call that changes the product index.
+        
+        Returns:
+            Dictionary with changed, removed and recomputed row counts, or
+            None if the table is disabled
+        """
+        if self.similarity_table is None:
+            return None
+        
+        entries = self.search_service.manifest.entries
+        hashes = {product_id: entry["hash"] for product_id, entry in entries.items()}
+        changed, removed = self.similarity_table.diff(hashes)
+        if not changed and not removed:
+            print(f"✓ Similarity table up to date ({len(self.similarity_table)} products)")
+            return {"changed": 0, "removed": 0, "recomputed": 0}
+        
+        started = time.perf_counter()
+        # Products whose vectors are not visible yet are left out and picked up by the next refresh
+        ids, matrix = self.search_service.index.fetch_matrix(list(hashes))
+        if not ids:
+            return {"changed": 0, "removed": 0, "recomputed": 0}
+        report = self.similarity_table.update(ids, matrix, [hashes[product_id] for product_id in ids])
+        self.similarity_table.save()
+        print(
+            f"✓ Similarity table refreshed: {report['recomputed']} of {len(ids)} rows recomputed "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return report
+    
     def recommend_by_product_id(self, product_id: str, limit: int = 5) -> tuple[List[Product], List[float]]:
         """
         Get product recommendations based on a product ID
         
+        Served from the precomputed similarity table when it covers the
+        product and limit; otherwise the product vector is fetched and queried.
+        
         Args:
             product_id: ID of the product to base recommendations on
             limit: Number of recommendations to return
@@ -33,6 +98,12 @@ class RecommendationService:
         Returns:
             Tuple of (list of recommended products, list of similarity scores)
         """
+        if self.similarity_table is not None:
+            neighbours = self.similarity_table.lookup(product_id, limit)
+            if neighbours is not None:
+                products = self.search_service.get_products_by_ids([neighbour_id for neighbour_id, _ in neighbours])
+                return self._neighbours_to_recommendations(neighbours, {product.id: product for product in products})
+        
         # Get the source product embedding
         try:
             results = self.search_service.index.fetch(ids=[product_id])
@@ -40,50 +111,92 @@ class RecommendationService:
             if product_id not in results['vectors']:
                 return [], []
             
-            source_embedding = results['vectors'][product_id]['values']
-            
-            # Find similar products
-            similar_results = self.search_service.index.query(
-                vector=source_embedding,
-                top_k=limit + 1,  # +1 to account for the source product itself
-                include_metadata=True
-            )
-            
-            recommendations = []
-            scores = []
-            
-            for match in similar_results['matches']:
-                # Skip the source product itself
-                if match['id'] == product_id:
-                    continue
-                
-                metadata = match['metadata']
-                product_data = {
-                    "id": match['id'],
-                    "name": metadata['name'],
-                    "description": metadata['description'],
-                    "category": metadata['category'],
-                    "price": metadata['price'],
-                    "rating": metadata.get('rating', 0),
-                    "image": metadata.get('image', ''),
-                    "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
-                }
-                recommendations.append(Product(**product_data))
-                scores.append(match['score'])
-                
-                if len(recommendations) >= limit:
-                    break
-            
-            return recommendations, scores
+            return self._recommend_by_source_vector(product_id, results['vectors'][product_id]['values'], limit)
             
         except Exception as e:
             print(f"Error getting recommendations for product {product_id}: {e}")
             return [], []
     
+    @staticmethod
+    def _neighbours_to_recommendations(
+        neighbours: List[tuple[str, float]],
+        products: Dict[str, Product]
+    ) -> tuple[List[Product], List[float]]:
+        """Resolve similarity table neighbours to products, skipping unknown IDs"""
+        recommendations = []
+        scores = []
+        for neighbour_id, score in neighbours:
+            if neighbour_id in products:
+                recommendations.append(products[neighbour_id])
+                scores.append(score)
+        return recommendations, scores
+    
+    def _recommend_by_source_vector(self, product_id: str, source_embedding: List[float], limit: int) -> tuple[List[Product], List[float]]:
+        """Query neighbours of a product whose vector is already known, skipping the product itself"""
+        similar_results = self.search_service.index.query(
+            vector=source_embedding,
+            top_k=limit + 1,  # +1 to account for the source product itself
+            include_metadata=True
+        )
+        
+        recommendations = []
+        scores = []
+        
+        for match in similar_results['matches']:
+            # Skip the source product itself
+            if match['id'] == product_id:
+                continue
+            
+            recommendations.append(self.search_service.match_to_product(match))
+            scores.append(match['score'])
+            
+            if len(recommendations) >= limit:
+                break
+        
+        return recommendations, scores
+    
+    def _recommend_from_matches(self, matches: List[Dict[str, Any]], limit: int) -> tuple[List[Product], List[float]]:
+        """
+        Recommend around the top hit of a search retrieved with include_values
+        
+        The hit's neighbours come from the similarity table when it covers
+        the hit; otherwise the other hits are re-scored against the hit's
+        stored vector, so no further vector query is made.
+        """
+        source = matches[0]
+        if self.similarity_table is not None and self.similarity_table.lookup(source['id'], limit) is not None:
+            return self.recommend_by_product_id(source['id'], limit)
+        
+        candidates = [match for match in matches[1:] if match['id'] != source['id']]
+        if not candidates:
+            return [], []
+        vectors = np.asarray([source['values']] + [match['values'] for match in candidates], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = 1.0
+        vectors /= norms[:, None]
+        scores = vectors[1:] @ vectors[0]
+        
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return (
+            [self.search_service.match_to_product(candidates[i]) for i in order],
+            [float(scores[i]) for i in order]
+        )
+    
+    def _name_fallback_candidates(self, limit: int) -> int:
+        # The top hit plus at least `limit` others to rank around it
+        return max(limit * self.name_fallback_candidate_factor, limit) + 1
+    
     def recommend_by_product_name(self, product_name: str, limit: int = 5) -> tuple[List[Product], List[float]]:
         """
         Get product recommendations based on a product name
         
+        The name is resolved through the catalog's exact/fuzzy name index
+        first. Only on a miss is it embedded and searched, once: the top hit
+        is taken as the product, and its neighbours are read from the
+        similarity table or ranked among the other hits by their stored
+        vectors (NAME_FALLBACK_CANDIDATE_FACTOR hits per recommendation).
+        At most one encode and one vector query.
+        
         Args:
             product_name: Name of the product to base recommendations on
             limit: Number of recommendations to return
@@ -91,14 +204,43 @@ class RecommendationService:
         Returns:
             Tuple of (list of recommended products, list of similarity scores)
         """
-        # Search for the product by name
-        products = self.search_service.search(query=product_name, limit=1)
+        product_id = self.search_service.catalog.find_by_name(product_name)
+        if product_id is not None:
+            return self.recommend_by_product_id(product_id, limit)
         
-        if not products:
+        # Fall back to semantic search for the product
+        query_embedding = self.embedding_service.generate_embedding(product_name)
+        results = self.search_service.index.query(
+            vector=query_embedding,
+            top_k=self._name_fallback_candidates(limit),
+            include_metadata=True,
+            include_values=True
+        )
+        
+        if not results['matches']:
             return [], []
         
-        # Get recommendations based on the found product
-        return self.recommend_by_product_id(products[0].id, limit)
+        return self._recommend_from_matches(results['matches'], limit)
+    
+    async def recommend_by_product_name_async(self, product_name: str, limit: int = 5) -> tuple[List[Product], List[float]]:
+        """Non-blocking variant of recommend_by_product_name()"""
+        product_id = await self.executor.run_io(self.search_service.catalog.find_by_name, product_name)
+        if product_id is not None:
+            return await self.executor.run_io(self.recommend_by_product_id, product_id, limit)
+        
+        query_embedding = await self.embedding_service.generate_embedding_async(product_name)
+        results = await self.executor.run_io(
+            self.search_service.index.query,
+            vector=query_embedding,
+            top_k=self._name_fallback_candidates(limit),
+            include_metadata=True,
+            include_values=True
+        )
+        
+        if not results['matches']:
+            return [], []
+        
+        return await self.executor.run_io(self._recommend_from_matches, results['matches'], limit)
     
     def recommend_by_query(self, query: str, limit: int = 5) -> tuple[List[Product], List[float]]:
         """
@@ -121,24 +263,96 @@ class RecommendationService:
             include_metadata=True
         )
         
+        return self._matches_to_recommendations(results['matches'])
+    
+    async def recommend_by_query_async(self, query: str, limit: int = 5) -> tuple[List[Product], List[float]]:
+        """Non-blocking variant of recommend_by_query()"""
+        query_embedding = await self.embedding_service.generate_embedding_async(query)
+        
+        results = await self.executor.run_io(
+            self.search_service.index.query,
+            vector=query_embedding,
+            top_k=limit,
+            include_metadata=True
+        )
+        
+        return self._matches_to_recommendations(results['matches'])
+    
+    def recommend_by_vectors(
+        self,
+        vectors: np.ndarray,
+        limit: int = 5,
+        exclude_ids: Optional[List[Optional[str]]] = None
+    ) -> List[tuple[List[Product], List[float]]]:
+        """
+        Get recommendations for many embeddings at once
+        
+        Args:
+            vectors: Embedding matrix, one row per request
+            limit: Number of recommendations per request
+            exclude_ids: Optional product ID to leave out of each row's results
+                         (the source product for product-based requests)
+            
+        Returns:
+            One (products, scores) tuple per row, in input order
+        """
+        exclude_ids = exclude_ids or [None] * len(vectors)
+        results = self.search_service.index.query_batch(vectors, top_k=limit + 1, include_metadata=True)
+        
         recommendations = []
-        scores = []
+        for result, exclude_id in zip(results, exclude_ids):
+            matches = [match for match in result['matches'] if match['id'] != exclude_id][:limit]
+            recommendations.append(self._matches_to_recommendations(matches))
+        return recommendations
+    
+    def recommend_batch_by_product_ids(
+        self,
+        product_ids: List[str],
+        limit: int = 5
+    ) -> List[tuple[List[Product], List[float]]]:
+        """
+        Get recommendations for many products with one fetch and one batched query
         
-        for match in results['matches']:
-            metadata = match['metadata']
-            product_data = {
-                "id": match['id'],
-                "name": metadata['name'],
-                "description": metadata['description'],
-                "category": metadata['category'],
-                "price": metadata['price'],
-                "rating": metadata.get('rating', 0),
-                "image": metadata.get('image', ''),
-                "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
-            }
-            recommendations.append(Product(**product_data))
-            scores.append(match['score'])
+        Products covered by the similarity table are answered from it; only
+        the rest are fetched and queried.
+        
+        Args:
+            product_ids: Source product IDs
+            limit: Number of recommendations per product
+            
+        Returns:
+            One (products, scores) tuple per product ID; unknown IDs get empty results
+        """
+        by_id = {}
+        pending = list(dict.fromkeys(product_ids))
+        if self.similarity_table is not None:
+            # One table lookup per product, then one catalog read for all neighbours
+            neighbours = {}
+            for product_id in pending:
+                found = self.similarity_table.lookup(product_id, limit)
+                if found is not None:
+                    neighbours[product_id] = found
+            
+            if neighbours:
+                neighbour_ids = [neighbour_id for found in neighbours.values() for neighbour_id, _ in found]
+                products = {product.id: product for product in self.search_service.get_products_by_ids(neighbour_ids)}
+                for product_id, found in neighbours.items():
+                    by_id[product_id] = self._neighbours_to_recommendations(found, products)
+            pending = [product_id for product_id in pending if product_id not in by_id]
         
+        fetched = self.search_service.index.fetch(ids=pending)['vectors'] if pending else {}
+        known = [product_id for product_id in pending if product_id in fetched]
+        
+        if known:
+            vectors = np.asarray([fetched[product_id]['values'] for product_id in known], dtype=np.float32)
+            by_id.update(zip(known, self.recommend_by_vectors(vectors, limit, exclude_ids=known)))
+        
+        return [by_id.get(product_id, ([], [])) for product_id in product_ids]
+    
+    def _matches_to_recommendations(self, matches: List[Dict[str, Any]]) -> tuple[List[Product], List[float]]:
+        """Convert vector store matches into (products, scores)"""
+        recommendations = [self.search_service.match_to_product(match) for match in matches]
+        scores = [match['score'] for match in matches]
         return recommendations, scores
     
     def recommend_similar_items(
@@ -174,10 +388,37 @@ class RecommendationService:
         
         return recommendations, scores, basis
     
+    async def recommend_similar_items_async(
+        self,
+        product_id: Optional[str] = None,
+        product_name: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: int = 5
+    ) -> tuple[List[Product], List[float], str]:
+        """Non-blocking variant of recommend_similar_items()"""
+        if product_id:
+            recommendations, scores = await self.executor.run_io(
+                self.recommend_by_product_id, product_id, limit
+            )
+            basis = f"Similar to product {product_id}"
+        elif product_name:
+            recommendations, scores = await self.recommend_by_product_name_async(product_name, limit)
+            basis = f"Similar to '{product_name}'"
+        elif query:
+            recommendations, scores = await self.recommend_by_query_async(query, limit)
+            basis = f"Based on your interest in '{query}'"
+        else:
+            return [], [], "No basis provided"
+        
+        return recommendations, scores, basis
+    
     def get_category_recommendations(self, category: str, limit: int = 5) -> List[Product]:
         """
         Get top-rated products from a specific category
         
+        Served from the catalog's per-category rating ranking, which is
+        rebuilt after each reindex, so no embedding or vector query is needed.
+        
         Args:
             category: Product category
             limit: Number of recommendations to return
@@ -185,8 +426,4 @@ class RecommendationService:
         Returns:
             List of recommended products
         """
-        products = self.search_service.search(query=category, limit=limit * 2, category=category)
-        
-        # Sort by rating and return top N
-        sorted_products = sorted(products, key=lambda p: p.rating or 0, reverse=True)
-        return sorted_products[:limit]
+        return [Product(**product) for product in self.search_service.catalog.top_rated(category, limit)]
@@ -0,0 +1,164 @@
+"""Cross-encoder re-ranking of retrieved candidates under a latency budget"""
+
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Tuple, TypeVar
+from sentence_transformers import CrossEncoder
+import hashlib
+import os
+import threading
+import time
+
+
+T = TypeVar("T")
+
+
+class CrossEncoderReranker:
+    """
+    Second-stage re-ranker scoring (query, candidate) pairs with a cross-encoder
+    
+    Pairs are scored in batches and their scores cached (LRU), so repeated
+    queries over the same candidates cost nothing. Batches are sized to what
+    the remaining latency budget affords, judged by the measured cost per
+    pair; once the budget is spent (or cannot cover another pair) with pairs
+    left to score, the candidates keep their first-stage (bi-encoder) order.
+    """
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        cache_size: Optional[int] = None
+    ):
+        """
+        Load the cross-encoder
+        
+        Args:
+            model_name: Cross-encoder model (RERANKER_MODEL, default 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+            batch_size: Pairs scored per forward pass (RERANKER_BATCH_SIZE, default 16)
+            cache_size: Pair scores kept in the LRU cache (RERANKER_CACHE_SIZE, default 10000)
+        """
+        self.model_name = model_name or os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+        self.batch_size = batch_size or int(os.getenv("RERANKER_BATCH_SIZE", "16"))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("RERANKER_CACHE_SIZE", "10000"))
+        
+        print(f"Loading cross-encoder: {self.model_name}")
+        self.model = CrossEncoder(self.model_name)
+        
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "reranked": 0, "fallbacks": 0, "pairs_scored": 0, "cache_hits": 0}
+        self._rerank_seconds = 0.0
+        # Moving average of predict() seconds per pair, used to size batches to the budget
+        self._pair_seconds: Optional[float] = None
+        print(f"✓ Cross-encoder loaded: {self.model_name}")
+    
+    @staticmethod
+    def _key(query: str, text: str) -> Tuple[str, str]:
+        return (" ".join(query.lower().split()), hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest())
+    
+    def score(self, query: str, texts: List[str], deadline: Optional[float] = None) -> Optional[List[float]]:
+        """
+        Score a query against candidate texts
+        
+        Args:
+            query: Query text
+            texts: Candidate texts
+            deadline: time.perf_counter() value by which scoring must be done
+        
+        Returns:
+            One relevance score per text, or None if the deadline passed (or
+            could not be met) with pairs left to score
+        """
+        keys = [self._key(query, text) for text in texts]
+        scores: List[Optional[float]] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+                    self._stats["cache_hits"] += 1
+        
+        missing = [i for i, value in enumerate(scores) if value is None]
+        while missing:
+            size = min(self.batch_size, len(missing))
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                if self._pair_seconds:
+                    size = min(size, int(remaining / self._pair_seconds))
+                    if size < 1:
+                        return None
+            
+            batch, missing = missing[:size], missing[size:]
+            started = time.perf_counter()
+            predicted = self.model.predict([(query, texts[i]) for i in batch], batch_size=size)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                per_pair = elapsed / len(batch)
+                self._pair_seconds = per_pair if self._pair_seconds is None else 0.8 * self._pair_seconds + 0.2 * per_pair
+                self._stats["pairs_scored"] += len(batch)
+                for i, value in zip(batch, predicted):
+                    scores[i] = float(value)
+                    self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            
+            # Scores already computed stay cached even if this request falls back
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+        
+        return scores
+    
+    def rerank(
+        self,
+        query: str,
+        candidates: List[T],
+        text_fn: Callable[[T], str],
+        top_k: int,
+        budget_ms: Optional[float] = None,
+        started_at: Optional[float] = None
+    ) -> Tuple[List[T], Optional[List[float]]]:
+        """
+        Re-order first-stage candidates by cross-encoder score
+        
+        Args:
+            query: Query text
+            candidates: Candidates in first-stage order
+            text_fn: Text of a candidate as seen by the cross-encoder
+            top_k: Number of candidates to return
+            budget_ms: Latency budget for scoring; None means unbounded
+            started_at: time.perf_counter() value the budget counts from, e.g.
+                        taken before the call was queued on the encode pool
+                        (defaults to now)
+        
+        Returns:
+            Tuple of (top_k candidates, their cross-encoder scores), or the
+            first top_k candidates and None if the budget ran out
+        """
+        start = time.perf_counter()
+        deadline = (started_at or start) + budget_ms / 1000.0 if budget_ms is not None else None
+        scores = self.score(query, [text_fn(candidate) for candidate in candidates], deadline) if candidates else []
+        
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["reranked" if scores is not None else "fallbacks"] += 1
+            self._rerank_seconds += time.perf_counter() - start
+        
+        if scores is None:
+            return candidates[:top_k], None
+        
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])[:top_k]
+        return [candidates[i] for i in order], [scores[i] for i in order]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get re-ranking statistics"""
+        with self._lock:
+            requests = self._stats["requests"]
+            return {
+                "model": self.model_name,
+                **self._stats,
+                "cached_pairs": len(self._cache),
+                "avg_ms": round(1000 * self._rerank_seconds / requests, 2) if requests else 0.0
+            }
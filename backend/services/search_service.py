@@ -1,113 +1,173 @@
-"""Search service for semantic product search using Pinecone"""
+"""Search service for semantic product search over a vector store"""
 
-from pinecone import Pinecone, ServerlessSpec
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from models.schemas import Product, SearchRequest
 from services.embedding_service import EmbeddingService
+from services.indexing_pipeline import IndexingPipeline
+from services.index_manifest import IndexManifest
+from services.catalog_store import CatalogStore
+from services.lexical_index import BM25Index, reciprocal_rank_fusion
+from services.executor_service import ExecutorService, get_executor_service
+from services.vector_store import create_vector_store
+from services.reranker import CrossEncoderReranker
+import asyncio
+import hashlib
 import json
+import numpy as np
 import os
+import time
 
 
 class SearchService:
-    """Service for semantic product search using vector embeddings"""
+    """
+    Service for product search using vector embeddings and BM25
     
-    def __init__(self, embedding_service: EmbeddingService, index_name: str = "products"):
+    Search modes:
+        semantic: vector similarity only (default)
+        lexical: BM25 over name, description, category, tags and brand
+        hybrid: both rankings fused with reciprocal rank fusion
+    """
+    
+    SEARCH_MODES = ("semantic", "lexical", "hybrid")
+    
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        index_name: str = "products",
+        executor_service: Optional[ExecutorService] = None,
+        reranker: Optional[CrossEncoderReranker] = None
+    ):
         """
-        Initialize search service with Pinecone
+        Initialize search service
         
         Args:
             embedding_service: Instance of EmbeddingService for generating embeddings
-            index_name: Name of the Pinecone index
+            index_name: Name of the vector index
+            executor_service: Pools used by the async methods (shared default if omitted)
+            reranker: Optional cross-encoder used when a search asks for re-ranking
         """
         self.embedding_service = embedding_service
+        self.reranker = reranker
         self.index_name = index_name
-        
-        # Initialize Pinecone client
-        api_key = os.getenv("PINECONE_API_KEY")
-        if not api_key:
-            raise ValueError("PINECONE_API_KEY environment variable is required")
-        
-        self.pc = Pinecone(api_key=api_key)
+        self.executor = executor_service or get_executor_service()
+        self.pipeline = IndexingPipeline(embedding_service)
         
         # Get embedding dimension
         embedding_dim = self.embedding_service.get_model_info()["embedding_dimension"]
         
-        # Create index if it doesn't exist
-        if index_name not in self.pc.list_indexes().names():
-            self.pc.create_index(
-                name=index_name,
-                dimension=embedding_dim,
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
+        # Connect to the configured vector store (Pinecone or local)
+        self.index = create_vector_store(index_name, embedding_dim)
+        self.manifest = IndexManifest(index_name)
+        self.catalog = CatalogStore()
+        self.lexical = BM25Index()
         
-        # Connect to index
-        self.index = self.pc.Index(index_name)
+        # Called with the sync report after index_products() changed the index
+        self._index_listeners: List[Callable[[Dict[str, Any]], Any]] = []
         
-        # Wait for index to be ready
-        import time
-        time.sleep(1)
+        # Candidates taken from each ranking per requested result in hybrid mode
+        self.hybrid_candidate_factor = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "3"))
         
         stats = self.index.describe_index_stats()
         print(f"✓ Search service initialized with {stats['total_vector_count']} products")
     
-    def index_products(self, products: List[Dict[str, Any]]) -> int:
+    def index_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Index products in Pinecone with embeddings
+        Incrementally index products in the vector store with embeddings
+        
+        Only new or changed products are re-embedded, and vectors of products
+        no longer in the list are deleted.
         
         Args:
-            products: List of product dictionaries to index
+            products: Full list of product dictionaries to index
             
         Returns:
-            Number of products indexed
+            Sync report with added/updated/deleted/unchanged counts and elapsed seconds
         """
         if not products:
-            return 0
+            return {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0, "seconds": 0.0}
         
-        # Check if products already exist
-        stats = self.index.describe_index_stats()
-        existing_count = stats['total_vector_count']
-        if existing_count >= len(products):
-            print(f"Products already indexed ({existing_count} products)")
-            return existing_count
+        # Full product records for catalog listing and lookups
+        self.catalog.replace_all(products)
         
-        print(f"Indexing {len(products)} products...")
+        stats = self.index.describe_index_stats()
+        result = self.pipeline.sync(
+            products,
+            self.manifest,
+            text_fn=self._product_text,
+            metadata_fn=self._product_metadata,
+            vector_fn=self._product_vector,
+            upsert_fn=self._upsert,
+            delete_fn=self._delete,
+            stored_vectors=stats['total_vector_count'],
+            label="products"
+        )
         
-        # Prepare vectors for upsert
-        vectors = []
+        # The lexical index lives in memory; it re-tokenizes only products whose text changed.
+        # Its text has fields (brand, full description) the manifest hash does not cover.
+        lexical_texts = {p['id']: self._product_lexical_text(p) for p in products}
+        self.lexical.sync({
+            product_id: (text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+            for product_id, text in lexical_texts.items()
+        })
         
-        for product in products:
-            # Create searchable text from product data
-            searchable_text = f"{product['name']} {product['description']} {product['category']} {' '.join(product.get('tags', []))}"
+        if result["added"] or result["updated"] or result["deleted"]:
+            self.index.persist()
             
-            # Generate embedding
-            embedding = self.embedding_service.generate_embedding(searchable_text)
+            report = self.index.quantization_report()
+            if report:
+                print(f"✓ {report['quantization']} quantization saved {report['memory_saved_pct']}% vector memory "
+                      f"(recall@{report['k']}: {report['recall_at_k']})")
             
-            # Prepare metadata (Pinecone supports flat metadata)
-            metadata = {
-                "name": product['name'],
-                "category": product['category'],
-                "price": float(product['price']),
-                "rating": float(product.get('rating', 0)),
-                "description": product['description'][:500],  # Limit description length
-                "image": product.get('image', ''),
-                "tags": ','.join(product.get('tags', []))
-            }
-            
-            vectors.append({
-                "id": product['id'],
-                "values": embedding,
-                "metadata": metadata
-            })
-        
-        # Upsert vectors in batches
-        batch_size = 100
+            for listener in self._index_listeners:
+                listener(result)
+        
+        return result
+    
+    def add_index_listener(self, listener: Callable[[Dict[str, Any]], Any]) -> None:
+        """Register a callback run with the sync report whenever index_products() changes the index"""
+        self._index_listeners.append(listener)
+    
+    @staticmethod
+    def _product_text(product: Dict[str, Any]) -> str:
+        """Create searchable text from product data"""
+        return f"{product['name']} {product['description']} {product['category']} {' '.join(product.get('tags', []))}"
+    
+    @classmethod
+    def _product_lexical_text(cls, product: Dict[str, Any]) -> str:
+        """Create keyword-searchable text, adding fields that only matter lexically"""
+        return f"{cls._product_text(product)} {product.get('brand') or ''}"
+    
+    @staticmethod
+    def _product_metadata(product: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare metadata (Pinecone supports flat metadata)"""
+        return {
+            "name": product['name'],
+            "category": product['category'],
+            "price": float(product['price']),
+            "rating": float(product.get('rating', 0)),
+            "description": product['description'][:500],  # Limit description length
+            "image": product.get('image', ''),
+            "tags": ','.join(product.get('tags', []))
+        }
+    
+    def _product_vector(self, product: Dict[str, Any], embedding: np.ndarray) -> Dict[str, Any]:
+        """Build the vector record for a product and its embedding"""
+        return {
+            "id": product['id'],
+            "values": embedding,
+            "metadata": self._product_metadata(product)
+        }
+    
+    def _upsert(self, vectors: List[Dict[str, Any]], batch_size: int = 100) -> None:
+        """Upsert vectors in batches"""
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
             self.index.upsert(vectors=batch)
-        
-        print(f"✓ Indexed {len(products)} products successfully")
-        return len(products)
+    
+    def _delete(self, vector_ids: List[str], batch_size: int = 1000) -> None:
+        """Delete vectors in batches"""
+        for i in range(0, len(vector_ids), batch_size):
+            self.index.delete(ids=vector_ids[i:i + batch_size])
     
     def search(
         self,
@@ -115,10 +175,14 @@ class SearchService:
         limit: int = 10,
         category: Optional[str] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
+        max_price: Optional[float] = None,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 20,
+        rerank_budget_ms: Optional[float] = None
     ) -> List[Product]:
         """
-        Perform semantic search for products
+        Search for products
         
         Args:
             query: Search query text
@@ -126,14 +190,249 @@ class SearchService:
             category: Optional category filter
             min_price: Optional minimum price filter
             max_price: Optional maximum price filter
+            mode: 'semantic', 'lexical' or 'hybrid' (see SEARCH_MODES)
+            rerank: Re-rank the top candidates with the cross-encoder, if one is configured
+            rerank_candidates: Number of first-stage candidates re-ranked (M)
+            rerank_budget_ms: Re-ranking latency budget; first-stage order is kept when exceeded
             
         Returns:
             List of matching Product objects
         """
+        if not (rerank and self.reranker is not None):
+            return self._search_candidates(query, limit, category, min_price, max_price, mode)
+        
+        candidates = self._search_candidates(query, max(limit, rerank_candidates), category, min_price, max_price, mode)
+        products, _ = self.reranker.rerank(query, candidates, self._rerank_text, limit, rerank_budget_ms)
+        return products
+    
+    def _search_candidates(
+        self,
+        query: str,
+        limit: int,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        mode: str
+    ) -> List[Product]:
+        """First-stage retrieval for search()"""
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; choose one of {', '.join(self.SEARCH_MODES)}")
+        
+        if mode == "lexical":
+            return self.search_lexical(query, limit, category, min_price, max_price)
+        
         # Generate query embedding
         query_embedding = self.embedding_service.generate_embedding(query)
         
-        # Build filter conditions
+        if mode == "semantic":
+            return self.search_by_vector(query_embedding, limit, category, min_price, max_price)
+        
+        candidates = limit * self.hybrid_candidate_factor
+        return self.fuse_results(
+            self.search_by_vector(query_embedding, candidates, category, min_price, max_price),
+            self.search_lexical(query, candidates, category, min_price, max_price),
+            limit
+        )
+    
+    def search_lexical(
+        self,
+        query: str,
+        limit: int = 10,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Product]:
+        """
+        Keyword search for products with BM25
+        
+        Filters are checked against the catalog for each hit, so no vector
+        store call is made.
+        
+        Args:
+            query: Search query text
+            limit: Maximum number of results to return
+            category: Optional category filter
+            min_price: Optional minimum price filter
+            max_price: Optional maximum price filter
+            
+        Returns:
+            List of matching Product objects, best match first
+        """
+        def allow(product_id: str) -> bool:
+            product = self.catalog.get(product_id)
+            if product is None:
+                return False
+            if category and product['category'] != category:
+                return False
+            if min_price is not None and product['price'] < min_price:
+                return False
+            if max_price is not None and product['price'] > max_price:
+                return False
+            return True
+        
+        hits = self.lexical.search(query, top_k=limit, allow=allow)
+        return [Product(**self.catalog.get(product_id)) for product_id, _ in hits]
+    
+    @classmethod
+    def _rerank_text(cls, product: Product) -> str:
+        """Text of a product as scored by the cross-encoder"""
+        return cls._product_text(product.dict())
+    
+    @staticmethod
+    def fuse_results(semantic: List[Product], lexical: List[Product], limit: int) -> List[Product]:
+        """Merge semantic and lexical rankings with reciprocal rank fusion"""
+        by_id = {product.id: product for product in lexical + semantic}
+        fused = reciprocal_rank_fusion([
+            [product.id for product in semantic],
+            [product.id for product in lexical]
+        ])
+        return [by_id[product_id] for product_id, _ in fused[:limit]]
+    
+    def search_by_vector(
+        self,
+        vector: List[float],
+        limit: int = 10,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Product]:
+        """
+        Search for products using a precomputed query embedding
+        
+        Args:
+            vector: Query embedding
+            limit: Maximum number of results to return
+            category: Optional category filter
+            min_price: Optional minimum price filter
+            max_price: Optional maximum price filter
+            
+        Returns:
+            List of matching Product objects
+        """
+        results = self.index.query(
+            vector=vector,
+            top_k=limit,
+            include_metadata=True,
+            filter=self.build_filter(category, min_price, max_price)
+        )
+        
+        return [self.match_to_product(match) for match in results['matches']]
+    
+    async def search_async(
+        self,
+        query: str,
+        limit: int = 10,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        mode: str = "semantic",
+        rerank: bool = False,
+        rerank_candidates: int = 20,
+        rerank_budget_ms: Optional[float] = None
+    ) -> List[Product]:
+        """
+        Non-blocking variant of search()
+        
+        Encoding runs on the encode pool and the vector query on the I/O pool,
+        so the event loop stays free while either is in progress. In hybrid
+        mode the vector and BM25 lookups run concurrently. Cross-encoder
+        scoring runs on the encode pool.
+        """
+        if not (rerank and self.reranker is not None):
+            return await self._search_candidates_async(query, limit, category, min_price, max_price, mode)
+        
+        candidates = await self._search_candidates_async(
+            query, max(limit, rerank_candidates), category, min_price, max_price, mode
+        )
+        # The budget includes time spent waiting for an encode worker
+        products, _ = await self.executor.run_encode(
+            self.reranker.rerank, query, candidates, self._rerank_text, limit, rerank_budget_ms, time.perf_counter()
+        )
+        return products
+    
+    async def _search_candidates_async(
+        self,
+        query: str,
+        limit: int,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        mode: str
+    ) -> List[Product]:
+        """Non-blocking variant of _search_candidates()"""
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; choose one of {', '.join(self.SEARCH_MODES)}")
+        
+        if mode == "lexical":
+            return await self.executor.run_io(self.search_lexical, query, limit, category, min_price, max_price)
+        
+        query_embedding = await self.embedding_service.generate_embedding_async(query)
+        
+        if mode == "semantic":
+            return await self.search_by_vector_async(query_embedding, limit, category, min_price, max_price)
+        
+        candidates = limit * self.hybrid_candidate_factor
+        semantic, lexical = await asyncio.gather(
+            self.search_by_vector_async(query_embedding, candidates, category, min_price, max_price),
+            self.executor.run_io(self.search_lexical, query, candidates, category, min_price, max_price)
+        )
+        return self.fuse_results(semantic, lexical, limit)
+    
+    async def search_by_vector_async(
+        self,
+        vector: List[float],
+        limit: int = 10,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Product]:
+        """Non-blocking variant of search_by_vector()"""
+        return await self.executor.run_io(
+            self.search_by_vector, vector, limit, category, min_price, max_price
+        )
+    
+    def search_by_vectors(
+        self,
+        vectors: np.ndarray,
+        limit: int = 10,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[List[Product]]:
+        """
+        Search for products with many precomputed query embeddings at once
+        
+        Args:
+            vectors: Query embedding matrix, one row per query
+            limit: Maximum number of results per query
+            category: Optional category filter
+            min_price: Optional minimum price filter
+            max_price: Optional maximum price filter
+            
+        Returns:
+            One list of matching products per query, in input order
+        """
+        results = self.index.query_batch(
+            vectors,
+            top_k=limit,
+            include_metadata=True,
+            filter=self.build_filter(category, min_price, max_price)
+        )
+        
+        return [[self.match_to_product(match) for match in result['matches']] for result in results]
+    
+    @staticmethod
+    def build_filter(
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Build vector store filter conditions (Pinecone syntax)
+        
+        Returns:
+            Filter dictionary, or None when no filter applies
+        """
         filter_dict = {}
         if category:
             filter_dict["category"] = {"$eq": category}
@@ -144,73 +443,66 @@ class SearchService:
             filter_dict["price"] = filter_dict.get("price", {})
             filter_dict["price"]["$lte"] = max_price
         
-        # Perform search
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=limit,
-            include_metadata=True,
-            filter=filter_dict if filter_dict else None
-        )
-        
-        # Parse results
-        products = []
-        for match in results['matches']:
-            metadata = match['metadata']
-            product_data = {
-                "id": match['id'],
-                "name": metadata['name'],
-                "description": metadata['description'],
-                "category": metadata['category'],
-                "price": metadata['price'],
-                "rating": metadata.get('rating', 0),
-                "image": metadata.get('image', ''),
-                "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
-            }
-            products.append(Product(**product_data))
+        return filter_dict if filter_dict else None
+    
+    @staticmethod
+    def match_to_product(match: Dict[str, Any], product_id: Optional[str] = None) -> Product:
+        """
+        Convert a vector store match (or fetched vector) into a Product
         
-        return products
+        Args:
+            match: Match or fetched vector with 'metadata'
+            product_id: Product ID, when the record has no 'id' key
+            
+        Returns:
+            Product object
+        """
+        metadata = match['metadata']
+        product_data = {
+            "id": product_id or match['id'],
+            "name": metadata['name'],
+            "description": metadata['description'],
+            "category": metadata['category'],
+            "price": metadata['price'],
+            "rating": metadata.get('rating', 0),
+            "image": metadata.get('image', ''),
+            "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
+        }
+        return Product(**product_data)
     
     def get_all_products(self) -> List[Product]:
         """
         Get all indexed products
         
         Returns:
-            List of all Product objects
+            List of all Product objects, ordered by ID
         """
-        # Pinecone doesn't support fetching all vectors easily
-        # We'll use a dummy query to get products
-        stats = self.index.describe_index_stats()
-        total = stats['total_vector_count']
-        
-        if total == 0:
-            return []
-        
-        # Query with a zero vector to get random samples (or all if small dataset)
-        embedding_dim = self.embedding_service.get_model_info()["embedding_dimension"]
-        dummy_vector = [0.0] * embedding_dim
-        
-        results = self.index.query(
-            vector=dummy_vector,
-            top_k=min(total, 10000),  # Limit to reasonable number
-            include_metadata=True
-        )
-        
-        products = []
-        for match in results['matches']:
-            metadata = match['metadata']
-            product_data = {
-                "id": match['id'],
-                "name": metadata['name'],
-                "description": metadata['description'],
-                "category": metadata['category'],
-                "price": metadata['price'],
-                "rating": metadata.get('rating', 0),
-                "image": metadata.get('image', ''),
-                "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
-            }
-            products.append(Product(**product_data))
+        return [Product(**p) for page in self.catalog.iter_pages() for p in page]
+    
+    def list_products(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        sort: str = "id",
+        descending: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of the product catalog
         
-        return products
+        Args:
+            limit: Page size
+            cursor: Cursor returned with the previous page
+            offset: Products to skip when no cursor is given
+            sort: Sort field ('id', 'name', 'price' or 'rating')
+            descending: Sort in descending order
+            fields: Fields to include in each product (all if omitted)
+            
+        Returns:
+            Tuple of (product dictionaries, next page cursor or None)
+        """
+        return self.catalog.page(limit, cursor, offset, sort, descending, fields)
     
     def get_product_by_id(self, product_id: str) -> Optional[Product]:
         """
@@ -222,25 +514,47 @@ class SearchService:
         Returns:
             Product object or None if not found
         """
-        try:
-            results = self.index.fetch(ids=[product_id])
-            if product_id in results['vectors']:
-                metadata = results['vectors'][product_id]['metadata']
-                product_data = {
-                    "id": product_id,
-                    "name": metadata['name'],
-                    "description": metadata['description'],
-                    "category": metadata['category'],
-                    "price": metadata['price'],
-                    "rating": metadata.get('rating', 0),
-                    "image": metadata.get('image', ''),
-                    "tags": metadata.get('tags', '').split(',') if metadata.get('tags') else []
-                }
-                return Product(**product_data)
-        except Exception as e:
-            print(f"Error retrieving product {product_id}: {e}")
-        
-        return None
+        products = self.get_products_by_ids([product_id])
+        return products[0] if products else None
+    
+    def get_products_by_ids(self, product_ids: List[str]) -> List[Product]:
+        """
+        Get several products by ID
+        
+        Products are served from the in-memory catalog; only IDs missing
+        from it are fetched from the vector store, in a single call. Those
+        hits are built from vector metadata (truncated descriptions, possibly
+        deleted products), so they are returned but never written to the
+        catalog, which only index_products() fills from the source data.
+        
+        Args:
+            product_ids: Product IDs to retrieve
+            
+        Returns:
+            Found products in request order (unknown IDs are skipped)
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        found = {}
+        misses = []
+        for product_id in product_ids:
+            product = self.catalog.get(product_id)
+            if product is not None:
+                found[product_id] = Product(**product)
+            else:
+                misses.append(product_id)
+        
+        if misses:
+            try:
+                results = self.index.fetch(ids=misses)
+                fetched = [
+                    self.match_to_product(record, product_id)
+                    for product_id, record in results['vectors'].items()
+                ]
+                found.update((p.id, p) for p in fetched)
+            except Exception as e:
+                print(f"Error retrieving products {misses}: {e}")
+        
+        return [found[product_id] for product_id in product_ids if product_id in found]
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -253,5 +567,7 @@ class SearchService:
         return {
             "total_products": stats['total_vector_count'],
             "index_name": self.index_name,
+            "vector_store": self.index.backend,
+            "lexical_index": self.lexical.get_stats(),
             "embedding_model": self.embedding_service.model_name
         }
@@ -0,0 +1,217 @@
+"""Precomputed top-N similar-product table"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import os
+
+
+class SimilarityTable:
+    """
+    Array-backed table of each product's top-N most similar products
+    
+    Neighbours are stored as int32 row indices with float16 scores, so a
+    lookup is a dictionary access and an array slice. The table remembers
+    the content hash each row was built from; update() recomputes only what
+    changed:
+        - rows of new or changed products
+        - rows whose neighbour lists referenced a changed or removed product
+        - every other row is merged with scores against the changed products
+    """
+    
+    def __init__(self, neighbours: Optional[int] = None, path: Optional[str] = None):
+        """
+        Initialize similarity table
+        
+        Args:
+            neighbours: Neighbours kept per product (SIMILARITY_TABLE_NEIGHBOURS, default 20)
+            path: .npz file the table is loaded from and saved to
+        """
+        self.neighbours = neighbours if neighbours is not None else int(os.getenv("SIMILARITY_TABLE_NEIGHBOURS", "20"))
+        self.path = path
+        self.ids: List[str] = []
+        self.hashes: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.indices = np.empty((0, self.neighbours), dtype=np.int32)
+        self.scores = np.empty((0, self.neighbours), dtype=np.float16)
+        
+        if path and os.path.exists(path):
+            self.load(path)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def _top_rows(self, rows: np.ndarray, matrix: np.ndarray, block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-N neighbours of the given rows, computed in blocks"""
+        n = min(self.neighbours, max(len(matrix) - 1, 0))
+        indices = np.full((len(rows), self.neighbours), -1, dtype=np.int32)
+        scores = np.full((len(rows), self.neighbours), -np.inf, dtype=np.float32)
+        if n == 0:
+            return indices, scores
+        
+        for start in range(0, len(rows), block_size):
+            block_rows = rows[start:start + block_size]
+            block = matrix[block_rows] @ matrix.T
+            block[np.arange(len(block_rows)), block_rows] = -np.inf  # exclude self
+            top = np.argpartition(-block, n - 1, axis=1)[:, :n]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            indices[start:start + len(block_rows), :n] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(block_rows), :n] = np.take_along_axis(top_scores, order, axis=1)
+        return indices, scores
+    
+    def build(self, ids: List[str], matrix: np.ndarray, hashes: List[str]) -> None:
+        """
+        Compute the full table with blocked matrix multiplication
+        
+        Args:
+            ids: Product IDs in row order
+            matrix: Product embeddings, one row per ID
+            hashes: Content hash per product
+        """
+        matrix = self._normalize(matrix)
+        indices, scores = self._top_rows(np.arange(len(ids)), matrix)
+        self.ids = list(ids)
+        self.hashes = list(hashes)
+        self.rows = {product_id: row for row, product_id in enumerate(self.ids)}
+        self.indices = indices
+        self.scores = scores.astype(np.float16)
+    
+    def diff(self, hashes: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Compare the table against current product hashes
+        
+        Returns:
+            Tuple of (new or changed IDs, removed IDs)
+        """
+        changed = [pid for pid, digest in hashes.items() if pid not in self.rows or self.hashes[self.rows[pid]] != digest]
+        removed = [pid for pid in self.ids if pid not in hashes]
+        return changed, removed
+    
+    def update(self, ids: List[str], matrix: np.ndarray, hashes: List[str]) -> Dict[str, int]:
+        """
+        Bring the table up to date with the current products
+        
+        Args:
+            ids: All current product IDs in row order
+            matrix: Current product embeddings, one row per ID
+            hashes: Current content hash per product
+            
+        Returns:
+            Dictionary with the number of changed, removed and recomputed rows
+        """
+        changed, removed = self.diff(dict(zip(ids, hashes)))
+        if not self.ids or len(changed) + len(removed) > len(ids) // 2:
+            self.build(ids, matrix, hashes)
+            return {"changed": len(changed), "removed": len(removed), "recomputed": len(ids)}
+        if not changed and not removed:
+            return {"changed": 0, "removed": 0, "recomputed": 0}
+        
+        matrix = self._normalize(matrix)
+        new_rows = {product_id: row for row, product_id in enumerate(ids)}
+        changed_set = set(changed)
+        
+        # Map old neighbour indices to new rows; changed or removed products become -1
+        remap = np.array([
+            -1 if (pid not in new_rows or pid in changed_set) else new_rows[pid]
+            for pid in self.ids
+        ] + [-1], dtype=np.int32)
+        
+        indices = np.full((len(ids), self.neighbours), -1, dtype=np.int32)
+        scores = np.full((len(ids), self.neighbours), -np.inf, dtype=np.float32)
+        
+        kept_old = [(new_rows[pid], self.rows[pid]) for pid in ids if pid in self.rows and pid not in changed_set]
+        new_kept = np.array([new for new, _ in kept_old], dtype=np.int64)
+        old_kept = np.array([old for _, old in kept_old], dtype=np.int64)
+        
+        old_indices = self.indices[old_kept]
+        mapped = remap[np.where(old_indices < 0, len(self.ids), old_indices)]
+        
+        # Rows that lost a neighbour must be recomputed; the rest stay valid
+        lost = ((mapped < 0) & (old_indices >= 0)).any(axis=1)
+        intact_new = new_kept[~lost]
+        indices[intact_new] = mapped[~lost]
+        scores[intact_new] = self.scores[old_kept[~lost]].astype(np.float32)
+        
+        recompute = np.concatenate([
+            np.array([new_rows[pid] for pid in changed], dtype=np.int64),
+            new_kept[lost]
+        ])
+        if len(recompute):
+            indices[recompute], scores[recompute] = self._top_rows(recompute, matrix)
+        
+        # Merge scores against changed products into intact rows
+        changed_rows = np.array([new_rows[pid] for pid in changed], dtype=np.int64)
+        if len(changed_rows) and len(intact_new):
+            candidate_scores = matrix[intact_new] @ matrix[changed_rows].T
+            candidate_scores[intact_new[:, None] == changed_rows[None, :]] = -np.inf
+            merged_indices = np.concatenate([indices[intact_new], np.broadcast_to(changed_rows, candidate_scores.shape).astype(np.int32)], axis=1)
+            merged_scores = np.concatenate([scores[intact_new], candidate_scores], axis=1)
+            order = np.argsort(-merged_scores, axis=1)[:, :self.neighbours]
+            indices[intact_new] = np.take_along_axis(merged_indices, order, axis=1)
+            scores[intact_new] = np.take_along_axis(merged_scores, order, axis=1)
+        
+        self.ids = list(ids)
+        self.hashes = list(hashes)
+        self.rows = new_rows
+        self.indices = indices
+        self.scores = scores.astype(np.float16)
+        return {"changed": len(changed), "removed": len(removed), "recomputed": int(len(recompute))}
+    
+    def lookup(self, product_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Get precomputed neighbours of a product
+        
+        Returns:
+            List of (product ID, score), or None if the product is unknown or
+            more neighbours are requested than the table holds
+        """
+        row = self.rows.get(product_id)
+        if row is None or limit > self.neighbours:
+            return None
+        
+        neighbours = []
+        for index, score in zip(self.indices[row, :limit], self.scores[row, :limit]):
+            if index < 0:
+                break
+            neighbours.append((self.ids[index], float(score)))
+        return neighbours
+    
+    def save(self, path: Optional[str] = None) -> None:
+        """Save the table to an .npz file"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            path,
+            ids=np.array(self.ids),
+            hashes=np.array(self.hashes),
+            indices=self.indices,
+            scores=self.scores
+        )
+    
+    def load(self, path: str) -> None:
+        """Load a table written by save()"""
+        with np.load(path) as data:
+            if data["indices"].shape[1] != self.neighbours:
+                return
+            self.ids = [str(pid) for pid in data["ids"]]
+            self.hashes = [str(digest) for digest in data["hashes"]]
+            self.indices = data["indices"]
+            self.scores = data["scores"]
+        self.rows = {product_id: row for row, product_id in enumerate(self.ids)}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get table statistics"""
+        return {
+            "products": len(self.ids),
+            "neighbours": self.neighbours,
+            "bytes": int(self.indices.nbytes + self.scores.nbytes)
+        }
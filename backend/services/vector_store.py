@@ -0,0 +1,826 @@
+"""Vector store backends: remote Pinecone index or in-process NumPy index"""
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+from services.ann_index import IVFIndex, recall_at_k
+from services.embedding_store import MmapEmbeddingStore
+from services.metadata_columns import MetadataColumns
+from services.quantization import create_quantizer
+import json
+import numpy as np
+import os
+import threading
+
+
+class VectorStore(ABC):
+    """
+    Common interface for vector stores
+    
+    Results follow Pinecone's response shapes so services can treat every
+    backend the same way:
+        query() -> {"matches": [{"id", "score", "metadata", "values"}]}
+        fetch() -> {"vectors": {id: {"id", "values", "metadata"}}}
+        describe_index_stats() -> {"total_vector_count", "dimension"}
+    """
+    
+    backend = "base"
+    
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]]) -> None:
+        """Insert or replace vectors given as {"id", "values", "metadata"} records"""
+    
+    @abstractmethod
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Return the top_k most similar vectors"""
+    
+    def query_batch(
+        self,
+        vectors: np.ndarray,
+        top_k: int = 10,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run several queries; returns one query() result per vector"""
+        return [
+            self.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=include_metadata,
+                include_values=include_values,
+                filter=filter
+            )
+            for vector in vectors
+        ]
+    
+    @abstractmethod
+    def fetch(self, ids: List[str]) -> Dict[str, Any]:
+        """Fetch stored vectors by ID"""
+    
+    def fetch_matrix(self, ids: List[str], batch_size: int = 1000) -> Tuple[List[str], np.ndarray]:
+        """
+        Fetch stored vectors as a float32 matrix
+        
+        IDs missing from the store (e.g. not yet visible after an upsert to
+        an eventually consistent index) are skipped.
+        
+        Returns:
+            Tuple of (IDs found, in the order of ids; matrix with one row per found ID)
+        """
+        found = []
+        rows = []
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            vectors = self.fetch(ids=batch)["vectors"]
+            for vector_id in batch:
+                if vector_id in vectors:
+                    found.append(vector_id)
+                    rows.append(vectors[vector_id]["values"])
+        return found, np.asarray(rows, dtype=np.float32)
+    
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by ID"""
+    
+    @abstractmethod
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Return index statistics"""
+    
+    def quantization_report(self) -> Optional[Dict[str, Any]]:
+        """Memory saved and recall lost by vector quantization, if enabled"""
+        return None
+    
+    def persist(self) -> None:
+        """Flush in-process state to durable storage (no-op for remote backends)"""
+
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a remote Pinecone serverless index"""
+    
+    backend = "pinecone"
+    
+    def __init__(self, index_name: str, dimension: int):
+        """
+        Connect to a Pinecone index, creating it if needed
+        
+        Args:
+            index_name: Name of the Pinecone index
+            dimension: Embedding dimension
+        """
+        from pinecone import Pinecone, ServerlessSpec
+        
+        # Initialize Pinecone client
+        api_key = os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable is required")
+        
+        self.pc = Pinecone(api_key=api_key)
+        self.index_name = index_name
+        
+        # Create index if it doesn't exist
+        if index_name not in self.pc.list_indexes().names():
+            self.pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1")
+            )
+        
+        # Connect to index
+        self.index = self.pc.Index(index_name)
+        
+        # Wait for index to be ready
+        import time
+        time.sleep(1)
+    
+    def upsert(self, vectors: List[Dict[str, Any]]) -> None:
+        # Pinecone's client expects plain lists
+        records = []
+        for record in vectors:
+            values = record["values"]
+            if isinstance(values, np.ndarray):
+                record = {**record, "values": values.tolist()}
+            records.append(record)
+        self.index.upsert(vectors=records)
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        # Rows of encode_matrix() and query_batch() arrive as ndarrays
+        if isinstance(vector, np.ndarray):
+            vector = vector.tolist()
+        return self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_metadata=include_metadata,
+            include_values=include_values,
+            filter=filter
+        )
+    
+    def fetch(self, ids: List[str]) -> Dict[str, Any]:
+        return self.index.fetch(ids=ids)
+    
+    def delete(self, ids: List[str]) -> None:
+        self.index.delete(ids=ids)
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        return self.index.describe_index_stats()
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store holding a contiguous float32 matrix
+    
+    Vectors are L2-normalized on insert so cosine similarity is a single
+    matrix-vector product. Top-k selection uses argpartition. Also serves
+    as an offline stand-in for Pinecone in tests.
+    
+    With index_type='ivf' queries scan only the IVF lists nearest to the
+    query once the index holds enough vectors to train the quantizer.
+    
+    A persisted index is opened memory-mapped and searched in place; the
+    matrix is copied into private memory only when it is first modified.
+    
+    With quantization enabled, candidates are scored against compact int8
+    or PQ codes and the best rerank_factor * top_k of them are re-scored
+    exactly against the full-precision matrix.
+    
+    Filters are evaluated on columnar copies of the filtered metadata fields
+    (category bitmaps, sorted numeric arrays) before any vector is scored.
+    A selective filter is answered by exact search over the matching rows;
+    a broad one goes through the IVF index with the filter applied to its
+    candidates.
+    """
+    
+    backend = "local"
+    
+    def __init__(
+        self,
+        index_name: str,
+        dimension: int,
+        initial_capacity: int = 1024,
+        index_type: Optional[str] = None,
+        data_dir: Optional[str] = None,
+        mmap: Optional[bool] = None,
+        quantization: Optional[str] = None,
+        rerank_factor: Optional[int] = None
+    ):
+        """
+        Initialize an empty local index
+        
+        Args:
+            index_name: Name of the index
+            dimension: Embedding dimension
+            initial_capacity: Number of rows preallocated before the matrix grows
+            index_type: 'flat' (exact) or 'ivf' (approximate)
+                        (defaults to LOCAL_INDEX_TYPE or 'flat')
+            data_dir: Directory the index is loaded from and persisted to
+                      (defaults to LOCAL_INDEX_DIR; unset keeps it in memory only)
+            mmap: Map a persisted matrix read-only instead of loading it
+                  (defaults to LOCAL_INDEX_MMAP or true)
+            quantization: 'none', 'int8' or 'pq' (defaults to VECTOR_QUANTIZATION or 'none')
+            rerank_factor: Candidates re-scored exactly per requested result
+                           (QUANTIZATION_RERANK_FACTOR, default 4; 0 disables re-ranking)
+        """
+        self.index_name = index_name
+        self.dimension = dimension
+        self._matrix = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._count = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        self._columns = MetadataColumns()
+        self._filter_plans = {"filtered_exact": 0, "filtered_ann": 0}
+        self._lock = threading.RLock()
+        self._mapped = False
+        self.mmap = mmap if mmap is not None else os.getenv("LOCAL_INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+        
+        index_type = (index_type or os.getenv("LOCAL_INDEX_TYPE", "flat")).lower()
+        if index_type not in ("flat", "ivf"):
+            raise ValueError(f"Unknown local index type: {index_type}")
+        self.ann = IVFIndex(dimension) if index_type == "ivf" else None
+        self._trained_on = 0
+        
+        self.quantizer = create_quantizer(quantization, dimension)
+        self.rerank_factor = rerank_factor if rerank_factor is not None else int(os.getenv("QUANTIZATION_RERANK_FACTOR", "4"))
+        self._codes: Optional[np.ndarray] = None
+        self._quantized_on = 0
+        
+        self.data_dir = data_dir or os.getenv("LOCAL_INDEX_DIR")
+        if self.data_dir and self.load(self.data_dir):
+            print(f"✓ Loaded local index '{index_name}' with {self._count} vectors")
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def _reserve(self, rows: int) -> None:
+        """Grow the matrix so it can hold at least `rows` vectors"""
+        capacity = self._matrix.shape[0]
+        if rows <= capacity and not self._mapped:
+            return
+        capacity = max(capacity, 1)
+        while capacity < rows:
+            capacity *= 2
+        
+        # Also copies a read-only mapped matrix into private float32 memory
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:self._count] = self._matrix[:self._count]
+        self._matrix = grown
+        self._mapped = False
+        self._columns.reserve(capacity)
+        
+        if self._codes is not None and self._codes.shape[0] < capacity:
+            codes = np.zeros((capacity, self._codes.shape[1]), dtype=np.uint8)
+            codes[:self._count] = self._codes[:self._count]
+            self._codes = codes
+    
+    def _scores(self, query: np.ndarray, candidates: Optional[np.ndarray] = None, block_size: int = 65536) -> np.ndarray:
+        """
+        Cosine scores of the query against all rows or the given candidate rows
+        
+        float16 matrices are upcast block by block so no full float32 copy is made.
+        """
+        matrix = self._matrix[:self._count] if candidates is None else self._matrix[candidates]
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), block_size):
+            scores[start:start + block_size] = matrix[start:start + block_size].astype(np.float32) @ query
+        return scores
+    
+    def upsert(self, vectors: List[Dict[str, Any]]) -> None:
+        if not vectors:
+            return
+        
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        if values.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {values.shape[1]} does not match index dimension {self.dimension}")
+        values = self._normalize(values)
+        
+        with self._lock:
+            self._reserve(self._count + len(vectors))
+            rows = np.empty(len(vectors), dtype=np.int64)
+            for i, (record, value) in enumerate(zip(vectors, values)):
+                row = self._rows.get(record["id"])
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._ids.append(record["id"])
+                    self._metadata.append({})
+                    self._rows[record["id"]] = row
+                self._matrix[row] = value
+                self._metadata[row] = dict(record.get("metadata") or {})
+                self._columns.set(row, self._metadata[row])
+                rows[i] = row
+            
+            if self.ann is not None:
+                self._update_ann(rows, values)
+            if self.quantizer is not None:
+                self._update_codes(rows, values)
+    
+    def _update_ann(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Add rows to the IVF index, (re)training it once enough vectors exist"""
+        min_train = self.ann.nlist * 4
+        if self._count >= min_train and (not self.ann.is_trained or self._count >= self._trained_on * 4):
+            self.retrain()
+        else:
+            self.ann.add(rows, values)
+    
+    def _update_codes(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Encode rows with the quantizer, (re)training it once enough vectors exist"""
+        min_train = 1024
+        if self._count >= min_train and (not self.quantizer.is_trained or self._count >= self._quantized_on * 4):
+            self.retrain_quantizer()
+        elif self.quantizer.is_trained:
+            self._codes[rows] = self.quantizer.encode(values)
+    
+    def retrain_quantizer(self) -> None:
+        """Retrain the vector quantizer on all stored vectors and re-encode every row"""
+        with self._lock:
+            if self.quantizer is None or self._count == 0:
+                return
+            matrix = np.asarray(self._matrix[:self._count], dtype=np.float32)
+            self.quantizer.train(matrix)
+            self._codes = np.zeros((max(self._matrix.shape[0], self._count), self.quantizer.code_size), dtype=np.uint8)
+            self._codes[:self._count] = self.quantizer.encode(matrix)
+            self._quantized_on = self._count
+    
+    @property
+    def _quantized(self) -> bool:
+        return self.quantizer is not None and self.quantizer.is_trained and self._codes is not None
+    
+    def retrain(self) -> None:
+        """Retrain the IVF quantizer on all stored vectors and reassign every row"""
+        with self._lock:
+            if self.ann is None or self._count == 0:
+                return
+            matrix = np.asarray(self._matrix[:self._count], dtype=np.float32)
+            self.ann.train(matrix)
+            self.ann.add(np.arange(self._count, dtype=np.int64), matrix)
+            self._trained_on = self._count
+    
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            if self._mapped and any(vector_id in self._rows for vector_id in ids):
+                self._reserve(self._count)
+            for vector_id in ids:
+                row = self._rows.pop(vector_id, None)
+                if row is None:
+                    continue
+                if self.ann is not None:
+                    self.ann.remove(row)
+                
+                # Move the last row into the hole to keep the matrix contiguous
+                last = self._count - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved_id
+                    self._metadata[row] = self._metadata[last]
+                    self._rows[moved_id] = row
+                    self._columns.move(last, row)
+                    if self.ann is not None:
+                        self.ann.move(last, row)
+                    if self._quantized:
+                        self._codes[row] = self._codes[last]
+                
+                self._ids.pop()
+                self._metadata.pop()
+                self._columns.remove()
+                self._count -= 1
+    
+    @staticmethod
+    def _matches_condition(value: Any, condition: Any) -> bool:
+        """Evaluate a Pinecone-style condition against a metadata value"""
+        if not isinstance(condition, dict):
+            return value == condition
+        
+        for op, operand in condition.items():
+            if op == "$eq" and not value == operand:
+                return False
+            if op == "$ne" and not value != operand:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$nin" and value in operand:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > operand:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lt" and not value < operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+        return True
+    
+    def _filter_mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Boolean mask of rows whose metadata satisfies the filter
+        
+        Each field is answered by its metadata column, built on first use.
+        Conditions a column cannot answer (e.g. list values, string ranges)
+        are checked row by row, but only on rows the columns let through.
+        """
+        mask = np.ones(self._count, dtype=bool)
+        remaining = {}
+        for field, condition in filter.items():
+            column = self._columns.columns.get(field)
+            if column is None and field not in self._columns.unsupported:
+                column = self._columns.build(field, self._metadata, self._matrix.shape[0])
+            if column is None or (column.kind == "categorical" and not column.supports(condition)):
+                remaining[field] = condition
+                continue
+            mask &= column.mask(self._count, condition)
+        
+        if remaining:
+            for row in np.flatnonzero(mask):
+                metadata = self._metadata[row]
+                for field, condition in remaining.items():
+                    if not self._matches_condition(metadata.get(field), condition):
+                        mask[row] = False
+                        break
+        return mask
+    
+    def _match(self, row: int, score: float, include_metadata: bool, include_values: bool) -> Dict[str, Any]:
+        match = {"id": self._ids[row], "score": float(score)}
+        if include_metadata:
+            match["metadata"] = dict(self._metadata[row])
+        if include_values:
+            match["values"] = self._matrix[row].tolist()
+        return match
+    
+    def _search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        exact: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the top_k rows for a normalized query
+        
+        Returns:
+            Tuple of (row numbers, scores) sorted by descending score
+        """
+        mask = None
+        use_ann = self.ann is not None and self.ann.is_trained and not exact
+        if filter:
+            mask = self._filter_mask(filter)
+            selected = int(mask.sum())
+            if selected == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            if use_ann:
+                # Exact search over the matching rows is cheaper than probing
+                # the IVF lists when it scans fewer rows than they hold
+                probed = self._count * min(1.0, (nprobe or self.ann.nprobe) / self.ann.nlist)
+                use_ann = selected > probed
+                self._filter_plans["filtered_ann" if use_ann else "filtered_exact"] += 1
+        
+        candidates = None
+        if use_ann:
+            candidates = self.ann.candidates(query, nprobe)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            # Too few candidates in the probed lists: fall back to exact search
+            if len(candidates) < top_k:
+                candidates = None
+        
+        if candidates is None and mask is not None:
+            candidates = np.flatnonzero(mask)
+        
+        if self._quantized and not exact:
+            # Approximate scores from codes, then exact re-ranking of the best ones
+            codes = self._codes[:self._count] if candidates is None else self._codes[candidates]
+            approximate = self.quantizer.scores(query, codes)
+            shortlist_size = top_k * self.rerank_factor if self.rerank_factor > 0 else top_k
+            shortlist = self._top(approximate, shortlist_size)
+            rows = candidates[shortlist] if candidates is not None else shortlist
+            if self.rerank_factor <= 0:
+                return rows, approximate[shortlist]
+            candidates = rows
+        
+        scores = self._scores(query, candidates)
+        top = self._top(scores, top_k)
+        rows = candidates[top] if candidates is not None else top
+        return rows, scores[top]
+    
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k highest scores, sorted by descending score"""
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> Dict[str, Any]:
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        
+        with self._lock:
+            if self._count == 0 or top_k <= 0:
+                return {"matches": []}
+            
+            rows, scores = self._search(query, top_k, filter, nprobe)
+            return {
+                "matches": [
+                    self._match(row, score, include_metadata, include_values)
+                    for row, score in zip(rows, scores)
+                ]
+            }
+    
+    def query_batch(
+        self,
+        vectors: np.ndarray,
+        top_k: int = 10,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        block_size: int = 64
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several queries with one matrix multiply per block of queries
+        
+        Approximate modes (IVF, quantization) fall back to per-query search.
+        """
+        queries = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension))
+        
+        with self._lock:
+            if self._count == 0 or top_k <= 0:
+                return [{"matches": []} for _ in queries]
+            
+            if (self.ann is not None and self.ann.is_trained) or self._quantized:
+                ranked = [self._search(query, top_k, filter) for query in queries]
+            else:
+                candidates = np.flatnonzero(self._filter_mask(filter)) if filter else None
+                matrix = self._matrix[:self._count] if candidates is None else self._matrix[candidates]
+                # float16 stores are upcast once per batch rather than once per block
+                matrix = np.asarray(matrix, dtype=np.float32)
+                
+                ranked = []
+                for start in range(0, len(queries), block_size):
+                    scores = queries[start:start + block_size] @ matrix.T
+                    for row_scores in scores:
+                        top = self._top(row_scores, top_k)
+                        rows = candidates[top] if candidates is not None else top
+                        ranked.append((rows, row_scores[top]))
+            
+            return [
+                {
+                    "matches": [
+                        self._match(row, score, include_metadata, include_values)
+                        for row, score in zip(rows, scores)
+                    ]
+                }
+                for rows, scores in ranked
+            ]
+    
+    def recall_report(
+        self,
+        k: int = 10,
+        sample_size: int = 200,
+        nprobe_values: Optional[List[int]] = None,
+        seed: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Measure ANN recall@k against exact search
+        
+        Stored vectors are sampled as queries.
+        
+        Args:
+            k: Cut-off for recall@k
+            sample_size: Number of query vectors sampled from the index
+            nprobe_values: nprobe settings to evaluate (defaults to the configured one)
+            seed: Random seed for sampling
+            
+        Returns:
+            Dictionary with recall@k per nprobe value and a status: 'measured',
+            'not_applicable' (searches are exact, so recall is 1.0) or 'empty'
+        """
+        with self._lock:
+            ann_ready = self.ann is not None and self.ann.is_trained
+            if not (ann_ready or self._quantized):
+                return {
+                    "index": "flat", "quantization": "none", "k": k,
+                    "status": "not_applicable", "detail": "Searches are exact (recall 1.0)", "recall": {}
+                }
+            if self._count == 0:
+                return {"index": "flat", "k": k, "status": "empty", "detail": "Index holds no vectors", "recall": {}}
+            
+            rng = np.random.default_rng(seed)
+            sample = rng.choice(self._count, min(sample_size, self._count), replace=False)
+            queries = np.asarray(self._matrix[sample], dtype=np.float32)
+            
+            exact = [[self._ids[r] for r in self._search(q, k, exact=True)[0]] for q in queries]
+            recall = {}
+            default_nprobe = self.ann.nprobe if ann_ready else None
+            for nprobe in nprobe_values or [default_nprobe]:
+                approximate = [[self._ids[r] for r in self._search(q, k, nprobe=nprobe)[0]] for q in queries]
+                recall[nprobe] = round(recall_at_k(exact, approximate, k), 4)
+            
+            return {
+                "index": "ivf" if ann_ready else "flat",
+                "quantization": self.quantizer.kind if self._quantized else "none",
+                "k": k,
+                "status": "measured",
+                "queries": len(sample),
+                "recall": recall
+            }
+    
+    def quantization_report(self, k: int = 10, sample_size: int = 200) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._quantized:
+                return None
+            
+            full_bytes = self._count * self.dimension * 4
+            code_bytes = self._count * self.quantizer.code_size
+            recall = self.recall_report(k=k, sample_size=sample_size)["recall"]
+            return {
+                "quantization": self.quantizer.kind,
+                "vectors": self._count,
+                "float32_bytes": full_bytes,
+                "code_bytes": code_bytes,
+                "memory_saved_pct": round(100 * (1 - code_bytes / full_bytes), 1) if full_bytes else 0.0,
+                "rerank_factor": self.rerank_factor,
+                "recall_at_k": next(iter(recall.values()), None),
+                "k": k
+            }
+    
+    def fetch(self, ids: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            vectors = {}
+            for vector_id in ids:
+                row = self._rows.get(vector_id)
+                if row is not None:
+                    vectors[vector_id] = {
+                        "id": vector_id,
+                        "values": self._matrix[row].tolist(),
+                        "metadata": dict(self._metadata[row])
+                    }
+            return {"vectors": vectors}
+    
+    def fetch_matrix(self, ids: List[str], batch_size: int = 1000) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            found = [vector_id for vector_id in ids if vector_id in self._rows]
+            rows = np.fromiter((self._rows[vector_id] for vector_id in found), dtype=np.int64, count=len(found))
+            return found, np.asarray(self._matrix[rows], dtype=np.float32)
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "total_vector_count": self._count,
+                "dimension": self.dimension
+            }
+            stats["mmap"] = self._mapped
+            if self._quantized:
+                stats["quantization"] = {
+                    "type": self.quantizer.kind,
+                    "code_bytes": self._count * self.quantizer.code_size
+                }
+            if self.ann is not None:
+                stats["ann"] = self.ann.get_stats()
+            if self._columns.columns:
+                stats["filter_columns"] = self._columns.get_stats()
+            if self.ann is not None:
+                stats["filter_plans"] = dict(self._filter_plans)
+            return stats
+    
+    def persist(self) -> None:
+        if self.data_dir:
+            self.save(self.data_dir)
+    
+    def save(self, directory: str) -> None:
+        """
+        Save vectors, IDs, metadata and the IVF index to a directory
+        
+        Vectors go to a memory-mappable embedding store; metadata is
+        written as JSON alongside it.
+        
+        Args:
+            directory: Target directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, self.index_name)
+        
+        with self._lock:
+            MmapEmbeddingStore(prefix).write(self._ids, self._matrix[:self._count])
+            with open(f"{prefix}.meta.json", "w") as f:
+                json.dump(self._metadata, f)
+            if self.ann is not None:
+                self.ann.save(f"{prefix}.ivf.npz")
+            if self._quantized:
+                np.savez(
+                    f"{prefix}.codes.npz",
+                    kind=np.array(self.quantizer.kind),
+                    codes=self._codes[:self._count],
+                    **self.quantizer.state()
+                )
+    
+    def load(self, directory: str) -> bool:
+        """
+        Load an index written by save()
+        
+        Args:
+            directory: Source directory
+            
+        Returns:
+            True if a saved index was found and loaded
+        """
+        prefix = os.path.join(directory, self.index_name)
+        store = MmapEmbeddingStore(prefix)
+        if not store.exists() or not os.path.exists(f"{prefix}.meta.json"):
+            return False
+        
+        ids, offsets, matrix = store.open(mmap=self.mmap)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Saved index dimension {matrix.shape[1]} does not match {self.dimension}")
+        with open(f"{prefix}.meta.json") as f:
+            metadata = json.load(f)
+        
+        with self._lock:
+            if self.mmap:
+                self._matrix = matrix
+                self._mapped = True
+            else:
+                self._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+                self._mapped = False
+            self._count = len(ids)
+            self._ids = ids
+            self._rows = offsets
+            self._metadata = metadata
+            self._columns.reset()
+            
+            if self.ann is not None:
+                if os.path.exists(f"{prefix}.ivf.npz"):
+                    self.ann.load(f"{prefix}.ivf.npz")
+                    self._trained_on = self._count if self.ann.is_trained else 0
+                else:
+                    self._update_ann(np.arange(self._count, dtype=np.int64), self._matrix[:self._count])
+            
+            if self.quantizer is not None:
+                self._load_codes(f"{prefix}.codes.npz")
+        return True
+    
+    def _load_codes(self, path: str) -> None:
+        """Load quantizer state and codes, or rebuild them if missing or stale"""
+        if os.path.exists(path):
+            with np.load(path) as data:
+                state = {name: data[name] for name in data.files}
+            if str(state.pop("kind")) == self.quantizer.kind and len(state["codes"]) == self._count:
+                codes = state.pop("codes")
+                self.quantizer.load_state(state)
+                self._codes = codes
+                self._quantized_on = self._count
+                return
+        
+        self._codes = None
+        self._quantized_on = 0
+        self._update_codes(np.arange(self._count, dtype=np.int64), self._matrix[:self._count])
+
+
+def create_vector_store(index_name: str, dimension: int, backend: Optional[str] = None) -> VectorStore:
+    """
+    Create the configured vector store
+    
+    Args:
+        index_name: Name of the index
+        dimension: Embedding dimension
+        backend: 'pinecone' or 'local' (defaults to VECTOR_STORE_BACKEND or 'pinecone')
+        
+    Returns:
+        VectorStore instance
+    """
+    backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "pinecone")).lower()
+    if backend == "pinecone":
+        return PineconeVectorStore(index_name, dimension)
+    if backend == "local":
+        return LocalVectorStore(index_name, dimension)
+    raise ValueError(f"Unknown vector store backend: {backend}")
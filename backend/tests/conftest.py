@@ -0,0 +1,88 @@
+"""Shared pytest setup and fixtures for the backend services"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashingModel:
+    """
+    Tiny deterministic stand-in for a SentenceTransformer
+    
+    Each word is hashed into one of `dimension` buckets, so texts sharing
+    words get similar L2-normalized vectors without downloading a model.
+    """
+    
+    max_seq_length = 256
+    tokenizer = None
+    
+    def __init__(self, model_name: str = "hashing", dimension: int = 32):
+        self.dimension = dimension
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+    
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            vector[sum(word.encode("utf-8")) % self.dimension] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs):
+        if isinstance(sentences, str):
+            return self._vector(sentences)
+        return np.stack([self._vector(text) for text in sentences]) if sentences else np.zeros((0, self.dimension), dtype=np.float32)
+
+
+@pytest.fixture
+def embedding_service(monkeypatch):
+    """EmbeddingService running the real service code over HashingModel"""
+    pytest.importorskip("sentence_transformers")
+    from services import embedding_service as module
+    
+    for name in ("EMBEDDING_CACHE_PATH", "EMBEDDING_BACKEND", "ENCODE_PROCESSES"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(module, "SentenceTransformer", HashingModel)
+    service = module.EmbeddingService("hashing")
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def local_index(monkeypatch, tmp_path):
+    """Point new vector stores and manifests at an in-memory local backend"""
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_INDEX_TYPE", "flat")
+    monkeypatch.setenv("VECTOR_QUANTIZATION", "none")
+    monkeypatch.setenv("INDEX_MANIFEST_DIR", str(tmp_path / "manifests"))
+    monkeypatch.delenv("LOCAL_INDEX_DIR", raising=False)
+    monkeypatch.delenv("RERANKER_MODEL", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def search_service(embedding_service, local_index):
+    from services.search_service import SearchService
+    
+    return SearchService(embedding_service, index_name="products")
+
+
+@pytest.fixture
+def client(monkeypatch, local_index):
+    """TestClient for the FastAPI app, started on the sample data"""
+    pytest.importorskip("sentence_transformers")
+    from fastapi.testclient import TestClient
+    from services import embedding_service as module
+    
+    for name in ("EMBEDDING_CACHE_PATH", "EMBEDDING_BACKEND", "ENCODE_PROCESSES"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(module, "SentenceTransformer", HashingModel)
+    import app
+    
+    with TestClient(app.app) as client:
+        yield client
@@ -0,0 +1,93 @@
+"""Tests for the semantic answer cache"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services import answer_cache as module
+from services.answer_cache import SemanticAnswerCache
+
+
+OPTIONS = (3, True, "semantic", False, None)
+
+
+def unit(*values):
+    vector = np.zeros(4, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+def store(cache, vector, answer, options=OPTIONS, **kwargs):
+    cache.put(vector, options, answer, [{"title": answer}], ["prod_001"], **kwargs)
+
+
+def test_paraphrase_above_threshold_hits():
+    cache = SemanticAnswerCache(4, max_entries=4, threshold=0.95, ttl_seconds=0)
+    store(cache, unit(1, 0), "rain gear")
+    store(cache, unit(0, 1), "returns")
+    
+    hit = cache.get(unit(1, 0.2) * 7, OPTIONS)
+    
+    assert hit["answer"] == "rain gear" and hit["product_ids"] == ["prod_001"]
+    assert hit["similarity"] == pytest.approx(float(unit(1, 0.2) @ unit(1, 0)))
+    assert cache.get(unit(1, 1), OPTIONS) is None
+    assert cache.get_stats()["hit_rate"] == 0.5
+
+
+def test_options_must_match():
+    cache = SemanticAnswerCache(4, max_entries=4, threshold=0.9, ttl_seconds=0)
+    store(cache, unit(1, 0), "three sources")
+    store(cache, unit(1, 0.1), "five sources", options=(5, True, "semantic", False, None))
+    
+    assert cache.get(unit(1, 0), (5, True, "semantic", False, None))["answer"] == "five sources"
+    assert cache.get(unit(1, 0), (3, False, "semantic", False, None)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(4, max_entries=2, threshold=0.99, ttl_seconds=0)
+    store(cache, unit(1), "first")
+    store(cache, unit(0, 1), "second")
+    cache.get(unit(1), OPTIONS)
+    
+    store(cache, unit(0, 0, 1), "third")
+    
+    assert cache.get(unit(0, 1), OPTIONS) is None
+    assert cache.get(unit(1), OPTIONS)["answer"] == "first"
+    assert cache.get(unit(0, 0, 1), OPTIONS)["answer"] == "third"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = SemanticAnswerCache(4, max_entries=2, threshold=0.9, ttl_seconds=60)
+    store(cache, unit(1), "stale")
+    
+    now[0] += 61
+    
+    assert cache.get(unit(1), OPTIONS) is None
+    stats = cache.get_stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0
+
+
+def test_invalidation_drops_entries_and_answers_from_older_generations():
+    cache = SemanticAnswerCache(4, max_entries=2, threshold=0.9, ttl_seconds=0)
+    store(cache, unit(1), "old")
+    generation = cache.generation
+    
+    cache.invalidate()
+    store(cache, unit(0, 1), "computed before the invalidation", generation=generation)
+    
+    assert cache.get(unit(1), OPTIONS) is None
+    assert cache.get(unit(0, 1), OPTIONS) is None
+    store(cache, unit(0, 1), "fresh", generation=cache.generation)
+    assert cache.get(unit(0, 1), OPTIONS)["answer"] == "fresh"
+
+
+def test_zero_size_disables_the_cache():
+    cache = SemanticAnswerCache(4, max_entries=0)
+    store(cache, unit(1), "ignored")
+    
+    assert cache.get(unit(1), OPTIONS) is None
+    assert cache.get_stats()["stores"] == 0
@@ -0,0 +1,111 @@
+"""Tests for the HTTP endpoints"""
+
+import json
+
+from pydantic.warnings import PydanticDeprecatedSince20
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_search_streams_one_line_per_query(client, recwarn):
+    response = client.post("/api/search/batch", json={"queries": ["rain jacket", "black shirt", "yoga"], "limit": 2})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = ndjson(response)
+    assert [line["query"] for line in lines] == ["rain jacket", "black shirt", "yoga"]
+    assert all(len(line["results"]) <= 2 and line["total"] == len(line["results"]) for line in lines)
+    assert not [w for w in recwarn if issubclass(w.category, PydanticDeprecatedSince20)]
+
+
+def test_batch_recommend_streams_one_line_per_request(client, recwarn):
+    response = client.post("/api/recommend/batch", json={
+        "product_ids": ["prod_001"], "queries": ["running gear"], "limit": 2
+    })
+    
+    assert response.status_code == 200
+    lines = ndjson(response)
+    assert len(lines) == 2
+    assert all("error" not in line for line in lines)
+    assert not [w for w in recwarn if issubclass(w.category, PydanticDeprecatedSince20)]
+
+
+def test_products_stream_honors_offset(client):
+    everything = client.get("/api/products", params={"sort": "price", "order": "desc"}).json()
+    skipped = client.get("/api/products", params={"sort": "price", "order": "desc", "offset": 4}).json()
+    page = client.get("/api/products", params={"sort": "price", "order": "desc", "offset": 4, "limit": 3}).json()
+    
+    assert len(everything) == 15
+    assert skipped == everything[4:]
+    assert page["items"] == everything[4:7]
+
+
+def test_products_rejects_cursor_for_another_sort_field(client):
+    page = client.get("/api/products", params={"sort": "name", "limit": 2}).json()
+    response = client.get("/api/products", params={"sort": "price", "limit": 2, "cursor": page["next_cursor"]})
+    assert response.status_code == 422
+
+
+def test_recall_report_on_flat_index_says_not_applicable(client):
+    report = client.get("/api/stats/recall").json()
+    assert report["status"] == "not_applicable"
+    assert report["index"] == "flat"
+
+
+def sse(response):
+    """Parse a Server-Sent Events body into (event, data) pairs"""
+    assert response.text.endswith("\n\n")
+    events = []
+    for frame in response.text.split("\n\n")[:-1]:
+        fields = dict(line.split(": ", 1) for line in frame.split("\n"))
+        assert set(fields) == {"event", "data"}
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_chat_stream_frames_events_in_order(client):
+    question = {"question": "How do I choose waterproof rain gear for hiking?", "include_products": True}
+    response = client.post("/api/chat/stream", json=question)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = sse(response)
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-2:] == ["products", "done"]
+    assert set(names[1:-2]) == {"answer"}
+    
+    answer = client.post("/api/chat", json=question).json()
+    assert "".join(data for name, data in events if name == "answer") == answer["answer"]
+    assert events[0][1] == answer["sources"]
+    assert [p["id"] for p in events[-2][1]] == [p["id"] for p in answer["related_products"]]
+    
+    # A cached answer streams the same sources, answer and products
+    cached = sse(client.post("/api/chat/stream", json=question))
+    assert cached[:-2] == events[:-2]
+    assert [p["id"] for p in cached[-2][1]] == [p["id"] for p in events[-2][1]]
+    assert cached[-1] == ("done", {})
+
+
+def test_chat_stream_without_products(client):
+    events = sse(client.post("/api/chat/stream", json={"question": "What is the return policy?", "include_products": False}))
+    
+    assert [name for name, _ in events if name != "answer"] == ["sources", "done"]
+
+
+def test_chat_stream_reports_errors_as_events(client, monkeypatch):
+    import app
+    from services.executor_service import ExecutorSaturatedError
+    
+    async def saturated(*args):
+        raise ExecutorSaturatedError("Encode queue is full")
+        yield
+    
+    monkeypatch.setattr(app.rag_service, "generate_answer_stream", saturated)
+    
+    response = client.post("/api/chat/stream", json={"question": "rain gear"})
+    
+    assert response.status_code == 200
+    assert sse(response) == [("error", {"status": 503, "detail": "Encode queue is full"})]
@@ -0,0 +1,76 @@
+"""Tests for the micro-batching query encoder"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.batching_encoder import MicroBatchEncoder
+from services.executor_service import ExecutorService
+
+
+class RecordingEncoder:
+    """Encodes a text as [len(text), index in its batch] and records batch sizes"""
+    
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+    
+    def encode_queries(self, texts, batch_size=32):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return np.asarray([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+@pytest.fixture
+def executor():
+    executor = ExecutorService(encode_workers=1, io_workers=1, max_queue=64)
+    yield executor
+    executor.shutdown()
+
+
+def encode_all(encoder, texts):
+    async def scenario():
+        return await asyncio.gather(*[encoder.encode(text) for text in texts])
+    return asyncio.run(scenario())
+
+
+def test_concurrent_queries_share_one_forward_pass(executor):
+    service = RecordingEncoder()
+    encoder = MicroBatchEncoder(service, executor, window_ms=50, max_batch_size=32)
+    
+    results = encode_all(encoder, ["a", "bb", "ccc"])
+    
+    assert service.batches == [["a", "bb", "ccc"]]
+    # Each caller gets its own row back
+    assert [result[0] for result in results] == [1, 2, 3]
+    assert encoder.get_stats()["largest_batch"] == 3
+
+
+def test_full_batch_flushes_without_waiting_for_the_window(executor):
+    service = RecordingEncoder()
+    encoder = MicroBatchEncoder(service, executor, window_ms=60_000, max_batch_size=2)
+    
+    results = encode_all(encoder, ["a", "bb", "ccc", "dddd"])
+    
+    assert service.batches == [["a", "bb"], ["ccc", "dddd"]]
+    assert [result[0] for result in results] == [1, 2, 3, 4]
+
+
+def test_zero_window_encodes_each_query_alone(executor):
+    service = RecordingEncoder()
+    encoder = MicroBatchEncoder(service, executor, window_ms=0)
+    
+    encode_all(encoder, ["a", "bb"])
+    assert sorted(map(len, service.batches)) == [1, 1]
+
+
+def test_encoding_errors_reach_every_caller(executor):
+    encoder = MicroBatchEncoder(RecordingEncoder(fail=True), executor, window_ms=20, max_batch_size=8)
+    
+    async def scenario():
+        return await asyncio.gather(encoder.encode("a"), encoder.encode("b"), return_exceptions=True)
+    
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
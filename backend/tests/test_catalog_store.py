@@ -0,0 +1,141 @@
+"""Tests for the in-memory product catalog"""
+
+import base64
+import json
+
+import pytest
+
+from data.sample_data import PRODUCTS
+from services.catalog_store import CatalogStore
+
+
+@pytest.fixture
+def catalog():
+    catalog = CatalogStore(name_match_cutoff=0.8)
+    catalog.replace_all(PRODUCTS)
+    return catalog
+
+
+def test_find_by_name_exact_ignores_case_and_whitespace(catalog):
+    assert catalog.find_by_name("  waterproof   RAIN jacket ") == "prod_001"
+
+
+def test_find_by_name_fuzzy_matches_typos(catalog):
+    assert catalog.find_by_name("Waterprof Hiking Bots") == "prod_002"
+    assert catalog.find_by_name("compact travel umbrela") == "prod_003"
+
+
+def test_find_by_name_rejects_distant_names(catalog):
+    assert catalog.find_by_name("espresso machine") is None
+    assert catalog.find_by_name("") is None
+
+
+def test_find_by_name_only_scores_trigram_candidates(catalog, monkeypatch):
+    scored = []
+    
+    def get_close_matches(word, possibilities, n, cutoff):
+        scored.extend(possibilities)
+        return []
+    
+    monkeypatch.setattr("services.catalog_store.difflib.get_close_matches", get_close_matches)
+    catalog.find_by_name("waterproof")
+    assert scored
+    assert len(scored) <= CatalogStore.NAME_CANDIDATES
+    assert all("water" in name for name in scored[:3])
+    
+    # A name sharing no trigram with any product is never fuzzy-scored
+    scored.clear()
+    catalog.find_by_name("qqq")
+    assert scored == []
+
+
+def test_name_index_follows_catalog_changes(catalog):
+    catalog.upsert([{**PRODUCTS[0], "name": "Storm Shell Jacket"}])
+    assert catalog.find_by_name("storm shell jacket") == "prod_001"
+    assert catalog.find_by_name("waterproof rain jacket") is None
+    
+    catalog.remove(["prod_001"])
+    assert catalog.find_by_name("storm shell jacket") is None
+
+
+def walk(catalog, sort, descending, limit=4):
+    seen, cursor = [], None
+    while True:
+        products, cursor = catalog.page(limit, cursor, sort=sort, descending=descending)
+        seen.extend(product["id"] for product in products)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort", CatalogStore.SORT_FIELDS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_cursor_pages_cover_catalog_once_in_order(catalog, sort, descending):
+    expected = [
+        product_id for _, product_id in
+        sorted((CatalogStore._sort_value(catalog.get(p["id"]), sort), p["id"]) for p in PRODUCTS)
+    ]
+    assert walk(catalog, sort, descending) == (expected[::-1] if descending else expected)
+
+
+def test_cursor_pages_stay_stable_across_inserts(catalog):
+    first, cursor = catalog.page(5, sort="price")
+    catalog.upsert([{**PRODUCTS[0], "id": "prod_000", "price": 1.0}])
+    second, _ = catalog.page(5, cursor, sort="price")
+    assert "prod_000" not in [p["id"] for p in first + second]
+    assert second[0]["price"] >= first[-1]["price"]
+
+
+def encode_raw(*payload):
+    return base64.urlsafe_b64encode(json.dumps(list(payload)).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    (encode_raw("price", False, "abc", "prod_001"), "price"),
+    (encode_raw("price", False, True, "prod_001"), "price"),
+    (encode_raw("name", False, 3.5, "prod_001"), "name"),
+    (encode_raw("id", False, "prod_001", None), "id"),
+    (encode_raw("price", True, 10.0, "prod_001"), "price"),
+    (encode_raw("rating", False, 4.0, "prod_001"), "price"),
+    ("not base64 !!", "id"),
+    (encode_raw("id", False), "id"),
+])
+def test_decode_cursor_rejects_malformed_or_foreign_cursors(catalog, cursor, sort):
+    with pytest.raises(ValueError):
+        catalog.page(5, cursor, sort=sort)
+
+
+def test_cursor_round_trip_accepts_integer_sort_values():
+    assert CatalogStore.decode_cursor(encode_raw("price", False, 80, "prod_001"), "price", False) == (80.0, "prod_001")
+
+
+def test_page_offset_and_projection(catalog):
+    products, cursor = catalog.page(3, offset=13, sort="id", fields=["price"])
+    assert [p["id"] for p in products] == ["prod_014", "prod_015"]
+    assert set(products[0]) == {"id", "price"}
+    assert cursor is None
+
+
+def test_iter_pages_honors_offset(catalog):
+    pages = list(catalog.iter_pages(page_size=4, sort="price", descending=True, offset=5))
+    ids = [p["id"] for page in pages for p in page]
+    assert ids == walk(catalog, "price", True)[5:]
+
+
+def test_top_rated_orders_by_rating_then_id(catalog):
+    catalog.upsert([
+        {**PRODUCTS[0], "id": "prod_100", "rating": 5.0},
+        {**PRODUCTS[0], "id": "prod_099", "rating": 5.0},
+    ])
+    outerwear = [p for page in catalog.iter_pages() for p in page if p["category"] == "Outerwear"]
+    expected = [p["id"] for p in sorted(outerwear, key=lambda p: (-p["rating"], p["id"]))]
+    
+    assert [p["id"] for p in catalog.top_rated("Outerwear", limit=10)] == expected
+    assert [p["id"] for p in catalog.top_rated("Outerwear", limit=2, offset=1)] == expected[1:3]
+    assert catalog.top_rated("Garden") == []
+
+
+def test_top_rated_follows_rating_changes(catalog):
+    leader = catalog.top_rated("Footwear", limit=1)[0]
+    other = next(p for p in PRODUCTS if p["category"] == "Footwear" and p["id"] != leader["id"])
+    catalog.upsert([{**other, "rating": 5.0}])
+    assert catalog.top_rated("Footwear", limit=1)[0]["id"] == other["id"]
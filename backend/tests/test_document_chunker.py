@@ -0,0 +1,80 @@
+"""Tests for token-aware document chunking"""
+
+import re
+
+import pytest
+
+from services.document_chunker import DocumentChunker
+
+
+class PieceTokenizer:
+    """Fast-tokenizer stand-in that splits every word into 3-character pieces"""
+    
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        offsets = []
+        for match in re.finditer(r"\S+", text):
+            offsets.extend(
+                (start, min(start + 3, match.end())) for start in range(match.start(), match.end(), 3)
+            )
+        return {"input_ids": list(range(len(offsets))), "offset_mapping": offsets}
+
+
+TEXT = " ".join(f"word{i:02d}" for i in range(20))
+
+
+def words(passage):
+    return passage.split()
+
+
+def test_word_windows_overlap_by_the_configured_amount():
+    chunks = list(DocumentChunker(chunk_tokens=8, overlap_tokens=3).split(TEXT))
+    
+    assert all(len(words(chunk)) <= 8 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert words(previous)[-3:] == words(current)[:3]
+    assert words(chunks[0])[0] == "word00" and words(chunks[-1])[-1] == "word19"
+
+
+def test_subword_windows_never_cut_a_word():
+    tokenizer = PieceTokenizer()
+    chunker = DocumentChunker(tokenizer, chunk_tokens=7, overlap_tokens=2)
+    chunks = list(chunker.split(TEXT))
+    
+    vocabulary = set(words(TEXT))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert set(words(chunk)) <= vocabulary
+        assert len(tokenizer(chunk)["offset_mapping"]) <= 7
+    assert set().union(*map(words, chunks)) == vocabulary
+
+
+def test_word_longer_than_a_chunk_is_kept_whole():
+    chunks = list(DocumentChunker(PieceTokenizer(), chunk_tokens=4, overlap_tokens=1).split("ab " + "x" * 30 + " cd"))
+    
+    assert "x" * 30 in chunks
+    assert chunks[0].startswith("ab") and chunks[-1].endswith("cd")
+
+
+def test_tokenizer_failure_falls_back_to_words():
+    def broken(*args, **kwargs):
+        raise RuntimeError("no offsets")
+    
+    assert list(DocumentChunker(broken, chunk_tokens=50, overlap_tokens=0).split(TEXT)) == [TEXT]
+
+
+def test_empty_text_and_invalid_overlap():
+    assert list(DocumentChunker(chunk_tokens=4, overlap_tokens=1).split("  \n ")) == []
+    with pytest.raises(ValueError):
+        DocumentChunker(chunk_tokens=4, overlap_tokens=4)
+
+
+def test_chunk_documents_numbers_chunks_per_document():
+    chunker = DocumentChunker(chunk_tokens=10, overlap_tokens=0)
+    docs = [{"id": "faq", "content": TEXT}, {"id": "returns", "content": "thirty day returns"}]
+    
+    records = list(chunker.chunk_documents(docs))
+    
+    assert [record["id"] for record in records] == ["faq#0", "faq#1", "returns#0"]
+    assert [record["chunk"] for record in records] == [0, 1, 0]
+    assert all(record["document"] is docs[record["parent_id"] == "returns"] for record in records)
+    assert " ".join(record["text"] for record in records[:2]) == TEXT
@@ -0,0 +1,64 @@
+"""Tests for the query embedding cache"""
+
+import time
+
+import numpy as np
+
+from services.embedding_cache import QueryEmbeddingCache
+
+
+def vector(value, dimension=8):
+    return [float(value)] * dimension
+
+
+def test_lookup_is_case_and_whitespace_insensitive():
+    cache = QueryEmbeddingCache("model", max_bytes=1 << 20, ttl_seconds=0)
+    cache.put("Rain  Jacket", vector(1))
+    
+    assert cache.get(" rain jacket ") == vector(1)
+    assert cache.get("rain jackets") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_evicts_least_recently_used_within_budget():
+    entry = QueryEmbeddingCache("model", max_bytes=1 << 20)._entry_size(("model", "q0"), np.zeros(8, dtype=np.float32))
+    cache = QueryEmbeddingCache("model", max_bytes=entry * 2, ttl_seconds=0)
+    cache.put("q0", vector(0))
+    cache.put("q1", vector(1))
+    cache.get("q0")
+    cache.put("q2", vector(2))
+    
+    assert cache.get("q1") is None
+    assert cache.get("q0") == vector(0)
+    assert cache.get("q2") == vector(2)
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = QueryEmbeddingCache("model", max_bytes=1 << 20, ttl_seconds=60)
+    cache.put("old", vector(1), created_at=time.time() - 120)
+    cache.put("new", vector(2))
+    
+    assert cache.get("old") is None
+    assert cache.get("new") == vector(2)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = QueryEmbeddingCache("model", max_bytes=0)
+    cache.put("q", vector(1))
+    assert cache.get("q") is None
+
+
+def test_save_and_load_round_trip_only_for_the_same_model(tmp_path):
+    path = str(tmp_path / "cache.npz")
+    cache = QueryEmbeddingCache("model@onnx-int8", max_bytes=1 << 20, ttl_seconds=60)
+    cache.put("kept", vector(1))
+    cache.put("expired", vector(2), created_at=time.time() - 120)
+    assert cache.save(path) == 1
+    
+    warmed = QueryEmbeddingCache("model@onnx-int8", max_bytes=1 << 20, ttl_seconds=60)
+    assert warmed.load(path) == 1
+    assert warmed.get("kept") == vector(1)
+    
+    assert QueryEmbeddingCache("model", max_bytes=1 << 20).load(path) == 0
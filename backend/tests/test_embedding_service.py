@@ -0,0 +1,59 @@
+"""Tests for length-bucketed bulk encoding"""
+
+import numpy as np
+
+
+def texts_of_lengths(word_counts):
+    return [" ".join(f"w{i}x{j}" for j in range(count)) for i, count in enumerate(word_counts)]
+
+
+def record_batches(service, monkeypatch):
+    batches = []
+    encode = service.model.encode
+    
+    def recording(sentences, **kwargs):
+        batches.append([len(text.split()) for text in sentences])
+        return encode(sentences, **kwargs)
+    
+    monkeypatch.setattr(service.model, "encode", recording)
+    return batches
+
+
+def test_rows_come_back_in_input_order(embedding_service):
+    texts = texts_of_lengths([30, 2, 17, 2, 9, 40, 1])
+    
+    embeddings = embedding_service.encode_matrix(texts, batch_size=3)
+    
+    assert embeddings.dtype == np.float32 and embeddings.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(embeddings, embedding_service.model.encode(texts))
+
+
+def test_batches_are_length_sorted_and_within_the_token_budget(embedding_service, monkeypatch):
+    embedding_service.token_budget = 64
+    batches = record_batches(embedding_service, monkeypatch)
+    
+    embedding_service.encode_matrix(texts_of_lengths([30, 2, 17, 2, 9, 40, 1, 3, 3, 100]), batch_size=4)
+    
+    assert [count for batch in batches for count in batch] == [1, 2, 2, 3, 3, 9, 17, 30, 40, 100]
+    for batch in batches:
+        assert len(batch) <= 4
+        # Word counts + 2 special tokens stand in for tokens without a tokenizer
+        assert len(batch) == 1 or len(batch) * (max(batch) + 2) <= 64
+
+
+def test_counters_report_padding_and_truncation(embedding_service, monkeypatch):
+    monkeypatch.setattr(embedding_service.model, "max_seq_length", 16, raising=False)
+    texts = texts_of_lengths([2, 30, 2, 20, 2, 2])
+    
+    embedding_service.encode_matrix(texts, batch_size=2)
+    
+    stats = embedding_service.get_encoding_stats()
+    assert stats["texts"] == 6 and stats["truncated"] == 2
+    assert stats["tokens"] == 4 * 4 + 2 * 16
+    assert stats["padded_tokens"] == 2 * 4 + 2 * 4 + 2 * 16
+    assert stats["unbucketed_padded_tokens"] == 2 * 16 + 2 * 16 + 2 * 4
+    assert stats["padding_waste"] < stats["unbucketed_padding_waste"]
+
+
+def test_empty_input(embedding_service):
+    assert embedding_service.encode_matrix([]).shape == (0, embedding_service.model.get_sentence_embedding_dimension())
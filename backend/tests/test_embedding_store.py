@@ -0,0 +1,58 @@
+"""Tests for the memory-mapped embedding store and local index persistence"""
+
+import numpy as np
+import pytest
+
+from services.embedding_store import MmapEmbeddingStore
+from services.vector_store import LocalVectorStore
+
+
+@pytest.mark.parametrize("dtype", MmapEmbeddingStore.SUPPORTED_DTYPES)
+def test_write_and_open_round_trip(tmp_path, dtype):
+    store = MmapEmbeddingStore(str(tmp_path / "nested" / "products"), dtype=dtype)
+    matrix = np.random.default_rng(0).standard_normal((5, 4)).astype(np.float32)
+    store.write(["a", "b", "c", "d", "e"], matrix)
+    
+    ids, offsets, mapped = store.open(mmap=True)
+    assert ids == ["a", "b", "c", "d", "e"]
+    assert offsets["d"] == 3
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    assert mapped.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(mapped, matrix, rtol=1e-3 if dtype == "float16" else 0, atol=1e-3 if dtype == "float16" else 0)
+
+
+def test_write_rejects_mismatched_ids(tmp_path):
+    with pytest.raises(ValueError):
+        MmapEmbeddingStore(str(tmp_path / "x")).write(["a"], np.zeros((2, 4), dtype=np.float32))
+
+
+def test_unknown_dtype_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        MmapEmbeddingStore(str(tmp_path / "x"), dtype="int4")
+
+
+def make_store(tmp_path, mmap=True):
+    return LocalVectorStore("products", 4, data_dir=str(tmp_path), mmap=mmap, index_type="flat", quantization="none")
+
+
+def test_local_index_reopens_mapped_and_copies_on_write(tmp_path):
+    store = make_store(tmp_path)
+    store.upsert([
+        {"id": f"p{i}", "values": np.eye(4, dtype=np.float32)[i], "metadata": {"category": "Gear", "price": float(i)}}
+        for i in range(4)
+    ])
+    store.persist()
+    
+    reopened = make_store(tmp_path)
+    assert reopened._mapped
+    assert reopened.query([0, 0, 1, 0], top_k=1, filter={"price": {"$gte": 2}})["matches"][0]["id"] == "p2"
+    
+    # Writes go to a private copy; the file changes only on persist()
+    reopened.upsert([{"id": "p4", "values": [1, 1, 0, 0], "metadata": {"category": "Gear", "price": 4.0}}])
+    reopened.delete(["p0"])
+    assert not reopened._mapped
+    assert make_store(tmp_path).describe_index_stats()["total_vector_count"] == 4
+    
+    reopened.persist()
+    ids = sorted(make_store(tmp_path, mmap=False).fetch(["p0", "p1", "p4"])["vectors"])
+    assert ids == ["p1", "p4"]
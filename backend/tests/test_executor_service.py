@@ -0,0 +1,91 @@
+"""Tests for the bounded executor pools"""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.executor_service import BoundedExecutor, ExecutorSaturatedError
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedExecutor("test", max_workers=1, max_queue=4)
+    yield pool
+    pool.shutdown()
+
+
+def test_run_returns_result_and_counts_completion(pool):
+    assert asyncio.run(pool.run(lambda a, b: a + b, 2, b=3)) == 5
+    stats = pool.get_stats()
+    assert (stats["active"], stats["queued"], stats["completed"]) == (0, 0, 1)
+
+
+def test_exception_releases_the_slot(pool):
+    def fail():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(fail))
+    assert pool.get_stats()["queued"] == 0
+    assert asyncio.run(pool.run(lambda: "ok")) == "ok"
+
+
+def test_rejects_when_queue_is_full(pool):
+    release = threading.Event()
+    
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError):
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.gather(*running)
+    
+    asyncio.run(scenario())
+    stats = pool.get_stats()
+    assert (stats["queued"], stats["completed"], stats["rejected"]) == (0, 4, 1)
+
+
+def test_cancelled_queued_calls_release_their_slots(pool):
+    release = threading.Event()
+    
+    async def scenario():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        queued = [asyncio.ensure_future(pool.run(lambda: "late")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.get_stats()["queued"] == 3
+        
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        release.set()
+        await blocker
+        
+        # All four slots are free again
+        return await asyncio.gather(*[pool.run(lambda: "ok") for _ in range(4)])
+    
+    assert asyncio.run(scenario()) == ["ok"] * 4
+    stats = pool.get_stats()
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (0, 0, 0)
+
+
+def test_cancelling_a_running_call_keeps_counters_consistent(pool):
+    started, release = threading.Event(), threading.Event()
+    
+    def work():
+        started.set()
+        release.wait()
+    
+    async def scenario():
+        task = asyncio.ensure_future(pool.run(work))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        release.set()
+    
+    asyncio.run(scenario())
+    pool.shutdown()
+    stats = pool.get_stats()
+    assert (stats["active"], stats["queued"], stats["completed"]) == (0, 0, 1)
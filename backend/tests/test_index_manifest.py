@@ -0,0 +1,34 @@
+"""Tests for the content-hash manifest"""
+
+from services.index_manifest import IndexManifest
+
+
+def test_digest_covers_text_metadata_and_model():
+    base = IndexManifest.digest("rain jacket", {"price": 79.99}, "model")
+    assert IndexManifest.digest("rain jacket", {"price": 79.99}, "model") == base
+    assert IndexManifest.digest("rain jackets", {"price": 79.99}, "model") != base
+    assert IndexManifest.digest("rain jacket", {"price": 69.99}, "model") != base
+    assert IndexManifest.digest("rain jacket", {"price": 79.99}, "model@onnx-int8") != base
+
+
+def test_diff_groups_items_by_action(tmp_path):
+    manifest = IndexManifest("products", str(tmp_path))
+    manifest.record("kept", "h1")
+    manifest.record("edited", "h2")
+    manifest.record("gone", "h3", ["gone#0", "gone#1"])
+    
+    plan = manifest.diff({"kept": "h1", "edited": "h2b", "new": "h4"})
+    assert (plan.added, plan.updated, plan.deleted, plan.unchanged) == (["new"], ["edited"], ["gone"], ["kept"])
+    assert plan.changed == ["new", "edited"]
+    assert manifest.vectors_for(plan.deleted + ["unknown"]) == ["gone#0", "gone#1"]
+    assert manifest.vector_count == 4
+
+
+def test_save_and_reload(tmp_path):
+    manifest = IndexManifest("products", str(tmp_path / "nested"))
+    manifest.record("a", "h1", ["a#0"])
+    manifest.save()
+    manifest.remove("a")
+    
+    assert IndexManifest("products", str(tmp_path / "nested")).entries == {"a": {"hash": "h1", "vectors": ["a#0"]}}
+    assert manifest.entries == {}
@@ -0,0 +1,90 @@
+"""Tests for batched indexing and incremental sync"""
+
+import pytest
+
+from services.index_manifest import IndexManifest
+
+
+class MemoryStore:
+    """Vector store double recording what the pipeline writes"""
+    
+    def __init__(self):
+        self.vectors = {}
+        self.upserts = []
+    
+    def upsert(self, records):
+        self.upserts.append(len(records))
+        self.vectors.update((record["id"], record) for record in records)
+    
+    def delete(self, ids):
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+
+
+@pytest.fixture
+def pipeline(embedding_service):
+    from services.indexing_pipeline import IndexingPipeline
+    return IndexingPipeline(embedding_service, batch_size=2)
+
+
+def sync(pipeline, manifest, store, items, chunked=False, stored_vectors=None):
+    def chunks(item):
+        return [{"id": f"{item['id']}#{i}", "text": word} for i, word in enumerate(item["text"].split())]
+    
+    return pipeline.sync(
+        items, manifest,
+        text_fn=lambda item: item["text"],
+        metadata_fn=lambda item: {"tag": item.get("tag", "")},
+        vector_fn=lambda item, embedding: {"id": item["id"], "values": embedding},
+        upsert_fn=store.upsert,
+        delete_fn=store.delete,
+        stored_vectors=len(store.vectors) if stored_vectors is None else stored_vectors,
+        chunk_fn=chunks if chunked else None
+    )
+
+
+def test_run_upserts_in_batches(pipeline):
+    store = MemoryStore()
+    items = [{"id": str(i), "text": f"item {i}"} for i in range(5)]
+    report = pipeline.run(items, lambda item: item["text"], lambda item, e: {"id": item["id"], "values": e}, store.upsert)
+    
+    assert report["indexed"] == 5
+    assert store.upserts == [2, 2, 1]
+
+
+def test_sync_reembeds_only_changed_items(pipeline, tmp_path):
+    manifest, store = IndexManifest("items", str(tmp_path)), MemoryStore()
+    items = [{"id": "a", "text": "rain jacket"}, {"id": "b", "text": "hiking boots"}, {"id": "c", "text": "poncho"}]
+    assert sync(pipeline, manifest, store, items)["added"] == 3
+    
+    items = [{"id": "a", "text": "rain jacket"}, {"id": "b", "text": "hiking boots", "tag": "sale"}, {"id": "d", "text": "tent"}]
+    report = sync(pipeline, manifest, store, items)
+    
+    assert {key: report[key] for key in ("added", "updated", "deleted", "unchanged")} == {
+        "added": 1, "updated": 1, "deleted": 1, "unchanged": 1
+    }
+    assert sorted(store.vectors) == ["a", "b", "d"]
+    assert sorted(IndexManifest("items", str(tmp_path)).entries) == ["a", "b", "d"]
+
+
+def test_sync_reembeds_everything_when_store_disagrees_with_manifest(pipeline, tmp_path):
+    manifest, store = IndexManifest("items", str(tmp_path)), MemoryStore()
+    items = [{"id": "a", "text": "rain jacket"}]
+    sync(pipeline, manifest, store, items)
+    
+    report = sync(pipeline, manifest, MemoryStore(), items)
+    assert (report["added"], report["unchanged"]) == (1, 0)
+
+
+def test_chunked_sync_replaces_stale_chunks(pipeline, tmp_path):
+    manifest, store = IndexManifest("docs", str(tmp_path)), MemoryStore()
+    sync(pipeline, manifest, store, [{"id": "doc", "text": "one two three"}], chunked=True)
+    assert sorted(store.vectors) == ["doc#0", "doc#1", "doc#2"]
+    
+    sync(pipeline, manifest, store, [{"id": "doc", "text": "one two"}], chunked=True)
+    assert sorted(store.vectors) == ["doc#0", "doc#1"]
+    
+    # Full re-embed after a count mismatch still removes chunks the item no longer produces
+    sync(pipeline, manifest, store, [{"id": "doc", "text": "one"}], chunked=True, stored_vectors=99)
+    assert sorted(store.vectors) == ["doc#0"]
+    assert manifest.entries["doc"]["vectors"] == ["doc#0"]
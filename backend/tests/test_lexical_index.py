@@ -0,0 +1,95 @@
+"""Tests for BM25 retrieval and reciprocal rank fusion"""
+
+import math
+
+import pytest
+
+from services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+DOCS = {
+    "a": "waterproof rain jacket with gore-tex shell",
+    "b": "rain poncho",
+    "c": "black cotton t-shirt",
+    "d": "waterproof hiking boots waterproof leather",
+}
+
+
+@pytest.fixture
+def index():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.sync({item_id: (text, f"h-{item_id}") for item_id, text in DOCS.items()})
+    return index
+
+
+def reference_bm25(query, docs, k1=1.2, b=0.75):
+    tokenized = {item_id: tokenize(text) for item_id, text in docs.items()}
+    avg_length = sum(map(len, tokenized.values())) / len(tokenized)
+    scores = {}
+    for item_id, terms in tokenized.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in tokenized.values())
+            tf = terms.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(terms) / avg_length))
+        if score:
+            scores[item_id] = score
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    assert tokenize("Gore-Tex SKU-1042, 3.5mm") == [
+        "gore-tex", "gore", "tex", "goretex", "sku-1042", "sku", "1042", "sku1042", "3.5mm", "3", "5mm", "35mm"
+    ]
+
+
+@pytest.mark.parametrize("query", ["waterproof rain", "gore tex", "goretex jacket", "t-shirt", "boots leather"])
+def test_scores_match_the_bm25_formula(index, query):
+    expected = reference_bm25(query, DOCS)
+    results = index.search(query, top_k=10)
+    assert [item_id for item_id, _ in results] == [item_id for item_id, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_unknown_terms_and_empty_index_return_nothing(index):
+    assert index.search("espresso") == []
+    assert BM25Index().search("rain") == []
+
+
+def test_allow_predicate_and_top_k(index):
+    assert [item_id for item_id, _ in index.search("waterproof rain", top_k=1)] == ["a"]
+    assert [item_id for item_id, _ in index.search("waterproof rain", allow=lambda item_id: item_id != "a")] == ["d", "b"]
+
+
+def test_sync_reindexes_changed_digests_and_drops_missing_items(index):
+    report = index.sync({
+        "a": (DOCS["a"], "h-a"),
+        "b": ("storm cape", "h-b2"),
+        "c": (DOCS["c"], "h-c"),
+    })
+    assert report == {"indexed": 1, "removed": 1, "unchanged": 2}
+    assert index.search("poncho") == []
+    assert [item_id for item_id, _ in index.search("cape")] == ["b"]
+    assert [item_id for item_id, _ in index.search("boots")] == []
+
+
+def test_compaction_keeps_scores(index):
+    before = index.search("waterproof rain", top_k=10)
+    index.remove("c")
+    index.add("c", DOCS["c"])
+    assert index.get_stats()["tombstones"] == 1
+    index.compact()
+    
+    assert index.get_stats()["tombstones"] == 0
+    after = index.search("waterproof rain", top_k=10)
+    assert [item_id for item_id, _ in after] == [item_id for item_id, _ in before]
+    assert [score for _, score in after] == pytest.approx([score for _, score in before])
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60)
+    assert [item_id for item_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
@@ -0,0 +1,94 @@
+"""Tests for columnar metadata filters"""
+
+import numpy as np
+import pytest
+
+from services.metadata_columns import CategoricalColumn, MetadataColumns, NumericColumn
+from services.vector_store import LocalVectorStore
+
+
+PRICES = [79.98, 79.99, 80.0, 129.99, 0.1, 0.3]
+
+
+def numeric_column(values):
+    column = NumericColumn(len(values))
+    for row, value in enumerate(values):
+        column.set(row, value)
+    return column
+
+
+def rows(mask):
+    return [int(row) for row in np.flatnonzero(mask)]
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ({"$gte": 79.99}, [1, 2, 3]),
+    ({"$gt": 79.99}, [2, 3]),
+    ({"$lte": 79.99}, [0, 1, 4, 5]),
+    ({"$lt": 79.99}, [0, 4, 5]),
+    ({"$gte": 79.98, "$lte": 80.0}, [0, 1, 2]),
+    ({"$gt": 79.98, "$lt": 80.0}, [1]),
+    ({"$eq": 79.99}, [1]),
+    (79.99, [1]),
+    ({"$eq": 0.1 + 0.2}, []),
+    ({"$eq": 0.3}, [5]),
+    ({"$ne": 79.99}, [0, 2, 3, 4, 5]),
+    ({"$in": [79.99, 129.99]}, [1, 3]),
+    ({"$nin": [79.99, 129.99]}, [0, 2, 4, 5]),
+])
+def test_numeric_bounds_match_stored_values_exactly(condition, expected):
+    column = numeric_column(PRICES)
+    assert rows(column.mask(len(PRICES), condition)) == expected
+
+
+def test_numeric_missing_values_never_match_a_range():
+    column = numeric_column([10.0, None, 30.0])
+    assert rows(column.mask(3, {"$gte": 0})) == [0, 2]
+    assert rows(column.mask(3, {"$lte": 1e9})) == [0, 2]
+
+
+def test_numeric_non_number_operand_matches_nothing():
+    column = numeric_column([10.0, 20.0])
+    assert rows(column.mask(2, {"$gte": "10"})) == []
+
+
+def test_categorical_equality_and_membership():
+    column = CategoricalColumn(4)
+    for row, value in enumerate(["Footwear", "Outerwear", None, "Footwear"]):
+        column.set(row, value)
+    assert rows(column.mask(4, "Footwear")) == [0, 3]
+    assert rows(column.mask(4, {"$in": ["Outerwear", "Bags"]})) == [1]
+    assert rows(column.mask(4, {"$ne": "Footwear"})) == [1, 2]
+    
+    column.set(0, "Bags")
+    assert rows(column.mask(4, {"$eq": "Footwear"})) == [3]
+
+
+def test_mixed_field_is_unsupported_until_rows_change():
+    metadata = [{"tag": "x"}, {"tag": ["y"]}]
+    columns = MetadataColumns()
+    assert columns.build("tag", metadata, 2) is None
+    assert "tag" in columns.unsupported
+    
+    columns.remove()
+    assert columns.build("tag", metadata[:1], 2).kind == "categorical"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.delenv("LOCAL_INDEX_DIR", raising=False)
+    store = LocalVectorStore("test", 4, initial_capacity=8, index_type="flat", quantization="none")
+    store.upsert([
+        {"id": f"p{row}", "values": [1.0, float(row), 0.0, 0.0], "metadata": {"price": price, "category": "Gear"}}
+        for row, price in enumerate(PRICES)
+    ])
+    return store
+
+
+def test_store_price_filter_keeps_products_priced_at_the_bound(store):
+    def ids(filter):
+        return sorted(match["id"] for match in store.query([1.0, 1.0, 0.0, 0.0], top_k=10, filter=filter)["matches"])
+    
+    assert ids({"price": {"$gte": 79.99}}) == ["p1", "p2", "p3"]
+    assert ids({"price": {"$lte": 79.99}, "category": "Gear"}) == ["p0", "p1", "p4", "p5"]
+    assert ids({"price": {"$eq": 79.99}}) == ["p1"]
@@ -0,0 +1,50 @@
+"""Parity of the ONNX Runtime backend with the PyTorch model"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from services.embedding_service import EmbeddingService
+from services.onnx_encoder import OnnxEncoder, min_cosine_similarity
+
+MODEL_NAME = os.getenv("ONNX_PARITY_TEST_MODEL", "all-MiniLM-L6-v2")
+
+# Beyond the startup probes: very short, non-ASCII and truncated inputs
+PROBES = EmbeddingService.PARITY_PROBES + [
+    "tent",
+    "Chaqueta impermeable para senderismo, talla M",
+    "ultralight " * 400
+]
+
+
+@pytest.fixture(scope="module")
+def torch_model():
+    try:
+        return sentence_transformers.SentenceTransformer(MODEL_NAME)
+    except Exception as e:
+        pytest.skip(f"Model {MODEL_NAME} unavailable: {e}")
+
+
+@pytest.fixture(scope="module")
+def reference(torch_model):
+    return np.asarray(torch_model.encode(PROBES, convert_to_numpy=True), dtype=np.float32)
+
+
+@pytest.mark.parametrize("quantize, min_cosine", [(False, 0.9999), (True, 0.99)])
+def test_onnx_embeddings_stay_close_to_pytorch(torch_model, reference, tmp_path, quantize, min_cosine):
+    encoder = OnnxEncoder(torch_model, MODEL_NAME, model_dir=str(tmp_path), quantize=quantize, intra_op_threads=1)
+    candidate = encoder.encode(PROBES, batch_size=4)
+    
+    assert candidate.dtype == np.float32
+    assert min_cosine_similarity(reference, candidate) >= min_cosine
+    # Single texts come back as one vector, like SentenceTransformer.encode()
+    assert encoder.encode(PROBES[0]).shape == (torch_model.get_sentence_embedding_dimension(),)
+
+
+def test_min_cosine_similarity_rejects_shape_mismatch():
+    with pytest.raises(ValueError):
+        min_cosine_similarity(np.ones((2, 4)), np.ones((2, 3)))
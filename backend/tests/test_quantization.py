@@ -0,0 +1,60 @@
+"""Tests for the vector quantizers"""
+
+import numpy as np
+import pytest
+
+from services.quantization import ProductQuantizer, ScalarQuantizer, create_quantizer
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((600, 32)).astype(np.float32)
+
+
+def test_scalar_codes_reconstruct_within_half_a_level(vectors):
+    quantizer = ScalarQuantizer(32)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    
+    assert codes.dtype == np.uint8 and codes.shape == vectors.shape
+    assert np.all(np.abs(quantizer.decode(codes) - vectors) <= quantizer.scale / 2 + 1e-6)
+
+
+def test_scalar_scores_match_decoded_inner_products(vectors):
+    quantizer = ScalarQuantizer(32)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    query = vectors[0]
+    
+    np.testing.assert_allclose(quantizer.scores(query, codes, block_size=100), quantizer.decode(codes) @ query, rtol=1e-4, atol=1e-3)
+
+
+def test_product_quantizer_uses_a_divisor_of_the_dimension():
+    assert ProductQuantizer(30, subquantizers=8).m == 6
+    assert ProductQuantizer(32, subquantizers=64).m == 32
+
+
+def test_product_scores_match_decoded_inner_products(vectors):
+    quantizer = ProductQuantizer(32, subquantizers=8)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    
+    assert codes.shape == (600, 8)
+    np.testing.assert_allclose(quantizer.scores(vectors[1], codes), quantizer.decode(codes) @ vectors[1], rtol=1e-4, atol=1e-3)
+    # Codebooks reduce the reconstruction error well below the vectors' own spread
+    assert np.mean((quantizer.decode(codes) - vectors) ** 2) < 0.5 * np.mean(vectors ** 2)
+
+
+@pytest.mark.parametrize("kind", ["int8", "pq"])
+def test_state_round_trip(vectors, kind):
+    quantizer = create_quantizer(kind, 32)
+    quantizer.train(vectors)
+    restored = create_quantizer(kind, 32)
+    restored.load_state(quantizer.state())
+    np.testing.assert_array_equal(restored.encode(vectors), quantizer.encode(vectors))
+
+
+def test_create_quantizer_validates_kind():
+    assert create_quantizer("none", 32) is None
+    with pytest.raises(ValueError):
+        create_quantizer("fp4", 32)
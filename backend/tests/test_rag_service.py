@@ -0,0 +1,67 @@
+"""Tests for question answering over the knowledge base"""
+
+import asyncio
+
+import pytest
+
+from data.sample_data import DOCUMENTS, PRODUCTS
+
+
+QUESTION = "How should I choose waterproof rain gear for hiking?"
+
+
+@pytest.fixture
+def rag_service(monkeypatch, search_service):
+    from services.executor_service import ExecutorService
+    from services.rag_service import RAGService
+    
+    # Every call must compute its answer, not read it from the answer cache
+    monkeypatch.setenv("ANSWER_CACHE_SIZE", "0")
+    search_service.index_products(PRODUCTS)
+    executor = ExecutorService()
+    service = RAGService(search_service.embedding_service, search_service, executor_service=executor)
+    service.index_documents(DOCUMENTS)
+    yield service
+    executor.shutdown()
+
+
+@pytest.fixture
+def encoded(rag_service, monkeypatch):
+    """Texts passed to the model after setup"""
+    texts = []
+    model = rag_service.embedding_service.model
+    encode = model.encode
+    
+    def recording(sentences, *args, **kwargs):
+        texts.extend([sentences] if isinstance(sentences, str) else sentences)
+        return encode(sentences, *args, **kwargs)
+    
+    monkeypatch.setattr(model, "encode", recording)
+    return texts
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.mark.parametrize("mode", ["semantic", "hybrid"])
+def test_question_is_embedded_once_per_answer(rag_service, encoded, mode):
+    result = rag_service.generate_answer(QUESTION, mode=mode, include_products=True)
+    assert encoded == [QUESTION]
+    assert result["sources"] and result["related_products"]
+    
+    encoded.clear()
+    asyncio.run(rag_service.generate_answer_async(QUESTION + "?", mode=mode))
+    assert encoded == [QUESTION + "?"]
+    
+    encoded.clear()
+    asyncio.run(collect(rag_service.generate_answer_stream(QUESTION + "!", mode=mode)))
+    assert encoded == [QUESTION + "!"]
+
+
+def test_products_come_from_the_question_embedding(rag_service):
+    result = rag_service.generate_answer(QUESTION)
+    
+    embedding = rag_service.embedding_service.generate_embedding(QUESTION)
+    expected = rag_service.search_service.search_by_vector(embedding, limit=3)
+    assert [p["id"] for p in result["related_products"]] == [p.id for p in expected]
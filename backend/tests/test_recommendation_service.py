@@ -0,0 +1,69 @@
+"""Tests for RecommendationService"""
+
+import pytest
+
+from data.sample_data import PRODUCTS
+
+
+@pytest.fixture(params=["table", "no_table"])
+def recommendations(request, search_service, embedding_service, monkeypatch):
+    from services.recommendation_service import RecommendationService
+    
+    monkeypatch.setenv("SIMILARITY_TABLE_NEIGHBOURS", "20" if request.param == "table" else "0")
+    search_service.index_products(PRODUCTS)
+    service = RecommendationService(search_service, embedding_service)
+    
+    queries = []
+    query = search_service.index.query
+    
+    def counting_query(*args, **kwargs):
+        queries.append(kwargs)
+        return query(*args, **kwargs)
+    
+    monkeypatch.setattr(search_service.index, "query", counting_query)
+    service.vector_queries = queries
+    return service
+
+
+def test_name_fallback_makes_at_most_one_vector_query(recommendations):
+    products, scores = recommendations.recommend_by_product_name("waterproof rain shell for storms", limit=3)
+    
+    assert len(recommendations.vector_queries) <= 1
+    assert 0 < len(products) <= 3
+    assert len(scores) == len(products)
+    assert scores == sorted(scores, reverse=True)
+    # The top hit is the product recommendations are based on, not one of them
+    source = recommendations.search_service.index.query(
+        vector=recommendations.embedding_service.generate_embedding("waterproof rain shell for storms"), top_k=1
+    )["matches"][0]["id"]
+    assert source not in [product.id for product in products]
+
+
+def test_name_match_uses_no_vector_query_with_table(recommendations):
+    products, _ = recommendations.recommend_by_product_name("Waterproof Rain Jackett", limit=3)
+    
+    assert products and "prod_001" not in [product.id for product in products]
+    if recommendations.similarity_table is not None:
+        assert recommendations.vector_queries == []
+    else:
+        assert len(recommendations.vector_queries) == 1
+
+
+def test_similarity_table_follows_product_resync(search_service, embedding_service, monkeypatch):
+    from services.recommendation_service import RecommendationService
+    
+    monkeypatch.setenv("SIMILARITY_TABLE_NEIGHBOURS", "5")
+    search_service.index_products(PRODUCTS)
+    service = RecommendationService(search_service, embedding_service)
+    assert len(service.similarity_table) == len(PRODUCTS)
+    
+    # Make prod_015 a near copy of prod_001; the table must pick it up without a restart
+    products = [dict(product) for product in PRODUCTS]
+    products[14] = {**PRODUCTS[0], "id": "prod_015"}
+    search_service.index_products(products[:-1] + [products[14]])
+    
+    recommended, _ = service.recommend_by_product_id("prod_001", limit=1)
+    assert [product.id for product in recommended] == ["prod_015"]
+    
+    batch = service.recommend_batch_by_product_ids(["prod_001", "missing"], limit=1)
+    assert [[product.id for product in products] for products, _ in batch] == [["prod_015"], []]
@@ -0,0 +1,103 @@
+"""Tests for cross-encoder re-ranking under a latency budget"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class Clock:
+    """Manual time.perf_counter() replacement"""
+    
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+class OverlapCrossEncoder:
+    """Scores a pair by shared words; every pair costs pair_seconds on the clock"""
+    
+    clock = None
+    pair_seconds = 0.01
+    
+    def __init__(self, model_name):
+        self.batches = []
+    
+    def predict(self, pairs, batch_size=32, **kwargs):
+        self.batches.append(len(pairs))
+        self.clock.now += self.pair_seconds * len(pairs)
+        return [float(len(set(query.split()) & set(text.split()))) for query, text in pairs]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    pytest.importorskip("sentence_transformers")
+    from services import reranker as module
+    
+    clock = Clock()
+    monkeypatch.setattr(module, "time", SimpleNamespace(perf_counter=clock))
+    monkeypatch.setattr(module, "CrossEncoder", OverlapCrossEncoder)
+    monkeypatch.setattr(OverlapCrossEncoder, "clock", clock)
+    return clock
+
+
+def make_reranker(batch_size=4, cache_size=100):
+    from services.reranker import CrossEncoderReranker
+    
+    return CrossEncoderReranker("overlap", batch_size=batch_size, cache_size=cache_size)
+
+
+CANDIDATES = ["red shoes", "blue running shoes", "running shoes for trail", "green hat", "trail running shoes light"]
+QUERY = "light trail running shoes"
+
+
+def test_rerank_orders_by_cross_encoder_score(clock):
+    reranker = make_reranker()
+    
+    ranked, scores = reranker.rerank(QUERY, CANDIDATES, lambda text: text, top_k=3)
+    
+    assert ranked == ["trail running shoes light", "running shoes for trail", "blue running shoes"]
+    assert scores == [4.0, 3.0, 2.0]
+    assert reranker.model.batches == [4, 1]
+
+
+def test_cached_pairs_are_not_scored_again(clock):
+    reranker = make_reranker(cache_size=3)
+    reranker.rerank(QUERY, CANDIDATES, lambda text: text, top_k=5)
+    reranker.model.batches.clear()
+    
+    reranker.rerank("  Light trail  RUNNING shoes", CANDIDATES[-3:], lambda text: text, top_k=3)
+    
+    assert reranker.model.batches == []
+    stats = reranker.get_stats()
+    assert stats["cache_hits"] == 3 and stats["cached_pairs"] == 3 and stats["pairs_scored"] == 5
+
+
+def test_spent_budget_keeps_first_stage_order(clock):
+    reranker = make_reranker()
+    started_at = clock.now
+    clock.now += 0.05
+    
+    ranked, scores = reranker.rerank(QUERY, CANDIDATES, lambda text: text, top_k=2, budget_ms=20, started_at=started_at)
+    
+    assert (ranked, scores) == (CANDIDATES[:2], None)
+    assert reranker.model.batches == []
+    assert reranker.get_stats()["fallbacks"] == 1
+
+
+def test_batches_shrink_to_what_the_budget_affords(clock):
+    reranker = make_reranker()
+    reranker.rerank("warm up", ["a"], lambda text: text, top_k=1)
+    reranker.model.batches.clear()
+    
+    # 25 ms at 10 ms per pair affords two pairs, then the budget cannot cover another
+    ranked, scores = reranker.rerank(QUERY, CANDIDATES, lambda text: text, top_k=5, budget_ms=25)
+    
+    assert (ranked, scores) == (CANDIDATES, None)
+    assert reranker.model.batches == [2]
+    
+    # Pairs scored before the fallback stay cached for the next request
+    ranked, scores = reranker.rerank(QUERY, CANDIDATES, lambda text: text, top_k=1, budget_ms=50)
+    assert ranked == ["trail running shoes light"]
+    assert reranker.model.batches == [2, 3]
@@ -0,0 +1,50 @@
+"""Tests for SearchService indexing and retrieval"""
+
+import copy
+
+from data.sample_data import PRODUCTS
+
+
+def products_with(**changes):
+    products = copy.deepcopy(PRODUCTS)
+    products[0].update(changes)
+    return products
+
+
+def lexical_ids(service, query):
+    return [product.id for product in service.search_lexical(query, limit=5)]
+
+
+def test_brand_only_edit_is_retokenized(search_service):
+    search_service.index_products(products_with(brand="Zephyrline"))
+    assert lexical_ids(search_service, "zephyrline") == [PRODUCTS[0]["id"]]
+    
+    report = search_service.index_products(products_with(brand="Glacierworks"))
+    # The vector record did not change, but the lexical text did
+    assert report["updated"] == 0
+    assert lexical_ids(search_service, "zephyrline") == []
+    assert lexical_ids(search_service, "glacierworks") == [PRODUCTS[0]["id"]]
+
+
+def test_description_tail_edit_is_retokenized(search_service):
+    long_description = PRODUCTS[0]["description"] + " " + "filler " * 100
+    search_service.index_products(products_with(description=long_description + "quokka"))
+    assert lexical_ids(search_service, "quokka") == [PRODUCTS[0]["id"]]
+    
+    search_service.index_products(products_with(description=long_description + "wombat"))
+    assert lexical_ids(search_service, "quokka") == []
+    assert lexical_ids(search_service, "wombat") == [PRODUCTS[0]["id"]]
+
+
+def test_vector_store_fallback_hits_are_not_written_to_the_catalog(search_service):
+    search_service.index_products(PRODUCTS)
+    long_description = "x" * 800
+    search_service.catalog.upsert([{**PRODUCTS[1], "description": long_description}])
+    search_service.catalog.remove([PRODUCTS[0]["id"]])
+    
+    products = search_service.get_products_by_ids([PRODUCTS[0]["id"], PRODUCTS[1]["id"], "missing"])
+    
+    assert [product.id for product in products] == [PRODUCTS[0]["id"], PRODUCTS[1]["id"]]
+    assert search_service.catalog.get(PRODUCTS[0]["id"]) is None
+    assert len(search_service.catalog) == len(PRODUCTS) - 1
+    assert search_service.catalog.get(PRODUCTS[1]["id"])["description"] == long_description
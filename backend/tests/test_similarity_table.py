@@ -0,0 +1,86 @@
+"""Tests for the precomputed similar-product table"""
+
+import numpy as np
+import pytest
+
+from services.similarity_table import SimilarityTable
+
+
+def products(count, seed=0, dimension=8):
+    rng = np.random.default_rng(seed)
+    return [f"p{i}" for i in range(count)], rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def neighbour_ids(table, limit=5):
+    return {product_id: [n for n, _ in table.lookup(product_id, limit)] for product_id in table.ids}
+
+
+def test_build_matches_brute_force():
+    ids, matrix = products(30)
+    table = SimilarityTable(neighbours=5)
+    table.build(ids, matrix, ["h"] * 30)
+    
+    normalized = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    similarities = normalized @ normalized.T
+    np.fill_diagonal(similarities, -np.inf)
+    for row, product_id in enumerate(ids):
+        expected = [ids[i] for i in np.argsort(-similarities[row])[:5]]
+        assert neighbour_ids(table)[product_id] == expected
+        scores = [score for _, score in table.lookup(product_id, 5)]
+        assert scores == pytest.approx(sorted(similarities[row], reverse=True)[:5], abs=2e-3)
+
+
+def test_incremental_update_equals_full_rebuild():
+    ids, matrix = products(40)
+    table = SimilarityTable(neighbours=5)
+    table.build(ids, matrix, [f"h{i}" for i in range(40)])
+    
+    # Change three products, remove two and add two
+    rng = np.random.default_rng(1)
+    hashes = {product_id: f"h{i}" for i, product_id in enumerate(ids)}
+    for i in (3, 17, 25):
+        matrix[i] = rng.standard_normal(8)
+        hashes[ids[i]] = f"h{i}-edited"
+    keep = [i for i in range(40) if i not in (5, 30)]
+    new_ids = [ids[i] for i in keep] + ["n1", "n2"]
+    new_matrix = np.vstack([matrix[keep], rng.standard_normal((2, 8)).astype(np.float32)])
+    new_hashes = [hashes[ids[i]] for i in keep] + ["n1", "n2"]
+    
+    report = table.update(new_ids, new_matrix, new_hashes)
+    assert (report["changed"], report["removed"]) == (5, 2)
+    assert report["recomputed"] < len(new_ids)
+    
+    rebuilt = SimilarityTable(neighbours=5)
+    rebuilt.build(new_ids, new_matrix, new_hashes)
+    assert neighbour_ids(table) == neighbour_ids(rebuilt)
+
+
+def test_lookup_misses_for_unknown_products_and_large_limits():
+    ids, matrix = products(10)
+    table = SimilarityTable(neighbours=3)
+    table.build(ids, matrix, ["h"] * 10)
+    
+    assert table.lookup("unknown", 3) is None
+    assert table.lookup("p0", 4) is None
+    assert len(table.lookup("p0", 2)) == 2
+
+
+def test_small_catalog_leaves_missing_neighbours_out():
+    ids, matrix = products(3)
+    table = SimilarityTable(neighbours=5)
+    table.build(ids, matrix, ["h"] * 3)
+    assert len(table.lookup("p0", 5)) == 2
+
+
+def test_save_and_load(tmp_path):
+    ids, matrix = products(12)
+    path = str(tmp_path / "similar.npz")
+    table = SimilarityTable(neighbours=4, path=path)
+    table.build(ids, matrix, [f"h{i}" for i in range(12)])
+    table.save()
+    
+    loaded = SimilarityTable(neighbours=4, path=path)
+    assert neighbour_ids(loaded, 4) == neighbour_ids(table, 4)
+    assert loaded.diff({product_id: f"h{i}" for i, product_id in enumerate(ids)}) == ([], [])
+    # A table saved with another neighbour count is ignored
+    assert len(SimilarityTable(neighbours=8, path=path)) == 0
@@ -0,0 +1,130 @@
+"""Tests for the local vector store"""
+
+import numpy as np
+import pytest
+
+from services.vector_store import LocalVectorStore
+
+
+def random_vectors(count, dimension=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+
+
+def make_store(monkeypatch, count=0, index_type="flat", quantization="none", dimension=16, **kwargs):
+    monkeypatch.delenv("LOCAL_INDEX_DIR", raising=False)
+    store = LocalVectorStore("test", dimension, index_type=index_type, quantization=quantization, **kwargs)
+    if count:
+        vectors = random_vectors(count, dimension)
+        store.upsert([{"id": f"v{i}", "values": vector, "metadata": {"row": i}} for i, vector in enumerate(vectors)])
+    return store
+
+
+def test_query_returns_nearest_by_cosine(monkeypatch):
+    store = make_store(monkeypatch, count=50)
+    vectors = random_vectors(50)
+    
+    matches = store.query(vectors[7] * 3.0, top_k=3)["matches"]
+    assert matches[0]["id"] == "v7"
+    assert matches[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert [m["score"] for m in matches] == sorted((m["score"] for m in matches), reverse=True)
+
+
+def test_delete_and_fetch_matrix_skip_missing_ids(monkeypatch):
+    store = make_store(monkeypatch, count=10)
+    store.delete(["v3", "unknown"])
+    
+    ids, matrix = store.fetch_matrix(["v1", "v3", "v9"])
+    assert ids == ["v1", "v9"]
+    assert matrix.shape == (2, 16)
+    assert store.describe_index_stats()["total_vector_count"] == 9
+    assert "v3" not in store.fetch(["v3"])["vectors"]
+
+
+
+def test_upsert_overwrites_existing_ids(monkeypatch):
+    store = make_store(monkeypatch, count=5)
+    store.upsert([{"id": "v2", "values": random_vectors(1, seed=9)[0], "metadata": {"row": 99}}])
+    
+    assert store.describe_index_stats()["total_vector_count"] == 5
+    match = store.query(random_vectors(1, seed=9)[0], top_k=1)["matches"][0]
+    assert (match["id"], match["metadata"]) == ("v2", {"row": 99})
+
+
+def test_filters_restrict_matches(monkeypatch):
+    store = make_store(monkeypatch)
+    vectors = random_vectors(40)
+    store.upsert([
+        {"id": f"v{i}", "values": vector, "metadata": {"category": "Shoes" if i % 2 else "Outerwear", "price": float(i)}}
+        for i, vector in enumerate(vectors)
+    ])
+    
+    matches = store.query(vectors[4], top_k=40, filter={"category": {"$eq": "Shoes"}, "price": {"$gte": 10, "$lte": 20}})["matches"]
+    
+    assert sorted(int(m["id"][1:]) for m in matches) == [11, 13, 15, 17, 19]
+
+
+def test_query_batch_matches_single_queries(monkeypatch):
+    store = make_store(monkeypatch, count=30)
+    queries = random_vectors(5, seed=3)
+    
+    batched = store.query_batch(queries, top_k=4, block_size=2)
+    
+    for query, result in zip(queries, batched):
+        single = store.query(query, top_k=4)["matches"]
+        assert [m["id"] for m in result["matches"]] == [m["id"] for m in single]
+        assert [m["score"] for m in result["matches"]] == pytest.approx([m["score"] for m in single])
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_index_loads_and_stays_writable(monkeypatch, tmp_path, mmap):
+    store = make_store(monkeypatch, count=20)
+    store.save(str(tmp_path))
+    
+    loaded = LocalVectorStore("test", 16, data_dir=str(tmp_path), mmap=mmap)
+    assert loaded.describe_index_stats()["total_vector_count"] == 20
+    assert loaded.fetch(["v5"])["vectors"]["v5"]["metadata"] == {"row": 5}
+    assert loaded.query(random_vectors(20)[5], top_k=1)["matches"][0]["id"] == "v5"
+    
+    loaded.upsert([{"id": "new", "values": random_vectors(1, seed=7)[0], "metadata": {}}])
+    loaded.delete(["v5"])
+    assert loaded.query(random_vectors(1, seed=7)[0], top_k=1)["matches"][0]["id"] == "new"
+    
+    # Changes stay in memory until persisted
+    reopened = LocalVectorStore("test", 16, data_dir=str(tmp_path), mmap=mmap)
+    assert reopened.describe_index_stats()["total_vector_count"] == 20
+    assert reopened.query(random_vectors(20)[5], top_k=1)["matches"][0]["id"] == "v5"
+
+
+def test_recall_report_on_exact_index_is_not_applicable(monkeypatch):
+    report = make_store(monkeypatch, count=20).recall_report(k=5)
+    assert report["status"] == "not_applicable"
+    assert report["index"] == "flat"
+
+
+def test_recall_report_on_emptied_ivf_index(monkeypatch):
+    monkeypatch.setenv("IVF_NLIST", "8")
+    store = make_store(monkeypatch, count=64, index_type="ivf")
+    store.delete([f"v{i}" for i in range(64)])
+    assert store.recall_report()["status"] == "empty"
+
+
+def test_recall_report_measures_ivf(monkeypatch):
+    monkeypatch.setenv("IVF_NLIST", "8")
+    monkeypatch.setenv("IVF_NPROBE", "2")
+    store = make_store(monkeypatch, count=256, index_type="ivf")
+    
+    report = store.recall_report(k=5, sample_size=32, nprobe_values=[1, 8])
+    assert report["status"] == "measured"
+    assert report["index"] == "ivf"
+    assert 0.0 < report["recall"][1] <= report["recall"][8] == 1.0
+
+
+@pytest.mark.parametrize("quantization, min_recall", [("int8", 0.9), ("pq", 0.5)])
+def test_quantized_search_keeps_recall(monkeypatch, quantization, min_recall):
+    store = make_store(monkeypatch, count=1100, quantization=quantization, rerank_factor=4)
+    
+    report = store.recall_report(k=10, sample_size=50)
+    assert report["status"] == "measured"
+    assert report["quantization"] == quantization
+    assert list(report["recall"].values())[0] >= min_recall
+    assert store.quantization_report()["memory_saved_pct"] > 0
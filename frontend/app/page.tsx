@@ -5,7 +5,7 @@ import { motion } from 'framer-motion';
 import SearchBar from '@/components/SearchBar';
 import ProductCard from '@/components/ProductCard';
 import ChatInterface from '@/components/ChatInterface';
-import { searchProducts, chatWithAssistant, getRecommendations } from '@/lib/api';
+import { searchProducts, streamChat, getRecommendations } from '@/lib/api';
 import type { Product, ChatMessage, RecommendationResponse } from '@/types';
 
 type Tab = 'search' | 'chat' | 'recommend';
@@ -29,8 +29,11 @@ export default function Home() {
     }
   };
 
-  const handleChat = async (message: string): Promise<ChatMessage> => {
-    return await chatWithAssistant(message);
+  const handleChat = async (
+    message: string,
+    onUpdate?: (partial: ChatMessage) => void
+  ): Promise<ChatMessage> => {
+    return await streamChat(message, onUpdate ?? (() => {}));
   };
 
   const handleGetRecommendations = async (product: Product) => {
@@ -5,7 +5,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import type { ChatMessage } from '@/types';
 
 interface ChatInterfaceProps {
-  onSendMessage: (message: string) => Promise<ChatMessage>;
+  onSendMessage: (message: string, onUpdate?: (partial: ChatMessage) => void) => Promise<ChatMessage>;
 }
 
 export default function ChatInterface({ onSendMessage }: ChatInterfaceProps) {
@@ -20,9 +20,18 @@ export default function ChatInterface({ onSendMessage }: ChatInterfaceProps) {
     setInput('');
     setLoading(true);
 
+    // Streamed updates replace the pending message in place
+    let started = false;
+    const showMessage = (message: ChatMessage) => {
+      const first = !started;
+      started = true;
+      setLoading(false);
+      setMessages((prev) => (first ? [...prev, message] : [...prev.slice(0, -1), message]));
+    };
+
     try {
-      const response = await onSendMessage(userMessage);
-      setMessages([...messages, response]);
+      const response = await onSendMessage(userMessage, showMessage);
+      showMessage(response);
     } catch (error) {
       console.error('Error sending message:', error);
     } finally {
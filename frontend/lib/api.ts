@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Product, SearchResponse, ChatMessage, RecommendationResponse } from '@/types';
+import type { Product, ProductPage, SearchMode, SearchResponse, ChatMessage, RecommendationResponse } from '@/types';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -15,7 +15,8 @@ export const searchProducts = async (
     limit: number = 10,
     category?: string,
     minPrice?: number,
-    maxPrice?: number
+    maxPrice?: number,
+    mode: SearchMode = 'semantic'
 ): Promise<SearchResponse> => {
     const response = await api.post('/api/search', {
         query,
@@ -23,6 +24,7 @@ export const searchProducts = async (
         category,
         min_price: minPrice,
         max_price: maxPrice,
+        mode,
     });
     return response.data;
 };
@@ -30,16 +32,83 @@ export const searchProducts = async (
 export const chatWithAssistant = async (
     question: string,
     contextLimit: number = 3,
-    includeProducts: boolean = true
+    includeProducts: boolean = true,
+    mode: SearchMode = 'semantic'
 ): Promise<ChatMessage> => {
     const response = await api.post('/api/chat', {
         question,
         context_limit: contextLimit,
         include_products: includeProducts,
+        mode,
     });
     return response.data;
 };
 
+export const streamChat = async (
+    question: string,
+    onUpdate: (message: ChatMessage) => void,
+    contextLimit: number = 3,
+    includeProducts: boolean = true,
+    mode: SearchMode = 'semantic'
+): Promise<ChatMessage> => {
+    // Server-Sent Events over POST: sources, answer pieces, products, done
+    const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream',
+        },
+        body: JSON.stringify({
+            question,
+            context_limit: contextLimit,
+            include_products: includeProducts,
+            mode,
+        }),
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed: ${response.status}`);
+    }
+
+    const message: ChatMessage = { question, answer: '', sources: [], related_products: [] };
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    const handleEvent = (block: string) => {
+        let name = 'message';
+        const data: string[] = [];
+        for (const line of block.split('\n')) {
+            if (line.startsWith('event:')) name = line.slice(6).trim();
+            else if (line.startsWith('data:')) data.push(line.slice(5).trimStart());
+        }
+        if (!data.length) return;
+        const payload = JSON.parse(data.join('\n'));
+
+        if (name === 'sources') message.sources = payload;
+        else if (name === 'answer') message.answer += payload;
+        else if (name === 'products') message.related_products = payload;
+        else if (name === 'error') throw new Error(payload.detail);
+        else return;
+        onUpdate({ ...message });
+    };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary = buffer.indexOf('\n\n');
+        while (boundary !== -1) {
+            handleEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf('\n\n');
+        }
+    }
+    if (buffer.trim()) handleEvent(buffer);
+
+    return message;
+};
+
 export const getRecommendations = async (
     productId?: string,
     productName?: string,
@@ -60,6 +129,25 @@ export const getAllProducts = async (): Promise<Product[]> => {
     return response.data;
 };
 
+export const getProductsPage = async (
+    limit: number = 50,
+    cursor?: string,
+    sort: 'id' | 'name' | 'price' | 'rating' = 'id',
+    order: 'asc' | 'desc' = 'asc',
+    fields?: string[]
+): Promise<ProductPage> => {
+    const response = await api.get('/api/products', {
+        params: {
+            limit,
+            cursor,
+            sort,
+            order,
+            fields: fields?.join(','),
+        },
+    });
+    return response.data;
+};
+
 export const getProduct = async (productId: string): Promise<Product> => {
     const response = await api.get(`/api/products/${productId}`);
     return response.data;
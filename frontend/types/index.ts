@@ -11,6 +11,14 @@ export interface Product {
     brand?: string;
 }
 
+export interface ProductPage {
+    items: Partial<Product>[];
+    next_cursor?: string | null;
+    total: number;
+}
+
+export type SearchMode = 'semantic' | 'lexical' | 'hybrid';
+
 export interface SearchResponse {
     query: string;
     results: Product[];